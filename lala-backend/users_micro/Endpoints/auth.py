@@ -2,25 +2,35 @@ from datetime import timedelta, datetime
 from fastapi import APIRouter, HTTPException, Depends
 from starlette import status
 from typing import Annotated
-from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from jose import jwt, JWTError
-from db.connection import db_dependency
+try:
+    import jwt as pyjwt  # optional faster backend, see JWT_BACKEND
+except ImportError:
+    pyjwt = None
+from db.connection import async_db_dependency
 from models import userModels
-from models.userModels import Users
-from sqlalchemy import or_
+from models.userModels import Users, RefreshToken, RevokedToken
+from sqlalchemy import exc, false, or_, select, update
+from sqlalchemy.exc import IntegrityError
 import json
-from schemas.schemas import CreateUserRequest, Token, FromData
+from schemas.schemas import CreateUserRequest, Token, FromData, RefreshTokenRequest, RegisterResponse, LoginResponse, TokenPair, DetailResponse
 from schemas.returnSchemas import ReturnUser
-from functions.send_mail import send_new_email
+from functions.send_mail import queue_email
 from functions.encrpt import encrypt_any_data
-from emailsTemps.custom_email_send import custom_email
-
-from dotenv import load_dotenv
+from emailsTemps.registry import render_email
+from functions.cache import TTLCache
+from functions.revocation import revocation_list
+from functions.passwords import password_hasher
+
+import hashlib
+import logging
+import secrets
+import time
+import uuid
 import os
 
-# Load environment variables from .env file
-load_dotenv()
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
@@ -30,135 +40,262 @@ ALGORITHM = os.getenv("ALGORITHM")
 NOVA_FRONT_USERNAME = os.getenv("NOVA_FRONT_USERNAME")
 NOVA_FRONT_PASSWORD = os.getenv("NOVA_FRONT_PASSWORD")
 
+# access tokens are short lived, clients keep sessions alive through /auth/refresh
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "15"))
+REFRESH_TOKEN_EXPIRE_DAYS = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "30"))
+
+# verified token claims are cached by token digest until they expire
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))  # 0 disables the cache
+TOKEN_CACHE_TTL = float(os.getenv("TOKEN_CACHE_TTL", "300"))
+# "jose" (python-jose) or "pyjwt" when PyJWT is installed
+JWT_BACKEND = os.getenv("JWT_BACKEND", "jose")
+
 # setup token gen and pass encrpty
-bcrypt_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_bearer = OAuth2PasswordBearer(tokenUrl="auth/token")
+token_cache = TTLCache(maxsize=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL)
 
 
-# for frontend user --------------------------------
+def decode_with_jose(token: str) -> dict:
+    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
 
 
-@router.post("/register", description="This endpoint will register a user manually.")
-async def register_user(db: db_dependency, create_user_request: CreateUserRequest):
+def decode_with_pyjwt(token: str) -> dict:
     try:
-        # Check if phone or email already exists
-        check_phone = (
-            db.query(Users)
-            .filter(Users.phone == create_user_request.phone)
-            .first()
-        )
-        check_email = (
-            db.query(Users)
-            .filter(Users.email == create_user_request.email)
-            .first()
-        )
-        check_id = (
-            db.query(Users)
-            .filter(Users.id_number == create_user_request.id_number)
-            .first()
-        )
+        return pyjwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except pyjwt.PyJWTError as e:
+        raise JWTError(str(e))
+
 
-        if check_id:
-            return HTTPException(status_code=400, detail="Id number already taken")
-        if check_phone:
-            return HTTPException(status_code=400, detail="Phone number already taken")
+JWT_DECODERS = {"jose": decode_with_jose, "pyjwt": decode_with_pyjwt}
+decode_jwt = JWT_DECODERS[JWT_BACKEND]
 
-        if check_email:
-            return HTTPException(status_code=400, detail="Email already taken")
+
+def verify_token(token: str) -> dict:
+    # Verified claims are cached under the token's digest so repeated requests
+    # with the same token skip signature checking. An entry never outlives
+    # the token's own exp.
+    key = hashlib.sha256(token.encode()).digest()
+    claims = token_cache.get(key)
+    if claims is None:
+        claims = decode_jwt(token)
+        remaining = claims.get("exp", 0) - time.time()
+        if remaining > 0:
+            token_cache.set(key, claims, ttl=remaining)
+    return claims
+
+
+# for frontend user --------------------------------
+
+
+# messages for an identifier that is already registered, in the order they are reported
+DUPLICATE_MESSAGES = (
+    ("id_number", "Id number already taken"),
+    ("phone", "Phone number already taken"),
+    ("email", "Email already taken"),
+)
+
+
+async def find_duplicate(db, values: dict):
+    # One indexed lookup for all identifiers at once; returns the message of
+    # the first one already in use, or None
+    values = {field: value for field, value in values.items() if value}
+    if not values:
+        return None
+    rows = (await db.execute(
+        select(Users.id_number, Users.phone, Users.email)
+        .where(or_(*(getattr(Users, field) == value for field, value in values.items())))
+        .limit(len(values))
+    )).all()
+    for field, message in DUPLICATE_MESSAGES:
+        if field in values and any(getattr(row, field) == values[field] for row in rows):
+            return message
+    return None
+
+
+@router.post("/register", response_model=RegisterResponse, description="This endpoint will register a user manually.")
+async def register_user(db: async_db_dependency, create_user_request: CreateUserRequest):
+    # empty identifiers are stored as NULL so they never count as duplicates
+    identifiers = {
+        "id_number": create_user_request.id_number or None,
+        "phone": create_user_request.phone or None,
+        "email": create_user_request.email or None,
+    }
+    # admins are made by hand, not through the sign up form
+    if create_user_request.role == "admin":
+        raise HTTPException(status_code=400, detail="Invalid role")
+    try:
+        # Check if id number, phone or email already exists
+        duplicate = await find_duplicate(db, identifiers)
+        if duplicate:
+            raise HTTPException(status_code=400, detail=duplicate)
 
         # Create the user model
         create_user_model = Users(
             full_name=create_user_request.full_name,
-            email=create_user_request.email,
-            password=bcrypt_context.hash(create_user_request.password),
-            phone=create_user_request.phone,
+            password=await password_hasher.hash(create_user_request.password),
             location=create_user_request.location,
-            id_number=create_user_request.id_number,
             nationality=create_user_request.nationality,
             profile=create_user_request.profile,
             role=create_user_request.role,
+            **identifiers,
         )
 
-        # Add to the database and commit
+        # Add to the database
         db.add(create_user_model)
-        db.commit()
-        db.refresh(create_user_model)
-
-        # Send a welcome email
-        heading = "Welcome to LALA Rentals"
-        sub = "Your account has been created successfully!"
-        body = f"""
-        <p>Hi {create_user_request.full_name},</p>
-        <p>Thank you for joining LALA Rentals! We're excited to have you on board.</p>
-        <p>You can now log in to your account and start exploring our services.</p>
-        <p>If you have any questions, feel free to reach out to our support team.</p>
-        <p>Best regards,<br>The LALA Rentals Team</p>
-        """
-        msg = custom_email(create_user_request.full_name, heading, body)
-        if send_new_email(create_user_request.email, sub, msg):
-            return {"message": "User registered successfully", "user": create_user_request}
 
+        # Queue a welcome email, it is committed together with the user.
+        # Accounts registered with a phone number only get none.
+        if identifiers["email"]:
+            sub = "Your account has been created successfully!"
+            msg = render_email("welcome.html", names=create_user_request.full_name)
+            queue_email(db, identifiers["email"], sub, msg)
+        await db.commit()
+        return {"message": "User registered successfully", "user": create_user_request}
+
+    except (HTTPException, exc.TimeoutError):
+        # an exhausted pool is answered with a 503 by main.pool_timeout_handler
+        raise
+    except IntegrityError as e:
+        await db.rollback()
+        # a concurrent registration took one of the identifiers between the
+        # check and the commit, the unique indexes caught it
+        duplicate = await find_duplicate(db, identifiers)
+        if duplicate:
+            raise HTTPException(status_code=400, detail=duplicate)
+        logger.exception("Registering %s failed: %s", create_user_request.email, e)
+        raise HTTPException(status_code=500, detail="Internal server error")
     except Exception as e:
-        # Log the error or handle it as needed
-        print(f"Error occurred: {e}")
+        logger.exception("Registering %s failed: %s", create_user_request.email, e)
         # Rollback the transaction if an error occurs
-        db.rollback()
+        await db.rollback()
         # Raise an appropriate HTTPException or handle it accordingly
         raise HTTPException(status_code=500, detail="Internal server error")
 
 # ------Login user and create token
-@router.post("/login")
-async def login_for_access_token(form_data: FromData, db: db_dependency):
-    user = authenticate_user(form_data.email, form_data.password, db)
+@router.post("/login", response_model=LoginResponse)
+async def login_for_access_token(form_data: FromData, db: async_db_dependency):
+    user = await authenticate_user(form_data.email, form_data.password, db)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="No Account found with the given credentials",
         )
 
-    token = create_access_token(
-        user.email, user.id, user.role, timedelta(minutes=60 * 24 * 30)
-    )
+    token = create_access_token(user.email, user.id, user.role)
+    refresh_token = await issue_refresh_token(db, user.id)
 
-        # Serialize the user object to a dictionary
-    user_info = ReturnUser.from_orm(user).dict() 
-    # Prepare the data for encryption
-    data = {"UserInfo": user_info}
+    # LoginResponse reads the user info straight off the ORM object
+    data = {"UserInfo": user}
     
-    return {"access_token": token, "token_type": "bearer", "data":data}
+    return {"access_token": token, "refresh_token": refresh_token, "token_type": "bearer", "data":data}
 
 
-def authenticate_user(email: str, password: str, db):
-    user = (
-        db.query(userModels.Users)
-        .filter(
+@router.post("/refresh", response_model=TokenPair, description="Exchanges a refresh token for a new access token and a new refresh token.")
+async def refresh_access_token(body: RefreshTokenRequest, db: async_db_dependency):
+    stored = await db.scalar(
+        select(RefreshToken).where(RefreshToken.token_hash == hash_refresh_token(body.refresh_token or ""))
+    )
+    if not stored or stored.expires_at < datetime.utcnow():
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired refresh token")
+
+    user = await db.get(Users, stored.user_id)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired refresh token")
+
+    # rotate: the presented token is used up. Only one of two concurrent
+    # refreshes with the same token can flip revoked, the other is a reuse.
+    rotated = await db.execute(
+        update(RefreshToken)
+        .where(RefreshToken.id == stored.id, RefreshToken.revoked == false())
+        .values(revoked=True)
+        .execution_options(synchronize_session=False)
+    )
+    if rotated.rowcount == 0:
+        # a rotated token being used again means it leaked, end every session of the user
+        await db.execute(update(RefreshToken).where(RefreshToken.user_id == stored.user_id).values(revoked=True))
+        await db.commit()
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired refresh token")
+
+    token = create_access_token(user.email, user.id, user.role)
+    refresh_token = await issue_refresh_token(db, user.id)
+    return {"access_token": token, "refresh_token": refresh_token, "token_type": "bearer"}
+
+
+@router.post("/logout", response_model=DetailResponse, description="Revokes the access token used for this call and, when given, the refresh token.")
+async def logout(body: RefreshTokenRequest, db: async_db_dependency, token: Annotated[str, Depends(oauth2_bearer)]):
+    user = await get_current_user(token)
+    if user.get("jti"):
+        expires_at = datetime.utcfromtimestamp(user["exp"])
+        db.add(RevokedToken(jti=user["jti"], expires_at=expires_at))
+        revocation_list.add(user["jti"], expires_at)
+    if body.refresh_token:
+        await db.execute(
+            update(RefreshToken)
+            .where(
+                RefreshToken.token_hash == hash_refresh_token(body.refresh_token),
+                RefreshToken.user_id == user["user_id"],
+            )
+            .values(revoked=True)
+        )
+    await db.commit()
+    return {"detail": "Logged out"}
+
+
+async def authenticate_user(email: str, password: str, db):
+    user = await db.scalar(
+        select(userModels.Users)
+        .where(
             or_(
                 userModels.Users.phone == email,
                 userModels.Users.email == email,
             )
         )
-        .first()
+        .limit(1)
     )
     if not user:
         return False
-    if not bcrypt_context.verify(password, user.password):
+    valid, new_hash = await password_hasher.verify(password, user.password)
+    if not valid:
         return False
+    if new_hash:
+        # the bcrypt cost changed since this hash was made, upgrade it now
+        # that the plain password is at hand
+        user.password = new_hash
+        await db.commit()
     return user
 
 # for logged in user
 def create_access_token(
-    email: str, user_id: int, role: str, expires_delta: timedelta
+    email: str, user_id: int, role: str, expires_delta: timedelta = None
 ):
-    encode = {"email": email, "id": user_id, "role": role}
-    expires = datetime.utcnow() + expires_delta
+    # jti identifies the token on the revocation list
+    encode = {"email": email, "id": user_id, "role": role, "jti": uuid.uuid4().hex}
+    expires = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     encode.update({"exp": expires})
     return jwt.encode(encode, SECRET_KEY, algorithm=ALGORITHM)
 
 
+def hash_refresh_token(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+async def issue_refresh_token(db, user_id: int) -> str:
+    # Refresh tokens are opaque random strings, only their hash is stored.
+    # Commits the caller's session.
+    token = secrets.token_urlsafe(32)
+    db.add(RefreshToken(
+        user_id=user_id,
+        token_hash=hash_refresh_token(token),
+        expires_at=datetime.utcnow() + timedelta(days=REFRESH_TOKEN_EXPIRE_DAYS),
+    ))
+    await db.commit()
+    return token
+
+
 # for logged in user 
 async def get_current_user(token: Annotated[str, Depends(oauth2_bearer)]):
     try:
-        playload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        playload = verify_token(token)
         email: str = playload.get("email")
         role: str = playload.get("role")
         user_id: str = playload.get("id")
@@ -167,7 +304,11 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_bearer)]):
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Authentication required!",
             )
-        return {"email": email, "user_id": user_id, "role": role}
+        # revoked tokens are held in memory, no database round trip here
+        jti = playload.get("jti")
+        if jti is not None and jti in revocation_list:
+            raise JWTError("Token has been revoked")
+        return {"email": email, "user_id": user_id, "role": role, "jti": jti, "exp": playload.get("exp")}
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -283,13 +424,13 @@ async def get_current_user(token: Annotated[str, Depends(oauth2_bearer)]):
 #         raise HTTPException(status_code=500, detail="Internal server error")
 
 
-@router.post("/google-auth-token", status_code=200)
+@router.post("/google-auth-token", status_code=200, response_model=LoginResponse)
 async def Create_Token_For_sign_up_with_google(
     Email: str,
-    db: db_dependency,
+    db: async_db_dependency,
 ):
     # Check if email already exists
-    check_email = db.query(Users).filter(Users.email == Email).first()
+    check_email = await db.scalar(select(Users).where(Users.email == Email).limit(1))
 
     if not check_email:  # if email exists, log the user into the system
         raise HTTPException(
@@ -301,14 +442,10 @@ async def Create_Token_For_sign_up_with_google(
         check_email.email,
         check_email.id,
         check_email.role,
-        timedelta(minutes=60 * 24 * 30),
     )
+    refresh_token = await issue_refresh_token(db, check_email.id)
 
-    # Serialize the user object to a dictionary
-    user_info = ReturnUser.from_orm(check_email).dict()  # Assuming ReturnUser is a Pydantic model
-
-    # Prepare the data for encryption
-    # dat = {"access_token": token, "token_type": "bearer", "UserInfo": user_info}
-    data = {"UserInfo": user_info}
+    # LoginResponse reads the user info straight off the ORM object
+    data = {"UserInfo": check_email}
     
-    return {"access_token": token, "token_type": "bearer", "data":data}
+    return {"access_token": token, "refresh_token": refresh_token, "token_type": "bearer", "data":data}
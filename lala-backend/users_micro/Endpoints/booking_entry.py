@@ -1,85 +1,112 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
+from sqlalchemy.exc import IntegrityError
 from db.connection import db_dependency
-from schemas.schemas import BookingCreate
-from functions.send_mail import send_new_email
-from emailsTemps.custom_email_send import custom_email
+from typing import List
+from schemas.schemas import BookingCreate, BookingResponse, BookingMessage, MessageResponse, BookingStatus
+from functions.send_mail import queue_email
+from emailsTemps.registry import render_email
 from models.userModels import Users,Booking,House
 from db.VerifyToken import user_dependency
+from functions.availability import ACTIVE_BOOKING_STATUSES, lock_house, find_conflict, mark_booking, unmark_booking
 
 router = APIRouter(prefix="/api", tags=["Booking"])
 
-@router.post("/booking", )
+@router.post("/booking", response_model=BookingMessage)
 def create_booking(db: db_dependency, user: user_dependency, booking_data: BookingCreate):
     if not user:
         raise HTTPException(status_code=401, detail="Authentication failed")
 
-    house = db.query(House).filter(House.id == booking_data.house_id).first()
-    if not house:
-        raise HTTPException(status_code=404, detail="House not found")
-
-    booking = Booking(
-        house_id=booking_data.house_id,
-        user_id=user["user_id"],
-        checkin=booking_data.checkin,
-        checkout=booking_data.checkout,
-        status="pending"
-    )
-    #update house availabile to false
-    house.available = False
-    db.add(house)
-    db.add(booking)
-    db.commit()
-    db.refresh(booking)
+    if booking_data.checkout <= booking_data.checkin:
+        raise HTTPException(status_code=400, detail="Checkout must be after checkin")
+
+    with lock_house(db, booking_data.house_id) as house:
+        if not house:
+            raise HTTPException(status_code=404, detail="House not found")
+
+        if find_conflict(db, house.id, booking_data.checkin, booking_data.checkout):
+            raise HTTPException(status_code=409, detail="House is already booked for the selected dates")
+
+        booking = Booking(
+            house_id=booking_data.house_id,
+            user_id=user["user_id"],
+            checkin=booking_data.checkin,
+            checkout=booking_data.checkout,
+            status="pending"
+        )
+        db.add(booking)
+        mark_booking(db, booking)
+
+        # the owner is told who asked for the house
+        people = {person.id: person for person in db.query(Users).filter(Users.id.in_((house.owner_id, user["user_id"])))}
+        owner, renter = people.get(house.owner_id), people.get(user["user_id"])
+        if owner and owner.email:
+            requester = renter.full_name if renter and renter.full_name else user["email"]
+            msg = render_email("booking_request.html", names=owner.full_name, requester=requester, house_title=house.title)
+            queue_email(db, owner.email, "New Booking Request", msg)
 
-    # Get house owner details
-    owner = db.query(Users).filter(Users.id == house.owner_id).first()
-    if owner:
-        heading = "New Booking Request"
-        body = f"{owner.full_name} has requested to book your house: {house.title}"
-        msg = custom_email(owner.full_name, heading, body)
-        send_new_email(owner.email, "New Booking Request", msg)
+        try:
+            db.commit()
+        except IntegrityError:
+            # the overlap constraint on PostgreSQL caught a concurrent booking
+            raise HTTPException(status_code=409, detail="House is already booked for the selected dates")
+    db.refresh(booking)
 
     return {"message": "Booking created successfully", "booking": booking}
 
-@router.get("/booking", )
+@router.get("/booking", response_model=List[BookingResponse])
 def get_all_bookings(db: db_dependency):
     return db.query(Booking).all()
 
-@router.get("/booking/user", )
+@router.get("/booking/user", response_model=List[BookingResponse])
 def get_user_bookings(db: db_dependency, user: user_dependency):
     return db.query(Booking).filter(Booking.user_id == user["user_id"]).all()
 
-@router.put("/booking{booking_id}", )
-def update_booking_status(db: db_dependency, user: user_dependency, booking_id: int, status: str):
+@router.put("/booking{booking_id}", response_model=BookingMessage)
+def update_booking_status(db: db_dependency, user: user_dependency, booking_id: int, status: BookingStatus):
     booking = db.query(Booking).filter(Booking.id == booking_id).first()
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
 
-    house = db.query(House).filter(House.id == booking.house_id).first()
-    if not house or house.owner_id != user["user_id"]:
-        raise HTTPException(status_code=403, detail="Not authorized to update this booking")
+    with lock_house(db, booking.house_id) as house:
+        if not house or house.owner_id != user["user_id"]:
+            raise HTTPException(status_code=403, detail="Not authorized to update this booking")
 
-    booking.status = status
-    db.commit()
-    db.refresh(booking)
+        was_active = booking.status in ACTIVE_BOOKING_STATUSES
+        is_active = status in ACTIVE_BOOKING_STATUSES
+        # re-activating a canceled booking must not clash with stays booked since
+        if is_active and not was_active:
+            if find_conflict(db, house.id, booking.checkin, booking.checkout, exclude_id=booking.id):
+                raise HTTPException(status_code=409, detail="House is already booked for the selected dates")
+            mark_booking(db, booking)
+        elif was_active and not is_active:
+            unmark_booking(db, booking)
+
+        booking.status = status
 
-    # Notify the user
-    renter = db.query(Users).filter(Users.id == booking.user_id).first()
-    if renter:
-        heading = "Booking Status Updated"
-        body = f"Your booking for {house.title} is now {status}."
-        msg = custom_email(renter.full_name, heading, body)
-        send_new_email(renter.email, "Booking Status Update", msg)
+        # Notify the user
+        renter = db.query(Users).filter(Users.id == booking.user_id).first()
+        if renter and renter.email:
+            msg = render_email("booking_status.html", names=renter.full_name, house_title=house.title, status=status)
+            queue_email(db, renter.email, "Booking Status Update", msg)
+
+        try:
+            db.commit()
+        except IntegrityError:
+            raise HTTPException(status_code=409, detail="House is already booked for the selected dates")
+    db.refresh(booking)
 
     return {"message": "Booking status updated successfully", "booking": booking}
 
-@router.delete("/booking{booking_id}", )
+@router.delete("/booking{booking_id}", response_model=MessageResponse)
 def delete_booking(db: db_dependency, user: user_dependency, booking_id: int):
     booking = db.query(Booking).filter(Booking.id == booking_id, Booking.user_id == user["user_id"]).first()
     if not booking:
         raise HTTPException(status_code=403, detail="Not authorized to delete this booking")
 
-    db.delete(booking)
-    db.commit()
+    with lock_house(db, booking.house_id):
+        if booking.status in ACTIVE_BOOKING_STATUSES:
+            unmark_booking(db, booking)
+        db.delete(booking)
+        db.commit()
     return {"message": "Booking deleted successfully"}
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, HTTPException
+from db.VerifyToken import user_dependency
+from schemas.schemas import MessageResponse, SQLProfileReport
+from functions.profiling import sql_profiler
+
+router = APIRouter(prefix="/debug", tags=["Health"])
+
+
+def require_admin(user):
+    if user["role"] != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can read the SQL profile")
+
+
+@router.get(
+    "/sql-profile",
+    response_model=SQLProfileReport,
+    description="""\
+    Statements run by this worker per endpoint, most total time first.
+    Only filled in while `SQL_PROFILE=true`.
+    """,
+)
+def read_sql_profile(user: user_dependency, limit: int = 50):
+    require_admin(user)
+    return sql_profiler.report(limit)
+
+
+@router.delete("/sql-profile", response_model=MessageResponse)
+def reset_sql_profile(user: user_dependency):
+    require_admin(user)
+    sql_profiler.clear()
+    return {"message": "SQL profile cleared"}
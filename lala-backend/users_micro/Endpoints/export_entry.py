@@ -0,0 +1,137 @@
+import csv
+import io
+import json
+import os
+from datetime import date, datetime, timedelta
+from typing import Literal, Optional
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from db.database import SessionLocal
+from db.VerifyToken import user_dependency
+from models.userModels import Booking, House
+from schemas.schemas import BookingStatus
+
+router = APIRouter(prefix="/api", tags=["Export"])
+
+# rows fetched from the database cursor and written out per chunk
+EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", "1000"))
+
+BOOKING_COLUMNS = ["id", "house_id", "house_title", "owner_id", "user_id", "status", "checkin", "checkout", "created_at"]
+HOUSE_COLUMNS = [
+    "id", "owner_id", "title", "address", "location", "price", "bedrooms",
+    "bathrooms", "size", "furnished", "available",
+]
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+
+def export_owner(user, owner_id):
+    # hosts only export their own houses, admins anybody's (or everything)
+    if user["role"] == "admin":
+        return owner_id
+    if owner_id is not None and owner_id != user["user_id"]:
+        raise HTTPException(status_code=403, detail="Not authorized to export another owner's data")
+    return user["user_id"]
+
+
+def encode_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def format_chunk(rows, columns, fmt):
+    if fmt == "ndjson":
+        return "".join(
+            json.dumps(dict(zip(columns, map(encode_value, row))), separators=(",", ":")) + "\n"
+            for row in rows
+        )
+    out = io.StringIO()
+    csv.writer(out).writerows([encode_value(value) for value in row] for row in rows)
+    return out.getvalue()
+
+
+def stream_rows(statement, columns, fmt, session_factory=SessionLocal, chunk_size=EXPORT_CHUNK_SIZE):
+    # Runs while the response is being sent, so it owns its session rather
+    # than the request's. yield_per streams from a server side cursor: only
+    # one chunk of rows is in memory however large the export is.
+    db = session_factory()
+    try:
+        if fmt == "csv":
+            yield format_chunk([columns], columns, "csv").encode()
+        result = db.execute(statement.execution_options(yield_per=chunk_size))
+        for rows in result.partitions():
+            yield format_chunk(rows, columns, fmt).encode()
+    finally:
+        db.close()
+
+
+def export_response(statement, columns, fmt, name):
+    return StreamingResponse(
+        stream_rows(statement, columns, fmt),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{name}-{date.today().isoformat()}.{fmt}"'},
+    )
+
+
+@router.get(
+    "/export/bookings",
+    response_class=StreamingResponse,
+    description="""\
+    Streams bookings as CSV or NDJSON. Hosts get the bookings of their own
+    houses, admins can pick any `owner_id`. `date_from` / `date_to` keep the
+    stays overlapping that period (both days inclusive).
+    """,
+)
+def export_bookings(
+    user: user_dependency,
+    format: Literal["csv", "ndjson"] = "csv",
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    house_id: Optional[int] = None,
+    owner_id: Optional[int] = None,
+    status: Optional[BookingStatus] = None,
+):
+    owner_id = export_owner(user, owner_id)
+    statement = (
+        select(
+            Booking.id, Booking.house_id, House.title, House.owner_id, Booking.user_id,
+            Booking.status, Booking.checkin, Booking.checkout, Booking.created_at,
+        )
+        .join(House, House.id == Booking.house_id)
+        .order_by(Booking.id)
+    )
+    if owner_id is not None:
+        statement = statement.where(House.owner_id == owner_id)
+    if house_id is not None:
+        statement = statement.where(Booking.house_id == house_id)
+    if status is not None:
+        statement = statement.where(Booking.status == status)
+    if date_from is not None:
+        statement = statement.where(Booking.checkout > datetime.combine(date_from, datetime.min.time()))
+    if date_to is not None:
+        statement = statement.where(Booking.checkin < datetime.combine(date_to + timedelta(days=1), datetime.min.time()))
+    return export_response(statement, BOOKING_COLUMNS, format, "bookings")
+
+
+@router.get(
+    "/export/houses",
+    response_class=StreamingResponse,
+    description="Streams houses as CSV or NDJSON. Hosts get their own houses, admins can pick any `owner_id`.",
+)
+def export_houses(
+    user: user_dependency,
+    format: Literal["csv", "ndjson"] = "csv",
+    owner_id: Optional[int] = None,
+    location: Optional[str] = None,
+    available: Optional[bool] = None,
+):
+    owner_id = export_owner(user, owner_id)
+    statement = select(*(getattr(House, column) for column in HOUSE_COLUMNS)).order_by(House.id)
+    if owner_id is not None:
+        statement = statement.where(House.owner_id == owner_id)
+    if location is not None:
+        statement = statement.where(House.location == location)
+    if available is not None:
+        statement = statement.where(House.available.is_(available))
+    return export_response(statement, HOUSE_COLUMNS, format, "houses")
@@ -1,15 +1,85 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, File
+from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
+from typing import List, Literal, Optional
+from sqlalchemy import and_, func, select
+from datetime import date, datetime, timedelta
 from db.connection import db_dependency
-from schemas.schemas import HouseCreate
+from schemas.schemas import HouseCreate, HouseResponse, HousePage, HouseMessage, HouseAvailability, HouseCustomersPage, MessageResponse, HouseImportReport
 from functions.send_mail import send_new_email
 from emailsTemps.custom_email_send import custom_email
-from models.userModels import Users,House,Booking
+from models.userModels import Users,House,Booking,HouseImage
 from db.VerifyToken import user_dependency
+from functions.availability import occupancy_bitmap, booked_between
+from functions.response_cache import response_cache
+from functions.image_store import release_files
+from functions.house_import import import_houses, iter_csv_rows, iter_json_array
 
 router = APIRouter(prefix="/api", tags=["House Management"])
 
-@router.post("/house", )
+# page size bounds for the listing endpoints
+HOUSE_PAGE_SIZE = 20
+HOUSE_MAX_PAGE_SIZE = 100
+# bookings listed per house by GET /api/house/customers, newest stays first
+CUSTOMER_BOOKINGS = 20
+CUSTOMER_MAX_BOOKINGS = 100
+# longest window the availability calendar serves in one call
+AVAILABILITY_MAX_DAYS = 366
+
+
+def filter_houses(
+    query,
+    location: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    min_bedrooms: Optional[int] = None,
+    min_bathrooms: Optional[int] = None,
+    furnished: Optional[bool] = None,
+    min_size: Optional[float] = None,
+    max_size: Optional[float] = None,
+):
+    # only available houses are listed; the remaining filters are optional
+    query = query.filter(House.available.is_(True))
+    if location is not None:
+        query = query.filter(House.location == location)
+    if min_price is not None:
+        query = query.filter(House.price >= min_price)
+    if max_price is not None:
+        query = query.filter(House.price <= max_price)
+    if min_bedrooms is not None:
+        query = query.filter(House.bedrooms >= min_bedrooms)
+    if min_bathrooms is not None:
+        query = query.filter(House.bathrooms >= min_bathrooms)
+    if furnished is not None:
+        query = query.filter(House.furnished.is_(furnished))
+    if min_size is not None:
+        query = query.filter(House.size >= min_size)
+    if max_size is not None:
+        query = query.filter(House.size <= max_size)
+    return query
+
+
+def invalidate_houses():
+    # any house write can change every listing page, so single houses and
+    # pages are dropped together by moving the "houses" generation on; a read that built the old row before the
+    # commit stores it under the previous generation, where nobody looks
+    response_cache.invalidate("houses")
+
+
+def paginate_houses(query, after: Optional[int], limit: int):
+    # keyset pagination on the primary key: seek past the cursor instead of
+    # OFFSET so every page costs the same no matter how deep the client goes
+    if after is not None:
+        query = query.filter(House.id > after)
+    houses = query.order_by(House.id).limit(limit + 1).all()
+    next_cursor = None
+    if len(houses) > limit:
+        houses = houses[:limit]
+        next_cursor = houses[-1].id
+    return {"houses": houses, "next_cursor": next_cursor}
+
+
+@router.post("/house", response_model=HouseMessage)
 def create_house(db: db_dependency, user: user_dependency, house_data: HouseCreate):
     if not user:
         raise HTTPException(status_code=401, detail="Authentication failed")
@@ -18,78 +88,300 @@ def create_house(db: db_dependency, user: user_dependency, house_data: HouseCrea
     db.add(house)
     db.commit()
     db.refresh(house)
+    invalidate_houses()
     return {"message": "House created successfully", "house": house}
 
-@router.get("/house", )
-def get_all_houses(db: db_dependency):
-    return db.query(House).filter(House.available).all()
+@router.post(
+    "/house/import",
+    response_model=HouseImportReport,
+    description="""\
+    Creates many houses at once from a CSV file (header row with the
+    `POST /api/house` field names) or a JSON array of the same objects.
 
-@router.get("/house/customers")
-def get_booked_users(db: db_dependency, user: user_dependency):
-    # Get all houses owned by the logged-in user
-    houses = db.query(House).filter(House.owner_id == user["user_id"]).all()
+    Rows are checked one by one: valid rows are inserted, invalid ones are
+    skipped and listed in `errors` with their row number.
 
-    if not houses:
-        raise HTTPException(status_code=404, detail="No houses found")
+    A file that can't be read to the end is answered with a `400` carrying
+    the same report plus `error`. The valid rows among the first
+    `rows_read` are imported, resend only the rows after them.
+    """,
+    responses={400: {"model": HouseImportReport}},
+)
+def import_house_file(
+    db: db_dependency,
+    user: user_dependency,
+    file: UploadFile = File(...),
+    format: Optional[Literal["csv", "json"]] = Query(None, description="Defaults to the file extension"),
+):
+    if not user:
+        raise HTTPException(status_code=401, detail="Authentication failed")
+
+    format = format or ("json" if (file.filename or "").lower().endswith(".json") else "csv")
+    rows = iter_json_array(file.file) if format == "json" else iter_csv_rows(file.file)
+    try:
+        report = import_houses(db, user["user_id"], rows)
+    finally:
+        response_cache.invalidate("houses")
+    if report["error"]:
+        report["error"] = f"Could not read the {format} file: {report['error']}"
+        return JSONResponse(status_code=400, content=report)
+    return report
+
+@router.get(
+    "/house",
+    response_model=HousePage,
+    description="""\
+    Lists available houses one page at a time.
+
+    Pass the returned `next_cursor` as `after` to fetch the next page; it is
+    `null` on the last page. All filters are optional and can be combined.
 
-    house_ids = [house.id for house in houses]
+    Pages are cached briefly and carry an `ETag`; send it back in
+    `If-None-Match` to get a `304` while the page is unchanged.
+    """,
+)
+def get_all_houses(
+    request: Request,
+    db: db_dependency,
+    location: Optional[str] = None,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    min_bedrooms: Optional[int] = Query(None, ge=0),
+    min_bathrooms: Optional[int] = Query(None, ge=0),
+    furnished: Optional[bool] = None,
+    min_size: Optional[float] = Query(None, ge=0),
+    max_size: Optional[float] = Query(None, ge=0),
+    after: Optional[int] = Query(None, description="Cursor returned as next_cursor by the previous page"),
+    limit: int = Query(HOUSE_PAGE_SIZE, ge=1, le=HOUSE_MAX_PAGE_SIZE),
+):
+    def build():
+        query = filter_houses(
+            db.query(House),
+            location=location,
+            min_price=min_price,
+            max_price=max_price,
+            min_bedrooms=min_bedrooms,
+            min_bathrooms=min_bathrooms,
+            furnished=furnished,
+            min_size=min_size,
+            max_size=max_size,
+        )
+        return paginate_houses(query, after, limit)
 
-    # Get all bookings for these houses
-    bookings = db.query(Booking).filter(Booking.house_id.in_(house_ids)).all()
+    key = response_cache.key(
+        "houses", "list", location, min_price, max_price, min_bedrooms,
+        min_bathrooms, furnished, min_size, max_size, after, limit,
+    )
+    return response_cache.respond(request, key, build, HousePage)
 
-    if not bookings:
-        return {"message": "No bookings found for your houses", "houses": houses}
+@router.get(
+    "/house/available",
+    response_model=HousePage,
+    description="""\
+    Lists houses that are free for the whole stay between `checkin` and
+    `checkout`, one page at a time.
 
-    # Get user details for those who booked
-    user_ids = list(set(booking.user_id for booking in bookings))  # Avoid duplicates
-    users = {u.id: u for u in db.query(Users).filter(Users.id.in_(user_ids)).all()}  # Use a dictionary for faster lookups
+    Takes the same filters and `after` / `limit` paging as `GET /api/house`.
+    """,
+)
+def search_available_houses(
+    db: db_dependency,
+    checkin: datetime,
+    checkout: datetime,
+    location: Optional[str] = None,
+    min_price: Optional[float] = Query(None, ge=0),
+    max_price: Optional[float] = Query(None, ge=0),
+    min_bedrooms: Optional[int] = Query(None, ge=0),
+    min_bathrooms: Optional[int] = Query(None, ge=0),
+    furnished: Optional[bool] = None,
+    min_size: Optional[float] = Query(None, ge=0),
+    max_size: Optional[float] = Query(None, ge=0),
+    after: Optional[int] = Query(None, description="Cursor returned as next_cursor by the previous page"),
+    limit: int = Query(HOUSE_PAGE_SIZE, ge=1, le=HOUSE_MAX_PAGE_SIZE),
+):
+    if checkout <= checkin:
+        raise HTTPException(status_code=400, detail="Checkout must be after checkin")
 
-    # Structure the response
+    query = filter_houses(
+        db.query(House),
+        location=location,
+        min_price=min_price,
+        max_price=max_price,
+        min_bedrooms=min_bedrooms,
+        min_bathrooms=min_bathrooms,
+        furnished=furnished,
+        min_size=min_size,
+        max_size=max_size,
+    ).filter(~booked_between(checkin, checkout))
+    return paginate_houses(query, after, limit)
+
+@router.get(
+    "/house/customers",
+    response_model=HouseCustomersPage,
+    description="""\
+    The logged in owner's houses with the bookings made on them and who made
+    them, one page of houses at a time (`after` / `limit` as in `GET /api/house`).
+
+    Each house lists its `bookings_limit` latest stays by check-in;
+    `bookings_total` counts them all. `GET /api/export/bookings` has the
+    full history.
+    """,
+)
+def get_booked_users(
+    db: db_dependency,
+    user: user_dependency,
+    after: Optional[int] = Query(None, description="Cursor returned as next_cursor by the previous page"),
+    limit: int = Query(HOUSE_PAGE_SIZE, ge=1, le=HOUSE_MAX_PAGE_SIZE),
+    bookings_limit: int = Query(CUSTOMER_BOOKINGS, ge=0, le=CUSTOMER_MAX_BOOKINGS),
+):
+    # one page of the owner's houses (plus one to know if there is a next page)
+    page = select(House.id, House.title, House.location, House.price).where(House.owner_id == user["user_id"])
+    if after is not None:
+        page = page.where(House.id > after)
+    page = page.order_by(House.id).limit(limit + 1).subquery()
+
+    # the latest bookings of each of those houses, ranked per house so a
+    # popular house can't pull its whole history into one response
+    bookings = (
+        select(
+            Booking.id,
+            Booking.house_id,
+            Booking.user_id,
+            Booking.status,
+            Booking.checkin,
+            Booking.checkout,
+            Booking.created_at,
+            func.row_number().over(
+                partition_by=Booking.house_id, order_by=(Booking.checkin.desc(), Booking.id.desc())
+            ).label("rank"),
+        )
+        .where(Booking.house_id.in_(select(page.c.id)))
+        .subquery()
+    )
+    # counted apart from the ranked rows so it holds even when none are listed
+    totals = (
+        select(Booking.house_id, func.count().label("total"))
+        .where(Booking.house_id.in_(select(page.c.id)))
+        .group_by(Booking.house_id)
+        .subquery()
+    )
+
+    # houses, bookings and renters in a single joined query, sorted so rows
+    # of the same house arrive together
+    rows = db.execute(
+        select(
+            page.c.id,
+            page.c.title,
+            page.c.location,
+            page.c.price,
+            bookings.c.id.label("booking_id"),
+            bookings.c.status,
+            bookings.c.checkin,
+            bookings.c.checkout,
+            bookings.c.created_at,
+            totals.c.total,
+            Users.id.label("user_id"),
+            Users.full_name,
+            Users.email,
+        )
+        .select_from(page)
+        .outerjoin(totals, totals.c.house_id == page.c.id)
+        .outerjoin(bookings, and_(bookings.c.house_id == page.c.id, bookings.c.rank <= bookings_limit))
+        .outerjoin(Users, Users.id == bookings.c.user_id)
+        .order_by(page.c.id, bookings.c.rank)
+    )
+
+    # Structure the response in one pass over the rows
     response = []
-    for house in houses:
-        house_bookings = [b for b in bookings if b.house_id == house.id]
-        
-        response.append({
-            "house": {
-                "id": house.id,
-                "title": house.title,
-                "location": house.location,
-                "price": house.price
+    for row in rows:
+        if not response or response[-1]["house"]["id"] != row.id:
+            response.append({
+                "house": {
+                    "id": row.id,
+                    "title": row.title,
+                    "location": row.location,
+                    "price": row.price
+                },
+                "bookings": [],
+                "bookings_total": row.total or 0,
+            })
+        if row.booking_id is None:
+            continue
+        response[-1]["bookings"].append({
+            "booking_id": row.booking_id,
+            "user": {
+                "id": row.user_id,
+                "name": row.full_name,
+                "email": row.email
             },
-            "bookings": [
-                {
-                    "booking_id": b.id,
-                    "user": {
-                        "id": users[b.user_id].id,
-                        "name": users[b.user_id].full_name,
-                        "email": users[b.user_id].email
-                    },
-                    "status": b.status,
-                    "checkin": b.checkin.isoformat(),
-                    "checkout": b.checkout.isoformat(),
-                    "created_at": b.created_at.isoformat()
-                } for b in house_bookings
-            ]
+            "status": row.status,
+            "checkin": row.checkin,
+            "checkout": row.checkout,
+            "created_at": row.created_at
         })
 
-    return response
+    if not response and after is None:
+        raise HTTPException(status_code=404, detail="No houses found")
 
+    next_cursor = None
+    if len(response) > limit:
+        response = response[:limit]
+        next_cursor = response[-1]["house"]["id"]
+    return {"houses": response, "next_cursor": next_cursor}
 
-@router.get("/house{house_id}", )
-def get_house_by_id(db: db_dependency, house_id: int):
-    house = db.query(House).filter(House.id == house_id).first()
-    if not house:
+
+@router.get("/house{house_id}", response_model=HouseResponse)
+def get_house_by_id(request: Request, db: db_dependency, house_id: int):
+    def build():
+        house = db.query(House).filter(House.id == house_id).first()
+        if not house:
+            raise HTTPException(status_code=404, detail="House not found")
+        return house
+
+    return response_cache.respond(request, response_cache.key("houses", "house", house_id), build, HouseResponse)
+
+@router.get(
+    "/house{house_id}/availability",
+    response_model=HouseAvailability,
+    description="""\
+    Day level occupancy of a house between `from` and `to` (both inclusive,
+    at most 366 days, defaults to the next 90 days).
+
+    `occupied` holds one character per night starting at `from`: `1` when the
+    night is taken by a pending or approved booking, `0` when it is free.
+    """,
+)
+def get_house_availability(
+    db: db_dependency,
+    house_id: int,
+    date_from: Optional[date] = Query(None, alias="from"),
+    date_to: Optional[date] = Query(None, alias="to"),
+):
+    date_from = date_from or date.today()
+    date_to = date_to or date_from + timedelta(days=89)
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    if (date_to - date_from).days >= AVAILABILITY_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"At most {AVAILABILITY_MAX_DAYS} days can be requested at once")
+
+    if not db.query(House.id).filter(House.id == house_id).first():
         raise HTTPException(status_code=404, detail="House not found")
-    return house
 
-@router.get("/house/me", )
+    return {
+        "house_id": house_id,
+        "from": date_from,
+        "to": date_to,
+        "occupied": occupancy_bitmap(db, house_id, date_from, date_to),
+    }
+
+@router.get("/house/me", response_model=List[HouseResponse])
 def get_house_by_id(db: db_dependency,user:user_dependency):
     house = db.query(House).filter(House.owner_id == user["user_id"]).all()
     if not house:
         raise HTTPException(status_code=404, detail="House not found")
     return house
 
-@router.put("/house{house_id}", )
+@router.put("/house{house_id}", response_model=HouseMessage)
 def update_house(db: db_dependency, user: user_dependency, house_id: int, house_data: HouseCreate):
     house = db.query(House).filter(House.id == house_id, House.owner_id == user["user_id"]).first()
     if not house:
@@ -100,14 +392,22 @@ def update_house(db: db_dependency, user: user_dependency, house_id: int, house_
 
     db.commit()
     db.refresh(house)
+    invalidate_houses()
     return {"message": "House updated successfully", "house": house}
 
-@router.delete("/house{house_id}", )
+@router.delete("/house{house_id}", response_model=MessageResponse)
 def delete_house(db: db_dependency, user: user_dependency, house_id: int):
     house = db.query(House).filter(House.id == house_id, House.owner_id == user["user_id"]).first()
     if not house:
         raise HTTPException(status_code=403, detail="Not authorized to delete this house")
 
+    images = db.query(HouseImage).filter(HouseImage.house_id == house_id).all()
+    photos = [(image.sha256, image.extension) for image in images]
+    for image in images:
+        db.delete(image)
     db.delete(house)
     db.commit()
+    invalidate_houses()
+    # photo files go once no other house uses them
+    release_files(db, photos)
     return {"message": "House deleted successfully"}
@@ -0,0 +1,140 @@
+import os
+import re
+from typing import List
+from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi.responses import FileResponse
+from sqlalchemy import func, select
+from starlette.concurrency import run_in_threadpool
+from db.connection import async_db_dependency
+from db.VerifyToken import user_dependency
+from models.userModels import House, HouseImage
+from schemas.schemas import HouseImageResponse, MessageResponse
+from functions.image_store import (
+    IMAGE_MAX_BYTES, IMAGE_CACHE_MAX_AGE, MEDIA_TYPES, THUMBNAIL_WIDTHS, image_processor, sniff_image, store_original,
+    release_files, original_name, variant_name, media_path, media_url,
+)
+from Endpoints.house_entry import invalidate_houses
+
+router = APIRouter(prefix="/api", tags=["House Images"])
+
+# <sha256>.<ext> for originals, <sha256>-<width>.webp for resized copies
+MEDIA_NAME = re.compile(r"^[0-9a-f]{64}(\.(jpg|png|gif|webp)|-\d+\.webp)$")
+
+
+def image_response(image: HouseImage):
+    widths = [int(width) for width in image.variants.split(",")] if image.variants else []
+    return {
+        "id": image.id,
+        "house_id": image.house_id,
+        "sha256": image.sha256,
+        "content_type": image.content_type,
+        "size_bytes": image.size_bytes,
+        "position": image.position,
+        "status": image.status,
+        "url": media_url(original_name(image.sha256, image.extension)),
+        "thumbnails": {str(width): media_url(variant_name(image.sha256, width)) for width in widths},
+    }
+
+
+async def read_upload(upload: UploadFile) -> bytes:
+    data = await upload.read(IMAGE_MAX_BYTES + 1)
+    if len(data) > IMAGE_MAX_BYTES:
+        raise HTTPException(status_code=413, detail=f"{upload.filename} is larger than {IMAGE_MAX_BYTES} bytes")
+    return data
+
+
+@router.post(
+    "/house{house_id}/images",
+    response_model=List[HouseImageResponse],
+    description="""\
+    Uploads one or more photos of a house (JPEG, PNG, GIF or WebP). Resized
+    WebP copies are made in the background; `status` turns to `ready` once
+    the `thumbnails` exist.
+    """,
+)
+async def upload_house_images(house_id: int, db: async_db_dependency, user: user_dependency, files: List[UploadFile] = File(...)):
+    house = await db.scalar(select(House).where(House.id == house_id))
+    if not house or house.owner_id != user["user_id"]:
+        raise HTTPException(status_code=403, detail="Not authorized to add images to this house")
+
+    uploads = []
+    for upload in files:
+        data = await read_upload(upload)
+        kind = sniff_image(data)
+        if kind is None:
+            raise HTTPException(status_code=415, detail=f"{upload.filename} is not a JPEG, PNG, GIF or WebP image")
+        uploads.append((data, kind))
+
+    position = await db.scalar(select(func.coalesce(func.max(HouseImage.position), -1)).where(HouseImage.house_id == house_id))
+    images = []
+    for data, (extension, content_type) in uploads:
+        # hashing and writing the file are blocking, keep them off the loop
+        sha256 = await run_in_threadpool(store_original, data, extension)
+        position += 1
+        image = HouseImage(
+            house_id=house_id,
+            sha256=sha256,
+            extension=extension,
+            content_type=content_type,
+            size_bytes=len(data),
+            position=position,
+        )
+        db.add(image)
+        images.append(image)
+    if not house.image_url and images:
+        house.image_url = media_url(original_name(images[0].sha256, images[0].extension))
+    await db.commit()
+    invalidate_houses()
+    # store_original skips photos whose file exists; a concurrent delete of
+    # the last other use may have removed it since, so make sure it is there
+    for data, (extension, content_type) in uploads:
+        await run_in_threadpool(store_original, data, extension)
+
+    response = [image_response(image) for image in images]
+    for image in images:
+        await run_in_threadpool(image_processor.submit, image.id, image.sha256, image.extension)
+    return response
+
+
+@router.get("/house{house_id}/images", response_model=List[HouseImageResponse])
+async def list_house_images(house_id: int, db: async_db_dependency):
+    images = await db.scalars(
+        select(HouseImage).where(HouseImage.house_id == house_id).order_by(HouseImage.position)
+    )
+    return [image_response(image) for image in images]
+
+
+@router.delete("/house{house_id}/images/{image_id}", response_model=MessageResponse)
+async def delete_house_image(house_id: int, image_id: int, db: async_db_dependency, user: user_dependency):
+    house = await db.scalar(select(House).where(House.id == house_id))
+    image = await db.scalar(select(HouseImage).where(HouseImage.id == image_id, HouseImage.house_id == house_id))
+    if not house or not image or house.owner_id != user["user_id"]:
+        raise HTTPException(status_code=403, detail="Not authorized to delete this image")
+
+    await db.delete(image)
+    urls = {media_url(original_name(image.sha256, image.extension))}
+    urls.update(media_url(variant_name(image.sha256, width)) for width in THUMBNAIL_WIDTHS)
+    if house.image_url in urls:
+        house.image_url = None
+    photo = (image.sha256, image.extension)
+    await db.commit()
+    invalidate_houses()
+
+    # the same photo may still be used by another house
+    await db.run_sync(release_files, [photo])
+    return {"message": "Image deleted successfully"}
+
+
+@router.get("/media/{name}", response_class=FileResponse, description="Serves stored photos; supports Range requests.")
+def get_media(name: str):
+    if not MEDIA_NAME.match(name):
+        raise HTTPException(status_code=404, detail="Image not found")
+    path = media_path(name)
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="Image not found")
+    return FileResponse(
+        path,
+        media_type=MEDIA_TYPES[name.rsplit(".", 1)[1]],
+        # the name is the content hash, so the file can be cached forever
+        headers={"Cache-Control": f"public, max-age={IMAGE_CACHE_MAX_AGE}, immutable", "ETag": f'"{name}"'},
+    )
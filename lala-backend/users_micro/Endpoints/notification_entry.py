@@ -0,0 +1,76 @@
+from fastapi import APIRouter, BackgroundTasks, HTTPException
+from sqlalchemy import func
+from db.connection import db_dependency
+from db.VerifyToken import user_dependency
+from models.userModels import EmailOutbox, NotificationJob
+from schemas.schemas import NotificationCreate, NotificationProgress
+from functions.notifications import fan_out
+
+router = APIRouter(prefix="/api", tags=["Notifications"])
+
+# which role may address which audience
+AUDIENCE_ROLES = {
+    "pending_renters": {"host", "admin"},
+    "location": {"admin"},
+}
+
+
+def job_progress(db, job):
+    counts = dict(
+        db.query(EmailOutbox.status, func.count(EmailOutbox.id))
+        .filter(EmailOutbox.job_id == job.id)
+        .group_by(EmailOutbox.status)
+        .all()
+    )
+    return {
+        "id": job.id,
+        "audience": job.audience,
+        "location": job.location,
+        "subject": job.subject,
+        "status": job.status,
+        "queued": job.queued,
+        "sent": counts.get("sent", 0),
+        "failed": counts.get("failed", 0),
+        "pending": counts.get("pending", 0) + counts.get("sending", 0),
+        "error": job.error,
+        "created_at": job.created_at,
+        "finished_at": job.finished_at,
+    }
+
+
+@router.post("/notifications", status_code=202, response_model=NotificationProgress,
+             description="Sends a message to every user of an audience. The emails are queued in the background, follow the job with GET /api/notifications/{job_id}.")
+def create_notification(db: db_dependency, user: user_dependency, notification: NotificationCreate, background_tasks: BackgroundTasks):
+    if not user:
+        raise HTTPException(status_code=401, detail="Authentication failed")
+    if user["role"] not in AUDIENCE_ROLES[notification.audience]:
+        raise HTTPException(status_code=403, detail="You are not allowed to notify this audience")
+    if notification.audience == "location" and not notification.location:
+        raise HTTPException(status_code=400, detail="location is required for this audience")
+
+    job = NotificationJob(
+        created_by=user["user_id"],
+        audience=notification.audience,
+        location=notification.location,
+        subject=notification.subject,
+        message=notification.message,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    # runs after the response is sent, on its own session
+    background_tasks.add_task(fan_out, job.id)
+    return job_progress(db, job)
+
+
+@router.get("/notifications/{job_id}", response_model=NotificationProgress, description="Progress of a bulk notification.")
+def get_notification(job_id: int, db: db_dependency, user: user_dependency):
+    if not user:
+        raise HTTPException(status_code=401, detail="Authentication failed")
+    job = db.get(NotificationJob, job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Notification not found")
+    if job.created_by != user["user_id"]:
+        raise HTTPException(status_code=403, detail="Not authorized to view this notification")
+    return job_progress(db, job)
@@ -1,21 +1,20 @@
-from fastapi import APIRouter, HTTPException
-from dotenv import load_dotenv
+from fastapi import APIRouter, HTTPException, Request
 import random
-from db.connection import db_dependency
-from models.userModels import Users, OTP
-from functions.send_mail import send_new_email
-from emailsTemps.custom_email_send import custom_email
+from db.connection import async_db_dependency
+from sqlalchemy import select
+from models.userModels import Users
+from functions.send_mail import queue_email
+from functions.otp_store import otp_store, account_send_limit, ip_send_limit, OTP_TTL_SECONDS
+from emailsTemps.registry import render_email
 from schemas.emailSchemas import EmailSchema, OtpVerify
-from datetime import datetime,timedelta
-# Load environment variables from .env file
-load_dotenv()
-
+from schemas.schemas import OtpSent, DetailResponse
 router = APIRouter(prefix="/auth", tags=["Send Notifications and OTP"])
 
 
 # send Otp
 @router.post(
     "/send-otp/",
+    response_model=OtpSent,
     description="""\
     Sends an OTP (One-Time Password) to the specified email address for verification purposes.
     ### Request Body
@@ -32,10 +31,13 @@ router = APIRouter(prefix="/auth", tags=["Send Notifications and OTP"])
     ["login", "email"]
     """,
 )
-async def send_email(details: EmailSchema, db: db_dependency):
-    user = db.query(Users).filter(Users.email == details.toEmail).first()
+async def send_email(details: EmailSchema, request: Request, db: async_db_dependency):
+    # throttle before touching the database or SMTP
+    ip_send_limit.check(request.client.host if request.client else None, "Too many OTP requests, please retry later")
+    user = await db.scalar(select(Users).where(Users.email == details.toEmail).limit(1))
     if not user:
         raise HTTPException(status_code=404, detail="Email Id Not Found")
+    account_send_limit.check(user.id, "Too many OTP requests for this account, please retry later")
 
     otp_subjet = {
         "login": "LALA RENTALS Login OTP Verification",
@@ -48,32 +50,20 @@ async def send_email(details: EmailSchema, db: db_dependency):
         1000000, 9999999
     )  # Generates a 7-digit Verification OTP
     purpose = details.purpose
-    # Remove existing OTPs for the user if any
-    otp_user = db.query(OTP).filter(OTP.account_id == user.id).first()
-    # If record exists, delete it
-    if otp_user:
-        db.delete(otp_user)
-        db.commit()
-    # Create and store the new OTP
-    new_otp = OTP(account_id=user.id, otp_code=otp, verification_code=verification, purpose=purpose)
-    db.add(new_otp)
-    db.commit()
-    db.refresh(new_otp)
+    # Replace any earlier code of the user; committed together with the email
+    await otp_store.issue(db, user.id, otp, verification, purpose)
 
-    heading = "Welcome to LALA RENTALS!"
     sub = otp_subjet[purpose]
-    body = f"""
-   <h1>{otp}</h1>  <p>That's your OTP CODE  to Verify Your <b>{purpose}</b>. Copy the OTP and use it yourself; don't share it with anyone. It will expire after 10 minutes.</p>
-
-    """
-    msg = custom_email(user.full_name,heading,body)
-    if send_new_email(details.toEmail, sub, msg):
-        return {"message": "Email sent successfully", "verification_Code": verification}
+    msg = render_email("otp.html", names=user.full_name, otp=otp, purpose=purpose, minutes=OTP_TTL_SECONDS // 60)
+    queue_email(db, details.toEmail, sub, msg)
+    await db.commit()
+    return {"message": "Email sent successfully", "verification_Code": verification}
 
 
 @router.post(
     "/verify-otp",
     summary="Verify OTP Code",
+    response_model=DetailResponse,
     description="""\
     This endpoint is used to verify an OTP code. Example JSON request body:
     
@@ -86,30 +76,16 @@ async def send_email(details: EmailSchema, db: db_dependency):
     ```
     """,
 )
-async def verify_opt(data: OtpVerify, db: db_dependency):
+async def verify_opt(data: OtpVerify, db: async_db_dependency):
  
-    user_info = db.query(Users).filter(Users.email == data.email).first()
+    user_info = await db.scalar(select(Users).where(Users.email == data.email).limit(1))
     if not user_info:
         raise HTTPException(status_code=404, detail="Email Id Not Found")
     
-    valid_otp = db.query(OTP).filter(
-        OTP.otp_code == data.otp_code,
-        OTP.verification_code == data.verification_code,
-        OTP.account_id == user_info.id
-    ).first()
-    if not valid_otp:
-        raise HTTPException(status_code=404, detail="OTP Not found")
-    # Assuming `valid_otp.date` is the timestamp from the database
-    if datetime.utcnow() - valid_otp.date > timedelta(minutes=10):
-        raise HTTPException(status_code=404, detail="OTP Expired")
-        
-    
-    if valid_otp.purpose == "email":
+    # raises for a missing, expired or wrong code and counts the wrong guesses
+    purpose = await otp_store.verify(db, user_info.id, data.otp_code, data.verification_code)
+
+    if purpose == "email":
         user_info.email_confirm = True
-        db.commit()
-        db.refresh(user_info)
-        return {"detail": "Successfully Verified"}
-    
-    db.delete(valid_otp)
-    db.commit()
-    return {"detail": "Successfully Verified"}
\ No newline at end of file
+    await db.commit()
+    return {"detail": "Successfully Verified"}
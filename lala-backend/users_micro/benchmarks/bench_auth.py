@@ -0,0 +1,67 @@
+# users_micro/benchmarks/bench_auth.py
+#
+# Per request cost of the auth dependency (get_current_user) with and
+# without the verified-token cache, for each JWT backend. Run from
+# users_micro:
+#
+#   python -m benchmarks.bench_auth --requests 20000 --tokens 100
+#
+# Results are printed as JSON, in microseconds per request.
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "bench-secret-key-of-at-least-32-bytes")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("SECRET_KEY_DATA", "bench")
+
+import config  # loads .env; the defaults above win over it
+from Endpoints import auth
+
+
+async def run(tokens, requests):
+    started = time.perf_counter()
+    for i in range(requests):
+        await auth.get_current_user(tokens[i % len(tokens)])
+    return (time.perf_counter() - started) / requests * 1e6
+
+
+def measure(backend, cached, tokens, requests):
+    auth.decode_jwt = auth.JWT_DECODERS[backend]
+    auth.token_cache.clear()
+    auth.token_cache.maxsize = auth.TOKEN_CACHE_SIZE if cached else 0
+    asyncio.run(run(tokens, min(requests, 1000)))  # warm up
+    return round(asyncio.run(run(tokens, requests)), 2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--tokens", type=int, default=100, help="distinct users sending requests")
+    args = parser.parse_args()
+
+    tokens = [
+        auth.create_access_token(f"user{i}@example.com", i, "renter", timedelta(minutes=30))
+        for i in range(args.tokens)
+    ]
+    backends = ["jose"] + (["pyjwt"] if auth.pyjwt is not None else [])
+    results = {}
+    for backend in backends:
+        results[f"{backend}_uncached_us"] = measure(backend, False, tokens, args.requests)
+        results[f"{backend}_cached_us"] = measure(backend, True, tokens, args.requests)
+
+    print(json.dumps({
+        "benchmark": "auth_dependency",
+        "requests": args.requests,
+        "tokens": args.tokens,
+        **results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+# users_micro/benchmarks/bench_availability_search.py
+#
+# Latency of the date-range availability search (GET /api/house/available)
+# against a seeded catalog. Run from users_micro:
+#
+#   python -m benchmarks.bench_availability_search --houses 100000 --bookings 1000000
+#
+# BENCH_DATABASE_URL selects the database (a temporary SQLite file by
+# default); pass a postgresql:// url to measure PostgreSQL. Results are
+# printed as JSON.
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+BENCH_DATABASE_URL = os.getenv(
+    "BENCH_DATABASE_URL",
+    f"sqlite:///{os.path.join(tempfile.gettempdir(), 'lala-bench-search.db')}",
+)
+os.environ.setdefault("DATABASE_URL", BENCH_DATABASE_URL)
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("SECRET_KEY_DATA", "bench")
+
+import config  # loads .env; the defaults above win over it
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+from models.userModels import Base, House, Booking
+from Endpoints.house_entry import filter_houses, paginate_houses
+from functions.availability import booked_between
+
+LOCATIONS = [f"District {i}" for i in range(30)]
+START = datetime(2030, 1, 1, 14)
+# searches check in anywhere in this many days from START, and the seeded
+# stays are spread over the same window so the overlap check has work to do
+SEARCH_DAYS = 365
+CHUNK = 10000
+
+
+def seed(engine, houses, bookings):
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    rng = random.Random(42)
+    with engine.begin() as conn:
+        for first in range(1, houses + 1, CHUNK):
+            conn.execute(insert(House), [
+                {
+                    "id": i,
+                    "owner_id": rng.randint(1, houses // 10 + 1),
+                    "title": f"House {i}",
+                    "address": f"Street {i}",
+                    "location": rng.choice(LOCATIONS),
+                    "price": rng.randint(20, 500),
+                    "bedrooms": rng.randint(1, 6),
+                    "bathrooms": rng.randint(1, 3),
+                    "size": rng.randint(30, 300),
+                    "furnished": rng.random() < 0.5,
+                    "available": True,
+                }
+                for i in range(first, min(first + CHUNK, houses + 1))
+            ])
+
+    # each house's stays are spread over the search window, one per equal
+    # slot so they never overlap
+    per_house = max(1, bookings // houses)
+    slot = SEARCH_DAYS / per_house
+    rows = []
+    with engine.begin() as conn:
+        for house_id in range(1, houses + 1):
+            for i in range(per_house):
+                nights = min(rng.randint(1, 14), slot)
+                checkin = START + timedelta(days=i * slot + rng.uniform(0, slot - nights))
+                rows.append({
+                    "house_id": house_id,
+                    "user_id": rng.randint(1, 100000),
+                    "status": rng.choice(("pending", "approved", "approved", "canceled")),
+                    "checkin": checkin,
+                    "checkout": checkin + timedelta(days=nights),
+                })
+            if len(rows) >= CHUNK:
+                conn.execute(insert(Booking), rows)
+                rows = []
+        if rows:
+            conn.execute(insert(Booking), rows)
+
+
+def run_searches(Session, searches, limit):
+    rng = random.Random(7)
+    timings = []
+    found = 0
+    for _ in range(searches):
+        checkin = START + timedelta(days=rng.randint(0, SEARCH_DAYS))
+        checkout = checkin + timedelta(days=rng.randint(2, 10))
+        filters = {}
+        if rng.random() < 0.7:
+            filters["location"] = rng.choice(LOCATIONS)
+        if rng.random() < 0.5:
+            low = rng.randint(20, 300)
+            filters["min_price"] = low
+            filters["max_price"] = low + 150
+        db = Session()
+        started = time.perf_counter()
+        query = filter_houses(db.query(House), **filters).filter(~booked_between(checkin, checkout))
+        page = paginate_houses(query, None, limit)
+        timings.append((time.perf_counter() - started) * 1000)
+        found += len(page["houses"])
+        db.close()
+    return timings, found
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--houses", type=int, default=100000)
+    parser.add_argument("--bookings", type=int, default=1000000)
+    parser.add_argument("--searches", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--reuse", action="store_true", help="skip seeding and reuse the existing database")
+    args = parser.parse_args()
+
+    engine = create_engine(BENCH_DATABASE_URL)
+    seed_seconds = None
+    if not args.reuse:
+        started = time.perf_counter()
+        seed(engine, args.houses, args.bookings)
+        seed_seconds = round(time.perf_counter() - started, 2)
+
+    Session = sessionmaker(bind=engine)
+    # warm the connection pool and the database page cache
+    run_searches(Session, 10, args.limit)
+    timings, found = run_searches(Session, args.searches, args.limit)
+
+    print(json.dumps({
+        "benchmark": "availability_search",
+        "database": engine.dialect.name,
+        "houses": args.houses,
+        "bookings": args.bookings,
+        "searches": args.searches,
+        "seed_seconds": seed_seconds,
+        "houses_returned": found,
+        "p50_ms": round(statistics.median(timings), 2),
+        "p95_ms": round(percentile(timings, 95), 2),
+        "p99_ms": round(percentile(timings, 99), 2),
+        "max_ms": round(max(timings), 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# users_micro/benchmarks/bench_email_render.py
+#
+# Email rendering throughput for a bulk notification: parsing the template
+# for every message versus the pre-compiled registry, one render call per
+# recipient versus render_many. Also times loading every template in a
+# fresh process with a cold and a warm bytecode cache. Run from users_micro:
+#
+#   python -m benchmarks.bench_email_render --recipients 10000
+#
+# Results are printed as JSON, in messages per second.
+
+import argparse
+import json
+import tempfile
+import time
+
+import config  # loads .env
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from emailsTemps.registry import TEMPLATE_DIR, TemplateRegistry
+
+TEMPLATE = "booking_status.html"
+
+
+def rate(count, fn):
+    started = time.perf_counter()
+    fn()
+    return round(count / (time.perf_counter() - started), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--recipients", type=int, default=10000)
+    args = parser.parse_args()
+
+    recipients = [{"names": f"Renter <{i}>"} for i in range(args.recipients)]
+    shared = {"house_title": "Kigali Heights 3 bedroom", "status": "approved"}
+
+    def compile_each_time():
+        # what an uncached environment does: parse and compile per message
+        for recipient in recipients:
+            env = Environment(loader=FileSystemLoader(TEMPLATE_DIR), autoescape=select_autoescape(["html"]), cache_size=0)
+            env.get_template(TEMPLATE).render(**shared, **recipient)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        registry = TemplateRegistry(cache_dir=cache_dir)
+        load_cold = time.perf_counter()
+        registry.load()
+        load_cold = time.perf_counter() - load_cold
+
+        load_warm = time.perf_counter()
+        TemplateRegistry(cache_dir=cache_dir).load()
+        load_warm = time.perf_counter() - load_warm
+
+        def render_each():
+            for recipient in recipients:
+                registry.render(TEMPLATE, **shared, **recipient)
+
+        results = {
+            "compile_per_message": rate(len(recipients), compile_each_time),
+            "registry_render": rate(len(recipients), render_each),
+            "registry_render_many": rate(len(recipients), lambda: registry.render_many(TEMPLATE, recipients, **shared)),
+        }
+
+    print(json.dumps({
+        "benchmark": "email_render",
+        "recipients": args.recipients,
+        "messages_per_second": results,
+        "load_all_templates_ms": {
+            "cold_bytecode_cache": round(load_cold * 1000, 2),
+            "warm_bytecode_cache": round(load_warm * 1000, 2),
+        },
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# users_micro/benchmarks/bench_house_import.py
+#
+# Houses created per second through POST /api/house/import (CSV and JSON)
+# compared with one POST /api/house per listing, against a throwaway SQLite
+# database. Run from users_micro:
+#
+#   python -m benchmarks.bench_house_import --rows 20000 --single 300
+#
+# Point DATABASE_URL at PostgreSQL to measure a real server. Results are JSON.
+
+import argparse
+import csv
+import io
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+os.environ.setdefault("SECRET_KEY", "bench-secret-key-of-at-least-32-bytes")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("SECRET_KEY_DATA", "bench")
+os.environ.setdefault("MAIL_WORKERS", "0")
+os.environ.setdefault("DB_CREATE_TABLES", "true")
+
+from fastapi.testclient import TestClient
+from main import app
+from Endpoints.auth import create_access_token
+
+FIELDS = ["title", "address", "location", "price", "bedrooms", "bathrooms", "size", "furnished"]
+
+
+def make_rows(count):
+    return [
+        {
+            "title": f"Listing {i}", "address": f"KG {i} Ave", "location": ("Kigali", "Musanze", "Huye")[i % 3],
+            "price": 50 + i % 400, "bedrooms": 1 + i % 5, "bathrooms": 1 + i % 3, "size": 40 + i % 200,
+            "furnished": i % 2 == 0,
+        }
+        for i in range(count)
+    ]
+
+
+def to_csv(rows):
+    out = io.StringIO()
+    writer = csv.DictWriter(out, FIELDS)
+    writer.writeheader()
+    writer.writerows(rows)
+    return out.getvalue()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--single", type=int, default=300, help="listings created one request at a time")
+    args = parser.parse_args()
+
+    token = create_access_token("bench@example.com", 1, "host", timedelta(hours=1))
+    headers = {"Authorization": f"Bearer {token}"}
+    rows = make_rows(args.rows)
+    results = {}
+
+    with TestClient(app) as client:
+        for fmt, name, payload in (("csv", "houses.csv", to_csv(rows)), ("json", "houses.json", json.dumps(rows))):
+            started = time.perf_counter()
+            report = client.post("/api/house/import", files={"file": (name, payload)}, headers=headers).json()
+            elapsed = time.perf_counter() - started
+            assert report["imported"] == args.rows, report
+            results[f"import_{fmt}_rows_per_second"] = round(args.rows / elapsed)
+
+        started = time.perf_counter()
+        for row in rows[:args.single]:
+            client.post("/api/house", json=row, headers=headers)
+        results["single_post_rows_per_second"] = round(args.single / (time.perf_counter() - started))
+
+    print(json.dumps({
+        "benchmark": "house_import",
+        "database": os.environ["DATABASE_URL"].split(":", 1)[0],
+        "rows": args.rows,
+        **results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# users_micro/benchmarks/bench_login.py
+#
+# Password verification throughput of the login path for growing bcrypt
+# pools, driven by concurrent async callers the way uvicorn drives
+# authenticate_user. Run from users_micro:
+#
+#   python -m benchmarks.bench_login --logins 64 --rounds 12
+#
+# Throughput should grow with --workers up to the number of cores, while
+# the event loop stays responsive (loop_lag_ms). Results are JSON.
+
+import argparse
+import asyncio
+import json
+import os
+import time
+
+import config  # loads .env
+from passlib.context import CryptContext
+from functions.passwords import PasswordHasher
+
+
+async def ticker(lags, stop):
+    # how late a 10 ms sleep wakes up tells how blocked the loop is
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append((time.perf_counter() - started - 0.01) * 1000)
+
+
+async def run(hasher, hashed, logins):
+    lags, stop = [], asyncio.Event()
+    tick = asyncio.create_task(ticker(lags, stop))
+    started = time.perf_counter()
+    results = await asyncio.gather(*(hasher.verify("correct horse", hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await tick
+    assert all(valid for valid, _ in results)
+    return elapsed, max(lags, default=0.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, nargs="*", default=sorted({1, 2, 4, os.cpu_count() or 1}))
+    args = parser.parse_args()
+
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=args.rounds)
+    hashed = context.hash("correct horse")
+    results = []
+    for workers in args.workers:
+        hasher = PasswordHasher(workers=workers, queue=args.logins, context=context)
+        elapsed, lag = asyncio.run(run(hasher, hashed, args.logins))
+        hasher.executor.shutdown()
+        results.append({
+            "workers": workers,
+            "logins_per_second": round(args.logins / elapsed, 2),
+            "loop_lag_ms": round(lag, 2),
+        })
+
+    print(json.dumps({
+        "benchmark": "login_password_verify",
+        "cpu_count": os.cpu_count(),
+        "rounds": args.rounds,
+        "logins": args.logins,
+        "results": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# users_micro/benchmarks/bench_serialization.py
+#
+# CPU spent turning a page of House rows into a JSON response: the old
+# untyped route (jsonable_encoder walking every ORM attribute), a route with
+# response_model=HousePage (pydantic-core writes JSON bytes directly) and the
+# same route with ORJSONResponse. Run from users_micro:
+#
+#   python -m benchmarks.bench_serialization --houses 100 --requests 500
+#
+# Results are printed as JSON, in milliseconds per request.
+
+import argparse
+import json
+import os
+import time
+import warnings
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import config  # loads .env; the defaults above win over it
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from models.userModels import House
+from schemas.schemas import HousePage
+from functions.response_cache import to_json
+from fastapi.encoders import jsonable_encoder
+
+with warnings.catch_warnings():
+    warnings.simplefilter("ignore")
+    from fastapi.responses import ORJSONResponse
+
+
+def make_houses(count):
+    return [
+        House(
+            id=i, owner_id=1, title=f"House {i}", description="Bright flat close to the city centre",
+            address="KG 1 Ave", location="Kigali", price=100.0 + i, bedrooms=2, bathrooms=1,
+            size=60.0, furnished=True, available=True, image_url=f"https://cdn.example.com/{i}.jpg",
+        )
+        for i in range(count)
+    ]
+
+
+def per_call_ms(fn, requests):
+    for _ in range(min(requests, 50)):
+        fn()
+    started = time.perf_counter()
+    for _ in range(requests):
+        fn()
+    return round((time.perf_counter() - started) / requests * 1000, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--houses", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    page = {"houses": make_houses(args.houses), "next_cursor": args.houses}
+
+    app = FastAPI()
+    app.get("/untyped")(lambda: page)
+    app.get("/response-model", response_model=HousePage)(lambda: page)
+    app.get("/orjson", response_model=HousePage, response_class=ORJSONResponse)(lambda: page)
+    client = TestClient(app)
+
+    results = {
+        path.strip("/"): per_call_ms(lambda: client.get(path), args.requests)
+        for path in ("/untyped", "/response-model", "/orjson")
+    }
+    # the serialization step alone, as used by the response cache
+    results["encode_only_untyped"] = per_call_ms(
+        lambda: json.dumps(jsonable_encoder(page)).encode(), args.requests)
+    results["encode_only_response_model"] = per_call_ms(lambda: to_json(page, HousePage), args.requests)
+
+    print(json.dumps({
+        "benchmark": "house_page_serialization",
+        "houses": args.houses,
+        "requests": args.requests,
+        "ms_per_request": results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# users_micro/benchmarks/bench_startup.py
+#
+# Cold start of a worker: importing the app, then running its lifespan up to
+# the first request, plus how long pytest takes to collect the tests. Every
+# sample is a fresh interpreter. Run from users_micro:
+#
+#   python -m benchmarks.bench_startup --runs 5
+#
+# Uses a throwaway SQLite database unless DATABASE_URL is set. Results are
+# JSON, median and best run in milliseconds.
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+IMPORT_APP = """
+import time
+started = time.perf_counter()
+import main
+print((time.perf_counter() - started) * 1000)
+"""
+
+FIRST_REQUEST = """
+import time
+started = time.perf_counter()
+import main
+from fastapi.testclient import TestClient
+with TestClient(main.app) as client:
+    client.get("/api/house", params={"limit": 1}).raise_for_status()
+print((time.perf_counter() - started) * 1000)
+"""
+
+
+def sample_ms(code, env):
+    output = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", code], env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def wall_ms(command, env):
+    started = time.perf_counter()
+    subprocess.run(command, env=env, capture_output=True, check=True)
+    return (time.perf_counter() - started) * 1000
+
+
+def summary(samples):
+    return {"median_ms": round(statistics.median(samples), 1), "best_ms": round(min(samples), 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--skip-collect", action="store_true", help="don't time pytest --collect-only")
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'startup.db')}")
+    env.setdefault("SECRET_KEY", "bench-secret-key-of-at-least-32-bytes")
+    env.setdefault("ALGORITHM", "HS256")
+    env.setdefault("SECRET_KEY_DATA", "bench")
+    env.setdefault("MAIL_WORKERS", "0")
+    env.setdefault("IMAGE_WORKERS", "0")
+    env.setdefault("DB_CREATE_TABLES", "true")
+
+    results = {
+        "import_app": summary([sample_ms(IMPORT_APP, env) for _ in range(args.runs)]),
+        "first_request": summary([sample_ms(FIRST_REQUEST, env) for _ in range(args.runs)]),
+    }
+    if not args.skip_collect:
+        collect = [sys.executable, "-m", "pytest", "--collect-only", "-q", "-p", "no:cacheprovider"]
+        results["pytest_collect"] = summary([wall_ms(collect, env) for _ in range(args.runs)])
+
+    print(json.dumps({
+        "benchmark": "startup",
+        "database": env["DATABASE_URL"].split(":", 1)[0],
+        "runs": args.runs,
+        **results,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,351 @@
+# users_micro/benchmarks/load_test.py
+#
+# Mixed load against the real routers: seeds synthetic users, houses and
+# bookings, then concurrent clients log in, page through houses, book stays
+# and read their bookings and customers. Run from users_micro:
+#
+#   python -m benchmarks.load_test --users 2000 --houses 5000 --bookings 20000 --concurrency 32 --duration 30
+#
+# The app runs in process through httpx's ASGI transport, against a
+# throwaway SQLite file unless DATABASE_URL is set (use a postgresql:// url
+# for a real server). --url drives an already running server instead; seed
+# the same DATABASE_URL it uses. Emails go to a local SMTP sink when aiosmtpd
+# is installed and otherwise stay queued in the outbox. Throughput and
+# p50/p95/p99 latencies per route are printed as JSON; --output also writes
+# them to a file so runs can be compared across commits.
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import subprocess
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+try:
+    from aiosmtpd.controller import Controller  # optional, without it emails stay queued
+except ImportError:
+    Controller = None
+
+
+class SinkHandler:
+    # accepts and drops every message
+    def __init__(self):
+        self.received = 0
+
+    async def handle_DATA(self, server, session, envelope):
+        self.received += 1
+        return "250 OK"
+
+
+def start_smtp_sink():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    controller = Controller(SinkHandler(), hostname="127.0.0.1", port=port)
+    controller.start()
+    return controller
+
+
+# The app reads its settings at import time, so the SMTP sink and the
+# defaults below have to be in place before main is imported.
+smtp_sink = start_smtp_sink() if Controller is not None and "SMTP_HOST" not in os.environ else None
+if smtp_sink is not None:
+    os.environ.update(SMTP_HOST="127.0.0.1", SMTP_PORT=str(smtp_sink.port), SMTP_STARTTLS="false", NOVA_USERNAME="")
+    os.environ.setdefault("MAIL_POLL_INTERVAL", "0.5")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'load.db')}")
+os.environ.setdefault("SECRET_KEY", "bench-secret-key-of-at-least-32-bytes")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("SECRET_KEY_DATA", "bench")
+os.environ.setdefault("NOVA_SENDER_EMAIL", "noreply@lala-rentals.test")
+os.environ.setdefault("MAIL_WORKERS", "1" if smtp_sink is not None else "0")
+
+import httpx
+from sqlalchemy import insert, select
+from main import app
+from db.database import engine
+from models.userModels import Base, Users, House, Booking, HouseOccupancy
+from Endpoints.auth import create_access_token
+from functions.availability import ACTIVE_BOOKING_STATUSES, booking_nights, night_masks
+from functions.passwords import pwd_context
+
+PASSWORD = "load-test-password"
+LOCATIONS = [f"District {i}" for i in range(20)]
+START = datetime(2031, 1, 1, 14)
+CHUNK = 5000
+DEFAULT_MIX = "list_houses=50,user_bookings=15,house_customers=15,create_booking=15,login=5"
+
+
+def insert_chunks(conn, table, rows):
+    for first in range(0, len(rows), CHUNK):
+        conn.execute(insert(table), rows[first:first + CHUNK])
+
+
+def seed(users, houses, bookings, rng):
+    # Synthetic users (a tenth of them hosts), houses spread over the hosts
+    # and runs of back to back stays per house, with their occupancy months.
+    # Rows are tagged with a run id so seeding an existing database adds to
+    # it instead of clashing with earlier runs.
+    Base.metadata.create_all(engine)
+    tag = uuid.uuid4().hex[:8]
+    hashed = pwd_context.hash(PASSWORD)
+    hosts = max(1, users // 10)
+    with engine.begin() as conn:
+        insert_chunks(conn, Users, [
+            {
+                "full_name": f"Load User {i}",
+                "email": f"load-{tag}-{i}@example.com",
+                "password": hashed,
+                "location": rng.choice(LOCATIONS),
+                "nationality": "Rwandan",
+                "role": "host" if i < hosts else "renter",
+            }
+            for i in range(users)
+        ])
+        rows = conn.execute(
+            select(Users.id, Users.email, Users.role).where(Users.email.like(f"load-{tag}-%")).order_by(Users.id)
+        ).all()
+        host_ids = [row.id for row in rows if row.role == "host"]
+        renters = [(row.id, row.email) for row in rows if row.role != "host"] or [(row.id, row.email) for row in rows]
+
+        insert_chunks(conn, House, [
+            {
+                "owner_id": host_ids[i % len(host_ids)],
+                "title": f"Load House {tag} {i}",
+                "address": f"KG {i} Ave",
+                "location": rng.choice(LOCATIONS),
+                "price": rng.randint(20, 500),
+                "bedrooms": rng.randint(1, 6),
+                "bathrooms": rng.randint(1, 3),
+                "size": rng.randint(30, 300),
+                "furnished": rng.random() < 0.5,
+                "available": True,
+            }
+            for i in range(houses)
+        ])
+        house_ids = conn.scalars(
+            select(House.id).where(House.title.like(f"Load House {tag} %")).order_by(House.id)
+        ).all()
+
+        booking_rows, occupancy = [], {}
+        per_house = bookings // max(1, len(house_ids))
+        extra = bookings - per_house * len(house_ids)
+        for index, house_id in enumerate(house_ids):
+            day = START + timedelta(days=rng.randint(0, 30))
+            for _ in range(per_house + (index < extra)):
+                nights = rng.randint(1, 10)
+                booking = {
+                    "house_id": house_id,
+                    "user_id": rng.choice(renters)[0],
+                    "status": rng.choice(("pending", "approved", "approved", "canceled")),
+                    "checkin": day,
+                    "checkout": day + timedelta(days=nights),
+                    "created_at": datetime.utcnow(),
+                }
+                booking_rows.append(booking)
+                if booking["status"] in ACTIVE_BOOKING_STATUSES:
+                    for key, mask in night_masks(*booking_nights(booking["checkin"], booking["checkout"])).items():
+                        occupancy[(house_id, key)] = occupancy.get((house_id, key), 0) | mask
+                day += timedelta(days=nights + rng.randint(0, 7))
+        insert_chunks(conn, Booking, booking_rows)
+        insert_chunks(conn, HouseOccupancy, [
+            {"house_id": house_id, "month": key, "days": days} for (house_id, key), days in occupancy.items()
+        ])
+    return {"tag": tag, "hosts": host_ids, "renters": renters, "houses": house_ids}
+
+
+class Scenarios:
+    # One method per request kind; each sends a single request and returns
+    # the response. Access tokens are minted directly (and reused), so only
+    # the login scenario pays for bcrypt.
+
+    def __init__(self, client, data, rng):
+        self.client = client
+        self.data = data
+        self.rng = rng
+        self.tokens = {}
+
+    def auth(self, user_id, email, role):
+        token = self.tokens.get(user_id)
+        if token is None:
+            token = self.tokens[user_id] = create_access_token(email, user_id, role, timedelta(hours=2))
+        return {"Authorization": f"Bearer {token}"}
+
+    def renter(self):
+        user_id, email = self.rng.choice(self.data["renters"])
+        return self.auth(user_id, email, "renter")
+
+    def host(self):
+        user_id = self.rng.choice(self.data["hosts"])
+        return self.auth(user_id, f"host-{user_id}@example.com", "host")
+
+    async def login(self):
+        _, email = self.rng.choice(self.data["renters"])
+        return await self.client.post("/auth/login", json={"email": email, "password": PASSWORD})
+
+    async def list_houses(self):
+        params = {"limit": 20}
+        if self.rng.random() < 0.5:
+            params["location"] = self.rng.choice(LOCATIONS)
+        return await self.client.get("/api/house", params=params)
+
+    async def create_booking(self):
+        # far future dates keep most requests clear of the seeded stays,
+        # the rest measure the conflict path (409)
+        checkin = START + timedelta(days=self.rng.randint(400, 4000))
+        body = {
+            "house_id": self.rng.choice(self.data["houses"]),
+            "checkin": checkin.isoformat(),
+            "checkout": (checkin + timedelta(days=self.rng.randint(1, 7))).isoformat(),
+        }
+        return await self.client.post("/api/booking", json=body, headers=self.renter())
+
+    async def user_bookings(self):
+        return await self.client.get("/api/booking/user", headers=self.renter())
+
+    async def house_customers(self):
+        return await self.client.get("/api/house/customers", params={"limit": 20}, headers=self.host())
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if not hasattr(Scenarios, name.strip()):
+            raise SystemExit(f"Unknown scenario {name!r}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def percentile(ordered, fraction):
+    # nearest rank on an already sorted list
+    if not ordered:
+        return None
+    return ordered[min(len(ordered), max(1, math.ceil(fraction * len(ordered)))) - 1]
+
+
+def summarize(samples, elapsed):
+    latencies = sorted(seconds for _, seconds in samples)
+    statuses = {}
+    for status, _ in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "requests": len(samples),
+        "requests_per_second": round(len(samples) / elapsed, 2) if elapsed else None,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3) if latencies else None,
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 3) if latencies else None,
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3) if latencies else None,
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else None,
+        "statuses": statuses,
+    }
+
+
+async def drive(client, data, mix, concurrency, duration, total, seed_value):
+    # concurrent clients pick scenarios by weight until the time or request
+    # budget is used up
+    samples = {name: [] for name in mix}
+    names, weights = list(mix), list(mix.values())
+    deadline = time.perf_counter() + duration if duration else None
+    budget = {"left": total}
+
+    async def worker(number):
+        rng = random.Random(seed_value + number)
+        scenarios = Scenarios(client, data, rng)
+        while True:
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            if total is not None:
+                if budget["left"] <= 0:
+                    return
+                budget["left"] -= 1
+            name = rng.choices(names, weights)[0]
+            started = time.perf_counter()
+            try:
+                status = (await getattr(scenarios, name)()).status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            samples[name].append((status, time.perf_counter() - started))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(number) for number in range(concurrency)))
+    return samples, time.perf_counter() - started
+
+
+async def run(args, data, mix):
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=60) as client:
+            return await drive(client, data, mix, args.concurrency, args.duration, args.requests, args.seed)
+    # ASGITransport does not run the lifespan, start the workers ourselves
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=60) as client:
+            return await drive(client, data, mix, args.concurrency, args.duration, args.requests, args.seed)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--houses", type=int, default=2000)
+    parser.add_argument("--bookings", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10, help="seconds to run, 0 to run --requests only")
+    parser.add_argument("--requests", type=int, default=None, help="stop after this many requests")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario=weight pairs")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--url", default=None, help="drive a running server instead of the in-process app")
+    parser.add_argument("--output", default=None, help="also write the JSON report to this file")
+    args = parser.parse_args(argv)
+    if not args.duration and args.requests is None:
+        parser.error("give --duration or --requests")
+
+    mix = parse_mix(args.mix)
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    data = seed(args.users, args.houses, args.bookings, rng)
+    seed_seconds = time.perf_counter() - started
+
+    samples, elapsed = asyncio.run(run(args, data, mix))
+    everything = [sample for scenario in samples.values() for sample in scenario]
+    report = {
+        "benchmark": "load_test",
+        "commit": git_commit(),
+        "database": os.environ["DATABASE_URL"].split(":", 1)[0],
+        "target": args.url or "asgi",
+        "seed": {
+            "users": args.users, "houses": args.houses, "bookings": args.bookings,
+            "seconds": round(seed_seconds, 2),
+        },
+        "concurrency": args.concurrency,
+        "duration_seconds": round(elapsed, 2),
+        "mix": mix,
+        "emails_delivered": smtp_sink.handler.received if smtp_sink is not None else None,
+        "total": summarize(everything, elapsed),
+        "scenarios": {name: summarize(scenario, elapsed) for name, scenario in samples.items()},
+    }
+    if smtp_sink is not None:
+        smtp_sink.stop()
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    return report
+
+
+if __name__ == "__main__":
+    main()
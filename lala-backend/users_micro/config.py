@@ -0,0 +1,7 @@
+from dotenv import load_dotenv
+
+# Loads the .env file once per process. Only the entry points import it,
+# before anything else of the app: main.py, migrations/env.py and the
+# benchmarks. Modules read their settings from os.environ; variables already
+# set in the environment win over the file.
+load_dotenv()
@@ -1,10 +1,14 @@
 from fastapi import Depends
 from sqlalchemy.orm import Session
-from .database import engine, SessionLocal
+from sqlalchemy.ext.asyncio import AsyncSession
+from .database import get_engine, SessionLocal, AsyncSessionLocal
 from typing import Annotated
 from models.userModels import  Base
 
-Base.metadata.create_all(bind=engine)
+
+def create_tables():
+    # run from the app lifespan (DB_CREATE_TABLES), never at import time
+    Base.metadata.create_all(bind=get_engine())
 
 def get_db():
     db = SessionLocal()
@@ -14,4 +18,11 @@ def get_db():
         db.close()
 
 
-db_dependency = Annotated[Session, Depends(get_db)]
\ No newline at end of file
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+db_dependency = Annotated[Session, Depends(get_db)]
+# for async def endpoints, queries must be awaited: await db.scalar(select(...))
+async_db_dependency = Annotated[AsyncSession, Depends(get_async_db)]
@@ -1,15 +1,221 @@
-from sqlalchemy import create_engine
+import threading
+import time
+from sqlalchemy import create_engine, exc
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
 from sqlalchemy.ext.declarative import declarative_base
-from dotenv import load_dotenv
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from functions.metrics import instrument_engine
+from functions.profiling import sql_profiler
 import os
-# Load environment variables from .env file
-load_dotenv()
-
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL)
+# sync drivers and the async driver that replaces them for the async engine
+ASYNC_DRIVERS = {
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+}
+
+
+def async_database_url(url: str) -> str:
+    # same database as DATABASE_URL, reached through an asyncio driver
+    scheme, sep, rest = url.partition("://")
+    return ASYNC_DRIVERS.get(scheme, scheme) + sep + rest
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or (DATABASE_URL and async_database_url(DATABASE_URL))
+
+# connection pool settings, per engine and per worker process
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))  # seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # seconds before a connection is replaced
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "15000"))  # 0 disables it
+# total connections the database allows this service; when set, the pools of
+# both engines in every worker (WEB_CONCURRENCY) are shrunk to fit in it
+DB_MAX_CONNECTIONS = int(os.getenv("DB_MAX_CONNECTIONS", "0"))
+WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", "1"))
+# create missing tables at startup instead of running `alembic upgrade head`;
+# only for throwaway databases (benchmarks, local experiments), it never adds
+# columns or indexes to existing tables
+DB_CREATE_TABLES = os.getenv("DB_CREATE_TABLES", "false").lower() == "true"
+
+
+class PoolWaitStats:
+    # Time spent waiting for a pooled connection, fed by the pools below.
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checkouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        self.timeouts = 0
+
+    def record(self, waited, timed_out):
+        with self.lock:
+            self.checkouts += 1
+            self.wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+            if timed_out:
+                self.timeouts += 1
+
+
+class MeasuredPoolMixin:
+    # Times every checkout, including the ones that give up after
+    # pool_timeout because the pool is exhausted.
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self.wait_stats.record(time.perf_counter() - started, timed_out)
+
+    def recreate(self):
+        # keep the numbers when the engine swaps its pool (dispose, reconnect)
+        pool = super().recreate()
+        pool.wait_stats = self.wait_stats
+        return pool
+
+
+class MeasuredQueuePool(MeasuredPoolMixin, QueuePool):
+    pass
+
+
+class MeasuredAsyncQueuePool(MeasuredPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(url: str, is_async: bool = False) -> dict:
+    options = {"pool_pre_ping": DB_POOL_PRE_PING, "pool_recycle": DB_POOL_RECYCLE}
+    if url.startswith("sqlite") and (":memory:" in url or url.split("://", 1)[1] in ("", "/")):
+        # in-memory SQLite lives in a single connection, nothing to size
+        return options
+
+    pool_size, max_overflow = DB_POOL_SIZE, DB_MAX_OVERFLOW
+    if DB_MAX_CONNECTIONS:
+        # two engines (sync and async) per worker process share the budget
+        budget = max(2, DB_MAX_CONNECTIONS // (WEB_CONCURRENCY * 2))
+        pool_size = min(pool_size, budget)
+        max_overflow = min(max_overflow, budget - pool_size)
+    options.update(
+        poolclass=MeasuredAsyncQueuePool if is_async else MeasuredQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=DB_POOL_TIMEOUT,
+    )
+
+    if DB_STATEMENT_TIMEOUT_MS and url.startswith("postgres"):
+        # the server cancels statements running longer than this
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+    return options
+
+
+def pool_status(engine) -> dict:
+    # snapshot of an engine's pool for the health endpoint
+    pool = engine.pool
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(0, pool.overflow()),
+        )
+    stats = getattr(pool, "wait_stats", None)
+    if stats is not None:
+        status.update(
+            checkouts=stats.checkouts,
+            wait_seconds_total=round(stats.wait_seconds, 6),
+            max_wait_seconds=round(stats.max_wait_seconds, 6),
+            timeouts=stats.timeouts,
+        )
+    return status
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def _make_engine(kind):
+    if kind == "sync":
+        created = create_engine(DATABASE_URL, **engine_options(DATABASE_URL))
+        instrumented = created
+    else:
+        # async engine for the async def endpoints so they never block the event loop
+        created = create_async_engine(ASYNC_DATABASE_URL, **engine_options(ASYNC_DATABASE_URL, is_async=True))
+        instrumented = created.sync_engine
+    # statement timings and per request query counts for /metrics, plus the
+    # slow query log and SQL_PROFILE
+    instrument_engine(instrumented, kind, observers=(sql_profiler.record,))
+    return created
+
+
+def _get(kind):
+    # Engines are built on first use rather than at import: importing the app
+    # loads no database driver and opens no pool, which keeps worker start
+    # and test collection fast.
+    created = _engines.get(kind)
+    if created is None:
+        with _engines_lock:
+            created = _engines.get(kind)
+            if created is None:
+                created = _engines[kind] = _make_engine(kind)
+    return created
+
+
+def get_engine():
+    return _get("sync")
+
+
+def get_async_engine():
+    return _get("async")
+
+
+def __getattr__(name):
+    # `from db.database import engine` keeps working for scripts
+    if name == "engine":
+        return get_engine()
+    if name == "async_engine":
+        return get_async_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class LazyBindMixin:
+    # binds the session factory to its engine when the first session is made
+    def __init__(self, engine_factory, **kw):
+        super().__init__(**kw)
+        self.engine_factory = engine_factory
+
+    def __call__(self, **local_kw):
+        if self.kw.get("bind") is None:
+            self.configure(bind=self.engine_factory())
+        return super().__call__(**local_kw)
+
+
+class LazySessionmaker(LazyBindMixin, sessionmaker):
+    pass
+
+
+class LazyAsyncSessionmaker(LazyBindMixin, async_sessionmaker):
+    pass
+
+
+SessionLocal = LazySessionmaker(get_engine, autocommit = False, autoflush = False)
 
-SessionLocal = sessionmaker(autocommit = False, autoflush = False, bind = engine)
+AsyncSessionLocal = LazyAsyncSessionmaker(get_async_engine, autoflush=False, expire_on_commit=False)
 
-Base = declarative_base()
\ No newline at end of file
+Base = declarative_base()
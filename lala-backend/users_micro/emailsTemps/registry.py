@@ -0,0 +1,49 @@
+import os
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, StrictUndefined, select_autoescape
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "templates")
+# compiled templates are kept here so a restarted worker skips the parsing,
+# unset uses a private directory under the system temp dir
+EMAIL_TEMPLATE_CACHE_DIR = os.getenv("EMAIL_TEMPLATE_CACHE_DIR") or None
+
+
+class TemplateRegistry:
+    # Jinja2 environment for the email templates. Every template is compiled
+    # once (load() at startup) and reused for each message; variables are
+    # HTML escaped unless a template marks them safe.
+
+    def __init__(self, directory=TEMPLATE_DIR, cache_dir=EMAIL_TEMPLATE_CACHE_DIR):
+        self.env = Environment(
+            loader=FileSystemLoader(directory),
+            autoescape=select_autoescape(["html"]),
+            bytecode_cache=FileSystemBytecodeCache(cache_dir),
+            # templates ship with the code, no need to stat them on every render
+            auto_reload=False,
+            undefined=StrictUndefined,
+            cache_size=-1,
+        )
+        self.templates = {}
+
+    def load(self):
+        for name in self.env.list_templates(extensions=["html"]):
+            self.templates[name] = self.env.get_template(name)
+        return self
+
+    def get(self, name):
+        template = self.templates.get(name)
+        if template is None:
+            template = self.templates[name] = self.env.get_template(name)
+        return template
+
+    def render(self, name, **context):
+        return self.get(name).render(**context)
+
+    def render_many(self, name, recipients, **shared):
+        # one message per recipient context for bulk notifications, the
+        # recipient's values win over the shared ones; the compiled template
+        # is looked up once for the whole batch
+        template = self.get(name)
+        return [template.render({**shared, **recipient}) for recipient in recipients]
+
+email_templates = TemplateRegistry()
+render_email = email_templates.render
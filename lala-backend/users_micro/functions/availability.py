@@ -0,0 +1,176 @@
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, time, timedelta
+from sqlalchemy import func, select
+from models.userModels import Booking, House, HouseOccupancy
+
+# bookings in these states hold their dates, rejected and canceled ones
+# free them; schemas.BookingStatus keeps stored statuses lower case
+ACTIVE_BOOKING_STATUSES = ("pending", "approved")
+
+# striped in-process locks so SQLite, which has no row locks, still
+# serializes concurrent booking attempts on the same house
+_house_locks = [threading.Lock() for _ in range(64)]
+
+
+@contextmanager
+def lock_house(db, house_id: int):
+    # Hold the house while checking and writing a booking. On PostgreSQL the
+    # FOR UPDATE row lock serializes attempts across worker processes and is
+    # released by the commit or rollback inside the block.
+    with _house_locks[house_id % len(_house_locks)]:
+        house = db.query(House).filter(House.id == house_id).with_for_update().first()
+        try:
+            yield house
+        except BaseException:
+            # never leave the row lock behind if the block bailed out early
+            db.rollback()
+            raise
+
+
+def find_conflict(db, house_id: int, checkin, checkout, exclude_id=None):
+    # Active bookings of a house never overlap each other, so when sorted by
+    # checkin the only one that can overlap [checkin, checkout) is the last
+    # one starting before checkout. One index seek instead of a range scan.
+    query = db.query(Booking).filter(
+        Booking.house_id == house_id,
+        Booking.status.in_(ACTIVE_BOOKING_STATUSES),
+        Booking.checkin < checkout,
+    )
+    if exclude_id is not None:
+        query = query.filter(Booking.id != exclude_id)
+    candidate = query.order_by(Booking.checkin.desc()).first()
+    if candidate and candidate.checkout > checkin:
+        return candidate
+    return None
+
+
+def booked_between(checkin, checkout):
+    # Matches houses with an active booking overlapping [checkin, checkout).
+    # Same reasoning as find_conflict: only the last stay starting before
+    # checkout can overlap, so each house costs one index seek however long
+    # its booking history is. Negate it to keep the houses that are free.
+    last_checkout = (
+        select(Booking.checkout)
+        .where(
+            Booking.house_id == House.id,
+            Booking.status.in_(ACTIVE_BOOKING_STATUSES),
+            Booking.checkin < checkout,
+        )
+        .order_by(Booking.checkin.desc())
+        .limit(1)
+        .correlate(House)
+        .scalar_subquery()
+    )
+    # houses without any earlier stay compare checkin > checkin, i.e. free
+    return func.coalesce(last_checkout, checkin) > checkin
+
+
+# ---- per-house occupancy bitmaps -------------------------------------------
+
+def month_key(day):
+    return day.year * 12 + day.month - 1
+
+
+def month_start(key):
+    return date(key // 12, key % 12 + 1, 1)
+
+
+def booking_nights(checkin, checkout):
+    # nights taken by a stay as [first, last); a same day stay still takes one
+    first = checkin.date()
+    last = max(checkout.date(), first + timedelta(days=1))
+    return first, last
+
+
+def night_masks(first, last):
+    # {month key: bitmask} for the nights in [first, last)
+    masks = {}
+    day = first
+    while day < last:
+        key = month_key(day)
+        masks[key] = masks.get(key, 0) | 1 << (day.day - 1)
+        day += timedelta(days=1)
+    return masks
+
+
+def mark_booking(db, booking):
+    # OR the stay into its months; callers hold lock_house for the house
+    masks = night_masks(*booking_nights(booking.checkin, booking.checkout))
+    rows = {
+        row.month: row
+        for row in db.query(HouseOccupancy).filter(
+            HouseOccupancy.house_id == booking.house_id,
+            HouseOccupancy.month.in_(masks),
+        )
+    }
+    for key, mask in masks.items():
+        row = rows.get(key)
+        if row is None:
+            db.add(HouseOccupancy(house_id=booking.house_id, month=key, days=mask))
+        else:
+            row.days = row.days | mask
+
+
+def unmark_booking(db, booking):
+    # Nights can be shared by same day stays, so rather than clearing bits
+    # the months the stay touched are rebuilt from the remaining bookings.
+    masks = night_masks(*booking_nights(booking.checkin, booking.checkout))
+    rebuild_months(db, booking.house_id, masks, exclude_id=booking.id)
+
+
+def rebuild_months(db, house_id: int, keys, exclude_id=None):
+    keys = sorted(keys)
+    if not keys:
+        return
+    start = datetime.combine(month_start(keys[0]), time.min)
+    end = datetime.combine(month_start(keys[-1] + 1), time.min)
+    query = db.query(Booking).filter(
+        Booking.house_id == house_id,
+        Booking.status.in_(ACTIVE_BOOKING_STATUSES),
+        Booking.checkin < end,
+        Booking.checkout >= start,
+    )
+    if exclude_id is not None:
+        query = query.filter(Booking.id != exclude_id)
+
+    days = dict.fromkeys(keys, 0)
+    for booking in query:
+        for key, mask in night_masks(*booking_nights(booking.checkin, booking.checkout)).items():
+            if key in days:
+                days[key] |= mask
+
+    rows = {
+        row.month: row
+        for row in db.query(HouseOccupancy).filter(
+            HouseOccupancy.house_id == house_id,
+            HouseOccupancy.month.in_(keys),
+        )
+    }
+    for key, mask in days.items():
+        row = rows.get(key)
+        if row is None:
+            if mask:
+                db.add(HouseOccupancy(house_id=house_id, month=key, days=mask))
+        elif mask:
+            row.days = mask
+        else:
+            db.delete(row)
+
+
+def occupancy_bitmap(db, house_id: int, first, last):
+    # '1' for every taken night in [first, last], '0' for free ones
+    rows = dict(
+        db.query(HouseOccupancy.month, HouseOccupancy.days).filter(
+            HouseOccupancy.house_id == house_id,
+            HouseOccupancy.month >= month_key(first),
+            HouseOccupancy.month <= month_key(last),
+        )
+    )
+    bits = []
+    day = first
+    while day <= last:
+        mask = rows.get(month_key(day), 0)
+        bits.append("1" if mask >> (day.day - 1) & 1 else "0")
+        day += timedelta(days=1)
+    return "".join(bits)
@@ -0,0 +1,105 @@
+import codecs
+import csv
+import json
+import os
+from pydantic import ValidationError
+from sqlalchemy import insert
+from models.userModels import House
+from schemas.schemas import HouseCreate
+
+# valid rows inserted per executemany and transaction
+IMPORT_CHUNK_SIZE = int(os.getenv("IMPORT_CHUNK_SIZE", "1000"))
+# row errors listed in the report, the rest are only counted
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "1000"))
+
+_decoder = json.JSONDecoder()
+
+
+def iter_csv_rows(file):
+    # CSV with a header row named after the HouseCreate fields; empty cells
+    # count as missing
+    try:
+        for row in csv.DictReader(codecs.getreader("utf-8-sig")(file)):
+            yield {key: value for key, value in row.items() if key and value not in ("", None)}
+    except csv.Error as e:
+        raise ValueError(str(e))
+
+
+def iter_json_array(file, read_size=64 * 1024):
+    # Yields the items of a top level JSON array while reading the upload in
+    # blocks, so the whole document is never decoded at once
+    reader = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer, pos, started = "", 0, False
+    while True:
+        block = file.read(read_size)
+        buffer = buffer[pos:] + reader.decode(block, final=not block)
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+                pos += 1
+            if pos == len(buffer):
+                break
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError("Expected a JSON array")
+                started, pos = True, pos + 1
+                continue
+            if buffer[pos] == "]":
+                return
+            try:
+                item, end = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if not block:
+                    raise ValueError("Truncated or invalid JSON array")
+                break  # item continues in the next block
+            if end == len(buffer) and block:
+                break  # a number could go on in the next block
+            pos = end
+            yield item
+        if not block:
+            raise ValueError("Truncated JSON array")
+
+
+def validation_messages(error: ValidationError):
+    return [f"{'.'.join(map(str, e['loc'])) or 'row'}: {e['msg']}" for e in error.errors()]
+
+
+def import_houses(db, owner_id, rows, chunk_size=IMPORT_CHUNK_SIZE, max_errors=IMPORT_MAX_ERRORS):
+    # Validates rows as they are read and inserts the valid ones a chunk at a
+    # time, each chunk one executemany in its own transaction. Invalid rows
+    # are reported and skipped, they never abort the import. A file that
+    # can't be read any further stops it: the valid rows before that point
+    # are still inserted, `rows_read` tells where to resume.
+    imported, failed, errors, chunk = 0, 0, [], []
+    number, read_error = 0, None
+
+    def flush():
+        nonlocal imported
+        if chunk:
+            db.execute(insert(House), chunk)
+            db.commit()
+            imported += len(chunk)
+            chunk.clear()
+
+    try:
+        for number, row in enumerate(rows, start=1):
+            try:
+                if not isinstance(row, dict):
+                    raise ValueError("row must be an object")
+                house = HouseCreate.model_validate(row)
+            except ValidationError as e:
+                messages = validation_messages(e)
+            except ValueError as e:
+                messages = [str(e)]
+            else:
+                chunk.append({**house.model_dump(), "owner_id": owner_id})
+                if len(chunk) >= chunk_size:
+                    flush()
+                continue
+            failed += 1
+            if len(errors) < max_errors:
+                errors.append({"row": number, "errors": messages})
+    except ValueError as e:  # UnicodeDecodeError included
+        read_error = str(e)
+    flush()
+    return {"imported": imported, "failed": failed, "errors": errors, "rows_read": number, "error": read_error}
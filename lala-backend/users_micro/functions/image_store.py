@@ -0,0 +1,196 @@
+import hashlib
+import importlib.util
+import io
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import select
+from db.database import SessionLocal
+from models.userModels import House, HouseImage
+
+logger = logging.getLogger(__name__)
+
+# Pillow is optional, without it only originals are served. It is imported
+# where photos are resized so loading the app doesn't pay for it.
+HAS_PILLOW = importlib.util.find_spec("PIL") is not None
+
+# where uploaded photos and their resized copies are written
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", os.path.join(os.path.dirname(os.path.dirname(__file__)), "media"))
+# largest upload accepted per file
+IMAGE_MAX_BYTES = int(os.getenv("IMAGE_MAX_BYTES", str(10 * 1024 * 1024)))
+# widths of the webp copies made of every photo, the largest one becomes
+# the house's image_url
+THUMBNAIL_WIDTHS = sorted(int(width) for width in os.getenv("THUMBNAIL_WIDTHS", "320,960").split(","))
+# processes resizing photos, 0 resizes inline in the request thread
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", "2"))
+# stored files never change (their name is their hash) so clients may keep them
+IMAGE_CACHE_MAX_AGE = int(os.getenv("IMAGE_CACHE_MAX_AGE", str(365 * 24 * 3600)))
+
+# leading bytes of the formats accepted, the upload's own content type is not trusted
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "jpg", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "png", "image/png"),
+    (b"GIF87a", "gif", "image/gif"),
+    (b"GIF89a", "gif", "image/gif"),
+)
+MEDIA_TYPES = {"jpg": "image/jpeg", "png": "image/png", "gif": "image/gif", "webp": "image/webp"}
+
+
+def sniff_image(data: bytes):
+    # (extension, content type) of an image, or None
+    for signature, extension, content_type in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return extension, content_type
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp", "image/webp"
+    return None
+
+
+def original_name(sha256, extension):
+    return f"{sha256}.{extension}"
+
+
+def variant_name(sha256, width):
+    return f"{sha256}-{width}.webp"
+
+
+def media_path(name):
+    # files are spread over subdirectories by the first hash characters
+    return os.path.join(MEDIA_ROOT, name[:2], name)
+
+
+def media_url(name):
+    return f"/api/media/{name}"
+
+
+def write_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".part")
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def store_original(data: bytes, extension: str) -> str:
+    # Content addressed: the same photo uploaded twice is written once
+    sha256 = hashlib.sha256(data).hexdigest()
+    path = media_path(original_name(sha256, extension))
+    if not os.path.exists(path):
+        write_atomic(path, data)
+    return sha256
+
+
+def make_variants(sha256, extension, widths):
+    # Runs in a worker process: webp copies of the original, never wider
+    # than the original itself. Returns the widths written.
+    from PIL import Image, ImageOps
+
+    source = media_path(original_name(sha256, extension))
+    made = []
+    with Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+        for width in widths:
+            path = media_path(variant_name(sha256, width))
+            if not os.path.exists(path):
+                copy = image.copy()
+                copy.thumbnail((width, width * 4))
+                # a unique temp file per writer, the same photo may be
+                # processed by two workers at once
+                encoded = io.BytesIO()
+                copy.save(encoded, "WEBP", quality=80, method=4)
+                write_atomic(path, encoded.getvalue())
+            made.append(width)
+            if width >= image.width:
+                break
+    return made
+
+
+def remove_files(sha256, extension):
+    # only called once no HouseImage row points at the hash any more, see
+    # release_files
+    names = [original_name(sha256, extension)] + [variant_name(sha256, width) for width in THUMBNAIL_WIDTHS]
+    for name in names:
+        try:
+            os.remove(media_path(name))
+        except FileNotFoundError:
+            pass
+
+
+def release_files(db, photos):
+    # After deleted images committed: remove the files of each (sha256,
+    # extension) no row points at any more. An upload of the same photo
+    # racing with this writes the file again after its own commit.
+    for sha256, extension in set(photos):
+        if db.scalar(select(HouseImage.id).where(HouseImage.sha256 == sha256).limit(1)) is None:
+            remove_files(sha256, extension)
+
+
+class ImageProcessor:
+    # Resizes uploaded photos on a process pool so the CPU heavy work runs
+    # neither on the event loop nor under the GIL of the web worker.
+
+    def __init__(self, workers=IMAGE_WORKERS, session_factory=SessionLocal):
+        self.workers = workers
+        self.session_factory = session_factory
+        self.executor = None
+
+    def start(self):
+        if self.executor is None and self.workers > 0 and HAS_PILLOW:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    def stop(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True, cancel_futures=True)
+            self.executor = None
+
+    def submit(self, image_id, sha256, extension):
+        if not HAS_PILLOW:
+            self.finish(image_id, None)
+        elif self.executor is None:
+            self.finish(image_id, self.run(sha256, extension))
+        else:
+            future = self.executor.submit(make_variants, sha256, extension, THUMBNAIL_WIDTHS)
+            future.add_done_callback(lambda future: self.finish(image_id, self.result(future)))
+
+    def run(self, sha256, extension):
+        try:
+            return make_variants(sha256, extension, THUMBNAIL_WIDTHS)
+        except Exception as e:
+            logger.exception("Resizing image %s failed: %s", sha256, e)
+            return None
+
+    def result(self, future):
+        try:
+            return future.result()
+        except Exception as e:
+            logger.exception("Resizing image failed: %s", e)
+            return None
+
+    def finish(self, image_id, widths):
+        # record the copies made and point the house at the largest one when
+        # it still shows this photo's original
+        from Endpoints.house_entry import invalidate_houses
+
+        db = self.session_factory()
+        try:
+            image = db.get(HouseImage, image_id)
+            if image is None:
+                return
+            if not widths:
+                image.status = "original_only"
+            else:
+                image.status = "ready"
+                image.variants = ",".join(map(str, widths))
+                house = db.get(House, image.house_id)
+                if house is not None and house.image_url == media_url(original_name(image.sha256, image.extension)):
+                    house.image_url = media_url(variant_name(image.sha256, widths[-1]))
+            db.commit()
+            invalidate_houses()
+        finally:
+            db.close()
+
+
+image_processor = ImageProcessor()
@@ -0,0 +1,188 @@
+import logging
+import smtplib
+import threading
+import time
+from datetime import datetime, timedelta
+import os
+from sqlalchemy import select, update
+from db.database import SessionLocal
+from models.userModels import EmailOutbox
+from functions import send_mail
+from functions.metrics import email_send_duration
+
+logger = logging.getLogger(__name__)
+
+MAIL_WORKERS = int(os.getenv("MAIL_WORKERS", "2"))
+MAIL_BATCH_SIZE = int(os.getenv("MAIL_BATCH_SIZE", "50"))
+MAIL_POLL_INTERVAL = float(os.getenv("MAIL_POLL_INTERVAL", "5"))
+MAIL_MAX_ATTEMPTS = int(os.getenv("MAIL_MAX_ATTEMPTS", "5"))
+MAIL_RETRY_BASE_SECONDS = float(os.getenv("MAIL_RETRY_BASE_SECONDS", "30"))
+# how long a claimed message stays reserved before another worker may retry it
+MAIL_LEASE_SECONDS = float(os.getenv("MAIL_LEASE_SECONDS", "300"))
+
+
+class SMTPConnection:
+    # One authenticated smtp session kept open across messages and batches.
+    # It reconnects on demand when the server has dropped it.
+
+    def __init__(self, host=None, port=None, starttls=None, username=None, password=None):
+        self.host = host or send_mail.SMTP_HOST
+        self.port = port or send_mail.SMTP_PORT
+        self.starttls = send_mail.SMTP_STARTTLS if starttls is None else starttls
+        self.username = send_mail.NOVA_USERNAME if username is None else username
+        self.password = send_mail.NOVA_PASSWORD if password is None else password
+        self.server = None
+
+    def connect(self):
+        server = smtplib.SMTP(self.host, self.port, timeout=30)
+        if self.starttls:
+            server.starttls()
+        if self.username:
+            server.login(self.username, self.password)
+        self.server = server
+
+    def send(self, recipient, msg):
+        if self.server is None:
+            self.connect()
+        try:
+            self.server.sendmail(send_mail.NOVA_SENDER_EMAIL, recipient, msg.as_string())
+        except smtplib.SMTPServerDisconnected:
+            # idle connections get dropped by the server, retry once on a fresh one
+            self.connect()
+            self.server.sendmail(send_mail.NOVA_SENDER_EMAIL, recipient, msg.as_string())
+
+    def close(self):
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except smtplib.SMTPException:
+                pass
+            except OSError:
+                pass
+            self.server = None
+
+
+def retry_delay(attempts):
+    # exponential backoff: base, 2x base, 4x base, ...
+    return timedelta(seconds=MAIL_RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+
+
+def claim_batch(db, batch_size=MAIL_BATCH_SIZE):
+    # Reserve due messages for this worker in one UPDATE. The statement
+    # checks again that each row is still due, so of two workers racing for
+    # the same rows only one gets them, also on SQLite where FOR UPDATE SKIP
+    # LOCKED does nothing. On PostgreSQL SKIP LOCKED lets several workers
+    # claim disjoint batches at the same time.
+    now = datetime.utcnow()
+    due = (EmailOutbox.status.in_(("pending", "sending")), EmailOutbox.next_attempt_at <= now)
+    candidates = (
+        select(EmailOutbox.id)
+        .where(*due)
+        .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    claimed = db.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_(candidates), *due)
+        .values(
+            status="sending",
+            attempts=EmailOutbox.attempts + 1,
+            next_attempt_at=now + timedelta(seconds=MAIL_LEASE_SECONDS),
+        )
+        .returning(EmailOutbox.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    db.commit()
+    if not claimed:
+        return []
+    return db.query(EmailOutbox).filter(EmailOutbox.id.in_(claimed)).order_by(EmailOutbox.id).all()
+
+
+def deliver_batch(db, connection, batch):
+    for outbox in batch:
+        started = time.perf_counter()
+        try:
+            msg = send_mail.build_message(outbox.recipient, outbox.subject, outbox.body)
+            connection.send(outbox.recipient, msg)
+        except Exception as e:
+            email_send_duration.observe(time.perf_counter() - started, "failed")
+            logger.warning("Sending email %s to %s failed: %s", outbox.id, outbox.recipient, e)
+            connection.close()
+            outbox.last_error = str(e)
+            if outbox.attempts >= MAIL_MAX_ATTEMPTS:
+                outbox.status = "failed"
+            else:
+                outbox.status = "pending"
+                outbox.next_attempt_at = datetime.utcnow() + retry_delay(outbox.attempts)
+        else:
+            email_send_duration.observe(time.perf_counter() - started, "sent")
+            outbox.status = "sent"
+            outbox.sent_at = datetime.utcnow()
+            outbox.last_error = None
+        # record every message as it goes so a crash never resends a batch
+        db.commit()
+
+
+def process_outbox(connection, session_factory=SessionLocal, batch_size=MAIL_BATCH_SIZE):
+    # Claim and deliver one batch, returns how many messages were handled.
+    db = session_factory()
+    try:
+        batch = claim_batch(db, batch_size)
+        if batch:
+            deliver_batch(db, connection, batch)
+        return len(batch)
+    finally:
+        db.close()
+
+
+class MailWorkerPool:
+    # Background threads draining the email outbox, each with its own
+    # persistent smtp connection.
+
+    def __init__(self, workers=MAIL_WORKERS, session_factory=SessionLocal, connection_factory=SMTPConnection):
+        self.workers = workers
+        self.session_factory = session_factory
+        self.connection_factory = connection_factory
+        self.threads = []
+        self.wakeup = threading.Event()
+        self.stopping = threading.Event()
+
+    def start(self):
+        if self.threads or self.workers <= 0:
+            return
+        self.stopping.clear()
+        for i in range(self.workers):
+            thread = threading.Thread(target=self.run, name=f"mail-worker-{i}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self, timeout=10):
+        self.stopping.set()
+        self.wakeup.set()
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+
+    def wake(self):
+        self.wakeup.set()
+
+    def run(self):
+        connection = self.connection_factory()
+        try:
+            while not self.stopping.is_set():
+                try:
+                    handled = process_outbox(connection, self.session_factory)
+                except Exception as e:
+                    logger.exception("Mail worker failed to process the outbox: %s", e)
+                    handled = 0
+                if handled:
+                    # keep draining while there is work
+                    continue
+                self.wakeup.wait(MAIL_POLL_INTERVAL)
+                self.wakeup.clear()
+        finally:
+            connection.close()
+
+
+mail_workers = MailWorkerPool()
@@ -0,0 +1,85 @@
+import logging
+import os
+from datetime import datetime
+from sqlalchemy import insert, select
+from db.database import SessionLocal
+from models.userModels import Users, House, Booking, EmailOutbox, NotificationJob
+from emailsTemps.registry import email_templates
+
+logger = logging.getLogger(__name__)
+
+# recipients read, rendered and written to the outbox per transaction
+NOTIFICATION_CHUNK_SIZE = int(os.getenv("NOTIFICATION_CHUNK_SIZE", "500"))
+
+
+def audience_filter(job):
+    # the users a job is addressed to, as a where clause on Users
+    if job.audience == "pending_renters":
+        renters = (
+            select(Booking.user_id)
+            .join(House, House.id == Booking.house_id)
+            .where(House.owner_id == job.created_by, Booking.status == "pending")
+        )
+        return Users.id.in_(renters)
+    if job.audience == "location":
+        return Users.location == job.location
+    raise ValueError(f"Unknown audience {job.audience}")
+
+
+def recipient_chunks(db, job, chunk_size=NOTIFICATION_CHUNK_SIZE):
+    # Keyset pages over users.id: only one chunk of recipients is in memory
+    # and no cursor stays open while the chunk is written back
+    where = audience_filter(job)
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(Users.id, Users.email, Users.full_name)
+            .where(where, Users.id > last_id, Users.email.is_not(None), Users.email != "")
+            .order_by(Users.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
+def fan_out(job_id, session_factory=SessionLocal, chunk_size=NOTIFICATION_CHUNK_SIZE):
+    # Renders the job's message for every recipient and bulk inserts it into
+    # the outbox a chunk at a time; the mail workers deliver it from there.
+    from functions.mail_worker import mail_workers
+
+    db = session_factory()
+    try:
+        job = db.get(NotificationJob, job_id)
+        if job is None or job.status != "queued":
+            return
+        job.status = "running"
+        db.commit()
+
+        try:
+            for rows in recipient_chunks(db, job, chunk_size):
+                bodies = email_templates.render_many(
+                    "notification.html",
+                    [{"names": row.full_name} for row in rows],
+                    heading=job.subject,
+                    message=job.message,
+                )
+                db.execute(insert(EmailOutbox), [
+                    {"recipient": row.email, "subject": job.subject, "body": body, "job_id": job.id}
+                    for row, body in zip(rows, bodies)
+                ])
+                job.queued += len(rows)
+                db.commit()
+                mail_workers.wake()
+        except Exception as e:
+            logger.exception("Notification job %s failed: %s", job_id, e)
+            db.rollback()
+            job.status = "failed"
+            job.error = str(e)
+        else:
+            job.status = "completed"
+        job.finished_at = datetime.utcnow()
+        db.commit()
+    finally:
+        db.close()
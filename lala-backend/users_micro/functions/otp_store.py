@@ -0,0 +1,182 @@
+import logging
+import os
+import threading
+from datetime import datetime, timedelta
+from fastapi import HTTPException
+from sqlalchemy import and_, delete, or_, select, update
+from db.database import SessionLocal
+from models.userModels import OTP
+from functions.cache import TTLCache
+from functions.rate_limit import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+# "database" keeps codes in sent_otps and works across workers, "memory"
+# keeps them in this process only (single worker deployments, development)
+OTP_BACKEND = os.getenv("OTP_BACKEND", "database")
+# how long a code stays valid
+OTP_TTL_SECONDS = int(os.getenv("OTP_TTL_SECONDS", "600"))
+# wrong guesses allowed before the code is thrown away
+OTP_MAX_ATTEMPTS = int(os.getenv("OTP_MAX_ATTEMPTS", "5"))
+# codes one account, or one client address, may request per window
+OTP_SEND_WINDOW_SECONDS = float(os.getenv("OTP_SEND_WINDOW_SECONDS", "600"))
+OTP_SEND_LIMIT_PER_ACCOUNT = int(os.getenv("OTP_SEND_LIMIT_PER_ACCOUNT", "3"))
+OTP_SEND_LIMIT_PER_IP = int(os.getenv("OTP_SEND_LIMIT_PER_IP", "20"))
+# expired rows are deleted every OTP_PURGE_SECONDS, OTP_PURGE_BATCH at a time
+OTP_PURGE_SECONDS = float(os.getenv("OTP_PURGE_SECONDS", "60"))
+OTP_PURGE_BATCH = int(os.getenv("OTP_PURGE_BATCH", "1000"))
+
+account_send_limit = RateLimiter(OTP_SEND_LIMIT_PER_ACCOUNT, OTP_SEND_WINDOW_SECONDS)
+ip_send_limit = RateLimiter(OTP_SEND_LIMIT_PER_IP, OTP_SEND_WINDOW_SECONDS)
+
+
+def check_codes(entry, otp_code, verification_code):
+    # raises for an expired code and counts a failed attempt on the entry;
+    # returns True once it is used up
+    if entry["expires_at"] <= datetime.utcnow():
+        raise HTTPException(status_code=404, detail="OTP Expired")
+    if entry["otp_code"] == str(otp_code) and entry["verification_code"] == str(verification_code):
+        return True
+    entry["attempts"] += 1
+    return False
+
+
+def reject_attempt(entry):
+    if entry["attempts"] >= OTP_MAX_ATTEMPTS:
+        raise HTTPException(status_code=429, detail="Too many wrong attempts, request a new OTP")
+    raise HTTPException(status_code=404, detail="OTP Not found")
+
+
+class MemoryOTPStore:
+    # One live code per account in a TTL dict, expired codes simply fall out.
+
+    def __init__(self, ttl=OTP_TTL_SECONDS):
+        self.ttl = ttl
+        self.codes = TTLCache(maxsize=100000, ttl=ttl)
+
+    async def issue(self, db, account_id, otp_code, verification_code, purpose):
+        self.codes.set(account_id, {
+            "otp_code": str(otp_code),
+            "verification_code": str(verification_code),
+            "purpose": purpose,
+            "attempts": 0,
+            "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl),
+        })
+
+    async def verify(self, db, account_id, otp_code, verification_code):
+        entry = self.codes.get(account_id)
+        if entry is None:
+            raise HTTPException(status_code=404, detail="OTP Not found")
+        if check_codes(entry, otp_code, verification_code):
+            self.codes.delete(account_id)
+            return entry["purpose"]
+        if entry["attempts"] >= OTP_MAX_ATTEMPTS:
+            self.codes.delete(account_id)
+        reject_attempt(entry)
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class DatabaseOTPStore:
+    # Codes live in sent_otps. Issuing only stages changes on the caller's
+    # session, so the new code and its email commit in one transaction.
+
+    def __init__(self, ttl=OTP_TTL_SECONDS, session_factory=SessionLocal):
+        self.ttl = ttl
+        self.session_factory = session_factory
+        self.thread = None
+        self.stopping = threading.Event()
+
+    async def issue(self, db, account_id, otp_code, verification_code, purpose):
+        # only the newest code of an account is valid
+        await db.execute(delete(OTP).where(OTP.account_id == account_id))
+        db.add(OTP(
+            account_id=account_id,
+            otp_code=str(otp_code),
+            verification_code=str(verification_code),
+            purpose=purpose,
+            expires_at=datetime.utcnow() + timedelta(seconds=self.ttl),
+        ))
+
+    async def verify(self, db, account_id, otp_code, verification_code):
+        otp = await db.scalar(select(OTP).where(OTP.account_id == account_id).order_by(OTP.id.desc()).limit(1))
+        if otp is None:
+            raise HTTPException(status_code=404, detail="OTP Not found")
+        # rows written before expires_at existed expire from their send date
+        if (otp.expires_at or otp.date + timedelta(seconds=self.ttl)) <= datetime.utcnow():
+            await db.delete(otp)
+            await db.commit()
+            raise HTTPException(status_code=404, detail="OTP Expired")
+
+        # The attempt is counted in the database before the codes are
+        # compared. Concurrent guesses queue on the row instead of all reading
+        # the same count, so at most OTP_MAX_ATTEMPTS codes are ever tried.
+        attempts = await db.scalar(
+            update(OTP)
+            .where(OTP.id == otp.id, OTP.attempts < OTP_MAX_ATTEMPTS)
+            .values(attempts=OTP.attempts + 1)
+            .returning(OTP.attempts)
+        )
+        if attempts is None:
+            # used up or consumed by a concurrent request
+            await db.execute(delete(OTP).where(OTP.id == otp.id))
+            await db.commit()
+            raise HTTPException(status_code=404, detail="OTP Not found")
+        if otp.otp_code == str(otp_code) and otp.verification_code == str(verification_code):
+            # consumed, the caller commits it together with its own changes
+            await db.delete(otp)
+            return otp.purpose
+        if attempts >= OTP_MAX_ATTEMPTS:
+            await db.delete(otp)
+        await db.commit()
+        reject_attempt({"attempts": attempts})
+
+    def purge(self, batch=OTP_PURGE_BATCH):
+        # delete expired codes a batch at a time so no single statement holds
+        # locks on a large part of the table; returns the rows deleted
+        db = self.session_factory()
+        deleted = 0
+        try:
+            while True:
+                now = datetime.utcnow()
+                # rows written before expires_at existed expire from their send date
+                expired = select(OTP.id).where(or_(
+                    OTP.expires_at < now,
+                    and_(OTP.expires_at.is_(None), OTP.date < now - timedelta(seconds=self.ttl)),
+                )).limit(batch)
+                count = db.execute(delete(OTP).where(OTP.id.in_(expired))).rowcount
+                db.commit()
+                deleted += count
+                if count < batch:
+                    return deleted
+        finally:
+            db.close()
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self.run, name="otp-purge", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=5):
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+
+    def run(self):
+        while not self.stopping.is_set():
+            try:
+                self.purge()
+            except Exception as e:
+                logger.exception("Purging expired OTPs failed: %s", e)
+            self.stopping.wait(OTP_PURGE_SECONDS)
+
+
+OTP_STORES = {"database": DatabaseOTPStore, "memory": MemoryOTPStore}
+otp_store = OTP_STORES[OTP_BACKEND]()
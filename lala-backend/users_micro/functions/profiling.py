@@ -0,0 +1,228 @@
+import json
+import logging
+import os
+import threading
+from contextvars import ContextVar
+from functions.metrics import route_name
+
+logger = logging.getLogger(__name__)
+
+# record every statement per endpoint and answer X-Profile: 1 with the
+# request's SQL breakdown; parameters end up in logs and responses, so only
+# turn it on while investigating
+SQL_PROFILE = os.getenv("SQL_PROFILE", "false").lower() == "true"
+# statements slower than this are logged with their endpoint, 0 turns it off
+SQL_SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_QUERY_MS", "500"))
+# also log the query plan of slow SELECT statements
+SQL_EXPLAIN = os.getenv("SQL_EXPLAIN", "false").lower() == "true"
+# log the parameters of slow statements; they hold emails, phones and
+# password hashes, so only while investigating
+SQL_LOG_PARAMETERS = os.getenv("SQL_LOG_PARAMETERS", "false").lower() == "true"
+# distinct (endpoint, statement) pairs kept in the profile of a worker
+SQL_PROFILE_MAX_STATEMENTS = int(os.getenv("SQL_PROFILE_MAX_STATEMENTS", "1000"))
+
+PROFILE_HEADER = b"x-profile"
+# statements listed in the X-SQL-Profile response header, slowest first
+HEADER_STATEMENTS = 10
+
+
+def short(text, limit):
+    text = " ".join(str(text).split())
+    return text if len(text) <= limit else text[: limit - 3] + "..."
+
+
+def explain(conn, statement, parameters):
+    # query plan on a separate DBAPI cursor of the same connection, so the
+    # engine events don't fire again
+    prefix = "EXPLAIN QUERY PLAN " if conn.dialect.name == "sqlite" else "EXPLAIN "
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        return "\n".join(" ".join(map(str, row)) for row in cursor.fetchall())
+    finally:
+        cursor.close()
+
+
+class StatementStats:
+    __slots__ = ("route", "statement", "count", "seconds", "max_seconds", "last_parameters")
+
+    def __init__(self, route, statement):
+        self.route = route
+        self.statement = statement
+        self.count = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.last_parameters = None
+
+    def add(self, seconds, parameters):
+        self.count += 1
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.last_parameters = parameters
+
+    def as_dict(self):
+        return {
+            "route": self.route,
+            "statement": self.statement,
+            "count": self.count,
+            "total_ms": round(self.seconds * 1000, 3),
+            "max_ms": round(self.max_seconds * 1000, 3),
+            "last_parameters": short(repr(self.last_parameters), 500) if self.last_parameters is not None else None,
+        }
+
+
+class RequestProfile:
+    # statements of one request that asked for X-Profile: 1
+    def __init__(self):
+        self.statements = {}
+        self.queries = 0
+        self.seconds = 0.0
+
+    def add(self, statement, seconds):
+        stats = self.statements.get(statement)
+        if stats is None:
+            stats = self.statements[statement] = StatementStats(None, statement)
+        stats.add(seconds, None)
+        self.queries += 1
+        self.seconds += seconds
+
+    def header(self):
+        statements = sorted(self.statements.values(), key=lambda stats: stats.seconds, reverse=True)
+        return json.dumps({
+            "queries": self.queries,
+            "total_ms": round(self.seconds * 1000, 3),
+            "statements": [
+                {
+                    "sql": short(stats.statement, 200),
+                    "count": stats.count,
+                    "total_ms": round(stats.seconds * 1000, 3),
+                    "max_ms": round(stats.max_seconds * 1000, 3),
+                }
+                for stats in statements[:HEADER_STATEMENTS]
+            ],
+        }, separators=(",", ":"))
+
+
+current_scope: ContextVar = ContextVar("current_scope", default=None)
+current_profile: ContextVar = ContextVar("current_profile", default=None)
+
+
+class SQLProfiler:
+    # Slow query log plus, when enabled, totals per (endpoint, statement)
+    # for the whole worker, see GET /debug/sql-profile
+
+    def __init__(self, enabled=SQL_PROFILE, slow_ms=SQL_SLOW_QUERY_MS, explain=SQL_EXPLAIN,
+                 max_statements=SQL_PROFILE_MAX_STATEMENTS, log_parameters=SQL_LOG_PARAMETERS):
+        self.enabled = enabled
+        self.slow_ms = slow_ms
+        self.explain = explain
+        self.log_parameters = log_parameters
+        self.max_statements = max_statements
+        self.statements = {}  # (route, statement) -> StatementStats
+        self.dropped = 0
+        self.lock = threading.Lock()
+
+    def record(self, conn, statement, parameters, seconds, executemany):
+        # fed by the statement timing of metrics.instrument_engine
+        if not (self.enabled or self.slow_ms):
+            return
+        scope = current_scope.get()
+        route = route_name(scope) if scope is not None else "background"
+        if self.enabled:
+            self.add(route, statement, parameters, seconds)
+            profile = current_profile.get()
+            if profile is not None:
+                profile.add(statement, seconds)
+        if self.slow_ms and seconds * 1000 >= self.slow_ms:
+            self.log_slow(conn, route, statement, parameters, seconds, executemany)
+
+    def add(self, route, statement, parameters, seconds):
+        key = (route, statement)
+        with self.lock:
+            stats = self.statements.get(key)
+            if stats is None:
+                if len(self.statements) >= self.max_statements:
+                    self.dropped += 1
+                    return
+                stats = self.statements[key] = StatementStats(route, statement)
+            stats.add(seconds, parameters)
+
+    def log_slow(self, conn, route, statement, parameters, seconds, executemany):
+        plan = None
+        if self.explain and not executemany and statement.lstrip()[:6].upper() == "SELECT":
+            try:
+                plan = explain(conn, statement, parameters)
+            except Exception as e:
+                plan = f"EXPLAIN failed: {e}"
+        logger.warning(
+            "Slow query (%.1f ms) on %s: %s%s%s",
+            seconds * 1000, route, short(statement, 1000),
+            f" parameters={short(repr(parameters), 500)}" if self.log_parameters else "",
+            f"\n{plan}" if plan else "",
+        )
+
+    def report(self, limit=50):
+        with self.lock:
+            statements = sorted(self.statements.values(), key=lambda stats: stats.seconds, reverse=True)
+            return {
+                "enabled": self.enabled,
+                "dropped": self.dropped,
+                "statements": [stats.as_dict() for stats in statements[:limit]],
+            }
+
+    def clear(self):
+        with self.lock:
+            self.statements.clear()
+            self.dropped = 0
+
+
+sql_profiler = SQLProfiler()
+
+
+async def is_admin(scope):
+    # the X-SQL-Profile header carries SQL text, so only admins get it
+    from fastapi import HTTPException
+    from Endpoints.auth import get_current_user
+
+    scheme, _, token = dict(scope["headers"]).get(b"authorization", b"").decode("latin-1").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        user = await get_current_user(token)
+    except HTTPException:
+        return False
+    return user["role"] == "admin"
+
+
+class ProfilingMiddleware:
+    # Tells the engine listeners which endpoint runs a statement and, in
+    # profiling mode, answers an admin's X-Profile: 1 with Server-Timing and
+    # X-SQL-Profile headers covering the SQL run before the response started
+
+    def __init__(self, app, profiler=sql_profiler):
+        self.app = app
+        self.profiler = profiler
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        scope_token = current_scope.set(scope)
+        profile = None
+        if self.profiler.enabled and dict(scope["headers"]).get(PROFILE_HEADER) == b"1" and await is_admin(scope):
+            profile = RequestProfile()
+        profile_token = current_profile.set(profile)
+
+        async def send_wrapper(message):
+            if profile is not None and message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"server-timing", f'db;dur={profile.seconds * 1000:.3f};desc="{profile.queries} queries"'.encode()),
+                    (b"x-sql-profile", profile.header().encode()),
+                ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_profile.reset(profile_token)
+            current_scope.reset(scope_token)
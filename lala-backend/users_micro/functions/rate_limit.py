@@ -0,0 +1,45 @@
+import threading
+import time
+from collections import deque
+from fastapi import HTTPException
+
+
+class RateLimiter:
+    # Sliding window limiter kept in process memory: at most `limit` hits per
+    # key within `window` seconds. Every worker process counts on its own.
+
+    def __init__(self, limit: int, window: float):
+        self.limit = limit
+        self.window = window
+        self.hits = {}  # key -> deque of hit times
+        self.lock = threading.Lock()
+
+    def retry_after(self, key) -> float:
+        # records a hit and returns 0, or returns the seconds until the key
+        # may try again without recording anything
+        now = time.monotonic()
+        with self.lock:
+            hits = self.hits.get(key)
+            if hits is None:
+                hits = self.hits[key] = deque()
+            while hits and hits[0] <= now - self.window:
+                hits.popleft()
+            if self.limit > 0 and len(hits) >= self.limit:
+                return hits[0] + self.window - now
+            hits.append(now)
+            if len(self.hits) > 10000:
+                self.prune(now)
+            return 0
+
+    def check(self, key, detail="Too many requests, please retry later"):
+        wait = self.retry_after(key)
+        if wait:
+            raise HTTPException(status_code=429, detail=detail, headers={"Retry-After": str(max(1, int(wait + 0.999)))})
+
+    def prune(self, now):
+        # forget keys with no hit left in the window
+        self.hits = {key: hits for key, hits in self.hits.items() if hits and hits[-1] > now - self.window}
+
+    def clear(self):
+        with self.lock:
+            self.hits.clear()
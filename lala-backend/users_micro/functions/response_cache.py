@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import threading
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+try:
+    import redis  # optional shared backend, see RESPONSE_CACHE_BACKEND
+except ImportError:
+    redis = None
+from functions.cache import TTLCache
+
+# "memory" caches in each worker process, "redis" shares one cache (and its
+# invalidations) between all workers through REDIS_URL
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# every key this cache writes to redis starts with it, so clearing the cache
+# leaves the rest of a shared database alone
+RESPONSE_CACHE_PREFIX = os.getenv("RESPONSE_CACHE_PREFIX", "lala:response:")
+# seconds a cached response is served; also bounds how stale another
+# worker's memory cache can be after a write
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "30"))
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2000"))
+
+
+class MemoryBackend:
+    def __init__(self, maxsize=RESPONSE_CACHE_SIZE, ttl=RESPONSE_CACHE_TTL):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def set(self, key, value, ttl):
+        self.entries.set(key, value, ttl)
+
+    def delete(self, *keys):
+        for key in keys:
+            self.entries.delete(key)
+
+    def counter(self, key):
+        return self.counters.get(key, 0)
+
+    def incr(self, key):
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + 1
+            return self.counters[key]
+
+    def clear(self):
+        self.entries.clear()
+
+
+class RedisBackend:
+    # Works with any client speaking the redis-py API (get/set/delete/incr/
+    # scan_iter), so a local stand-in can replace a real server.
+
+    def __init__(self, client=None, url=REDIS_URL, prefix=RESPONSE_CACHE_PREFIX):
+        if client is None:
+            if redis is None:
+                raise RuntimeError("RESPONSE_CACHE_BACKEND=redis needs the redis package")
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, key):
+        return self.client.get(self.prefix + key)
+
+    def set(self, key, value, ttl):
+        self.client.set(self.prefix + key, value, ex=ttl)
+
+    def delete(self, *keys):
+        self.client.delete(*(self.prefix + key for key in keys))
+
+    def counter(self, key):
+        return int(self.client.get(self.prefix + key) or 0)
+
+    def incr(self, key):
+        return self.client.incr(self.prefix + key)
+
+    def clear(self, batch=500):
+        # only this cache's keys, never FLUSHDB on a shared server
+        keys = []
+        for key in self.client.scan_iter(match=self.prefix + "*", count=batch):
+            keys.append(key)
+            if len(keys) >= batch:
+                self.client.delete(*keys)
+                keys.clear()
+        if keys:
+            self.client.delete(*keys)
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+_adapters = {}
+
+
+def to_json(value, model=None) -> bytes:
+    # with a response model the value is dumped by pydantic-core straight to
+    # JSON bytes, without the jsonable_encoder walk over every attribute
+    if model is None:
+        return json.dumps(jsonable_encoder(value), separators=(",", ":")).encode()
+    adapter = _adapters.get(model)
+    if adapter is None:
+        adapter = _adapters[model] = TypeAdapter(model)
+    return adapter.dump_json(adapter.validate_python(value, from_attributes=True), by_alias=True)
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+class ResponseCache:
+    # Caches serialized JSON responses with their ETag. Each namespace has a
+    # generation number that is part of its keys; invalidating a namespace
+    # bumps it, which orphans every page cached under the old number at once
+    # (they then age out of the backend).
+
+    def __init__(self, backend, ttl=RESPONSE_CACHE_TTL):
+        self.backend = backend
+        self.ttl = ttl
+
+    def key(self, namespace, *parts):
+        generation = self.backend.counter(f"{namespace}:generation")
+        return ":".join([namespace, str(generation), *map(str, parts)])
+
+    def respond(self, request: Request, key, build, model=None):
+        # serve key from the cache or store what build() returns, serialized
+        # as `model`; answers 304 without a body when the client already
+        # holds this version
+        cached = self.backend.get(key)
+        if cached is None:
+            body = to_json(build(), model)
+            etag = make_etag(body)
+            self.backend.set(key, etag.encode() + b"\n" + body, self.ttl)
+        else:
+            etag, body = cached.split(b"\n", 1)
+            etag = etag.decode()
+
+        headers = {"ETag": etag, "Cache-Control": f"public, max-age={self.ttl}"}
+        if etag_matches(request, etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    def invalidate(self, namespace, *keys):
+        self.backend.incr(f"{namespace}:generation")
+        if keys:
+            self.backend.delete(*keys)
+
+    def clear(self):
+        self.backend.clear()
+
+
+CACHE_BACKENDS = {"memory": MemoryBackend, "redis": RedisBackend}
+response_cache = ResponseCache(CACHE_BACKENDS[RESPONSE_CACHE_BACKEND]())
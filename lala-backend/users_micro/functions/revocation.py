@@ -0,0 +1,82 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+import os
+from db.database import SessionLocal
+from models.userModels import RevokedToken, RefreshToken
+
+logger = logging.getLogger(__name__)
+
+# how often every worker pulls tokens revoked by the other workers
+REVOCATION_SYNC_SECONDS = float(os.getenv("REVOCATION_SYNC_SECONDS", "15"))
+
+
+class RevocationList:
+    # In-memory copy of the revoked_tokens table so the auth dependency can
+    # check a token with a set lookup instead of a database round trip.
+    # Entries are dropped once the token would have expired anyway.
+
+    def __init__(self, session_factory=SessionLocal):
+        self.session_factory = session_factory
+        self.jtis = {}  # jti -> expires_at
+        self.lock = threading.Lock()
+        self.synced_until = None
+        self.thread = None
+        self.stopping = threading.Event()
+
+    def __contains__(self, jti):
+        return jti in self.jtis
+
+    def add(self, jti, expires_at):
+        with self.lock:
+            self.jtis[jti] = expires_at
+
+    def sync(self):
+        # pull the rows revoked since the last sync and forget expired ones
+        db = self.session_factory()
+        try:
+            query = db.query(RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at)
+            if self.synced_until is not None:
+                # overlap a little so rows committed late by another worker
+                # (or stamped by a clock running behind) are not missed
+                query = query.filter(RevokedToken.revoked_at >= self.synced_until - timedelta(seconds=60))
+            rows = query.all()
+
+            now = datetime.utcnow()
+            # tables only ever need to hold tokens that are still valid
+            db.query(RevokedToken).filter(RevokedToken.expires_at < now).delete(synchronize_session=False)
+            db.query(RefreshToken).filter(RefreshToken.expires_at < now).delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+        with self.lock:
+            for jti, expires_at, revoked_at in rows:
+                self.jtis[jti] = expires_at
+                if self.synced_until is None or revoked_at > self.synced_until:
+                    self.synced_until = revoked_at
+            self.jtis = {jti: expires_at for jti, expires_at in self.jtis.items() if expires_at >= now}
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.stopping.clear()
+        self.thread = threading.Thread(target=self.run, name="revocation-sync", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=5):
+        self.stopping.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+
+    def run(self):
+        while not self.stopping.is_set():
+            try:
+                self.sync()
+            except Exception as e:
+                logger.exception("Syncing revoked tokens failed: %s", e)
+            self.stopping.wait(REVOCATION_SYNC_SECONDS)
+
+
+revocation_list = RevocationList()
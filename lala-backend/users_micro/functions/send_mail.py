@@ -3,30 +3,65 @@ import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.utils import formataddr
-from dotenv import load_dotenv
+from sqlalchemy import event
+from models.userModels import EmailOutbox
 import os
 
-# Load environment variables from .env file
-load_dotenv()
-
 NOVA_USERNAME = os.getenv("NOVA_USERNAME")
 NOVA_PASSWORD = os.getenv("NOVA_PASSWORD")  # Replace with App Password
 NOVA_SENDER_EMAIL = os.getenv("NOVA_SENDER_EMAIL")
 
-def send_new_email(Email_to, Email_sub, Email_msg):
+# smtp server, gmail by default; point it at a local server for tests
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+
+
+def build_message(Email_to, Email_sub, Email_msg):
     msg = MIMEMultipart("alternative")
     msg['From'] = formataddr(("LALA RENTALS", NOVA_SENDER_EMAIL))
     msg['To'] = Email_to
     msg['Subject'] = Email_sub
-    full_message = Email_msg
-    msg.attach(MIMEText(full_message, 'html', 'utf-8'))  # Specify UTF-8 encoding
+    msg.attach(MIMEText(Email_msg, 'html', 'utf-8'))  # Specify UTF-8 encoding
+    return msg
+
+
+def send_new_email(Email_to, Email_sub, Email_msg):
+    # sends right away on a fresh connection; request handlers should use
+    # queue_email so they never wait on the smtp round trip
+    msg = build_message(Email_to, Email_sub, Email_msg)
 
     try:
-        with smtplib.SMTP('smtp.gmail.com', 587) as server:
-            server.starttls()
-            server.login(NOVA_USERNAME, NOVA_PASSWORD)
+        with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
+            if SMTP_STARTTLS:
+                server.starttls()
+            if NOVA_USERNAME:
+                server.login(NOVA_USERNAME, NOVA_PASSWORD)
             server.sendmail(NOVA_SENDER_EMAIL, Email_to, msg.as_string())
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
     return True
+
+
+def wake_mail_workers(session):
+    from functions.mail_worker import mail_workers
+
+    if session.info.pop("queued_mail", False):
+        mail_workers.wake()
+
+
+def queue_email(db, Email_to, Email_sub, Email_msg):
+    # Store the message in the outbox as part of the caller's transaction.
+    # The caller commits; the mail workers deliver it in the background.
+    outbox = EmailOutbox(recipient=Email_to, subject=Email_sub, body=Email_msg)
+    db.add(outbox)
+
+    # wake the workers as soon as the row is visible instead of waiting for
+    # their next poll; one listener per session, one wakeup per commit
+    session = getattr(db, "sync_session", db)
+    session.info["queued_mail"] = True
+    if not session.info.get("mail_listener"):
+        session.info["mail_listener"] = True
+        event.listen(session, "after_commit", wake_mail_workers)
+    return outbox
@@ -1,13 +1,51 @@
+import config  # loads .env before any module reads its settings
 from enum import Enum
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import exc
 from typing import Optional
-from Endpoints import auth,otp,house_entry,booking_entry
-from fastapi.responses import HTMLResponse
+from Endpoints import auth,otp,house_entry,booking_entry,notification_entry,image_entry,export_entry,debug_entry
+from functions.mail_worker import mail_workers
+from functions.revocation import revocation_list
+from functions.otp_store import otp_store
+from emailsTemps.registry import email_templates
+from functions.image_store import image_processor
+from functions.metrics import MetricsMiddleware, registry
+from functions.profiling import ProfilingMiddleware
+from db.database import get_engine, get_async_engine, pool_status, DB_POOL_TIMEOUT, DB_CREATE_TABLES
+from db.connection import create_tables
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
+from schemas.schemas import DatabaseHealth
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # missing tables are created here instead of when db.connection is imported
+    if DB_CREATE_TABLES:
+        await run_in_threadpool(create_tables)
+    # compile every email template before the first request needs one
+    email_templates.load()
+    # background workers that deliver the queued emails
+    mail_workers.start()
+    # keeps the in-memory list of revoked tokens in step with the database
+    revocation_list.start()
+    # purges expired OTP codes (database backend)
+    otp_store.start()
+    # process pool resizing uploaded house photos
+    image_processor.start()
+    yield
+    image_processor.stop()
+    otp_store.stop()
+    revocation_list.stop()
+    mail_workers.stop()
+
    
 app = FastAPI(
     title="Users LALA Rentals Api Documentation(microService One)",  # Replace with your desired title
     description="LALA Rentals aims to revolutionize House Rentals",
+    lifespan=lifespan,
 )
 
 # Configure CORS 
@@ -19,11 +57,43 @@ app.add_middleware(
     allow_headers=["*"],  # Adjust this to the specific headers you want to allow (e.g., ["Content-Type", "Authorization"])
 )
 
+# endpoint of every SQL statement for the slow query log, and the
+# X-Profile: 1 breakdown while SQL_PROFILE is on
+app.add_middleware(ProfilingMiddleware)
+# latency, in-flight requests and SQL work per route, exposed on /metrics
+app.add_middleware(MetricsMiddleware)
+
+# An exhausted connection pool answers 503 after DB_POOL_TIMEOUT instead of
+# letting requests queue up behind it
+@app.exception_handler(exc.TimeoutError)
+async def pool_timeout_handler(request: Request, error: exc.TimeoutError):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Service is busy, please retry shortly"},
+        headers={"Retry-After": str(max(1, int(DB_POOL_TIMEOUT)))},
+    )
+
+
+@app.get("/health/db", tags=["Health"], response_model=DatabaseHealth)
+def database_pool_health():
+    return {"sync": pool_status(get_engine()), "async": pool_status(get_async_engine().sync_engine)}
+
+
+@app.get("/metrics", tags=["Health"], response_class=PlainTextResponse)
+def metrics():
+    # Prometheus text format, per worker process
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
 # Include the routers from auth, apis, and otp
 app.include_router(otp.router)
 app.include_router(auth.router)
 app.include_router(house_entry.router)
 app.include_router(booking_entry.router)
+app.include_router(notification_entry.router)
+app.include_router(image_entry.router)
+app.include_router(export_entry.router)
+app.include_router(debug_entry.router)
 # Define your routes and include dependencies
 @app.get("/", response_class=HTMLResponse)
 async def read_root():
@@ -0,0 +1,53 @@
+import logging.config
+import config  # loads .env before db.database reads DATABASE_URL
+from alembic import context
+from sqlalchemy import create_engine, pool
+from db.database import DATABASE_URL, Base
+import models.userModels  # registers every table on Base.metadata
+
+alembic_config = context.config
+if alembic_config.config_file_name is not None:
+    logging.config.fileConfig(alembic_config.config_file_name, disable_existing_loggers=False)
+
+target_metadata = Base.metadata
+
+
+def database_url():
+    # an url set on the alembic config (tests, scripts) wins over DATABASE_URL
+    return alembic_config.get_main_option("sqlalchemy.url") or DATABASE_URL
+
+
+def run_migrations_offline():
+    # `alembic upgrade head --sql` prints the SQL instead of running it
+    context.configure(
+        url=database_url(),
+        target_metadata=target_metadata,
+        literal_binds=True,
+        render_as_batch=True,
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+
+def run_migrations_online():
+    # A plain engine without the app's pool sizing, statement timeout or
+    # instrumentation: index builds and backfills may run for a long time.
+    connectable = create_engine(database_url(), poolclass=pool.NullPool)
+    with connectable.connect() as connection:
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            # SQLite can't alter most things in place, batch mode copies the table
+            render_as_batch=connection.dialect.name == "sqlite",
+            # each revision commits on its own, so a failed backfill or index
+            # build leaves the earlier ones applied
+            transaction_per_migration=True,
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
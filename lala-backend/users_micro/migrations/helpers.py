@@ -0,0 +1,59 @@
+import os
+import sqlalchemy as sa
+from alembic import op
+
+# rows changed per statement by the batched backfills, each batch commits on
+# its own so locks are short and replicas keep up
+MIGRATION_BATCH_SIZE = int(os.getenv("MIGRATION_BATCH_SIZE", "5000"))
+
+
+def is_postgresql():
+    return op.get_context().dialect.name == "postgresql"
+
+
+def drop_invalid_index(name):
+    # a CONCURRENTLY build that failed half way leaves an INVALID index
+    # behind, which IF NOT EXISTS would otherwise take as done
+    invalid = op.get_bind().scalar(sa.text(
+        "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE c.relname = :name AND NOT i.indisvalid"
+    ), {"name": name})
+    if invalid:
+        op.execute(sa.text(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"'))
+
+
+def create_index(name, table, columns, unique=False, **kw):
+    # On PostgreSQL the index is built CONCURRENTLY: reads and writes on the
+    # table go on during the build. That can't run inside a transaction,
+    # hence the autocommit block. Re-running after a failure is safe.
+    if is_postgresql():
+        with op.get_context().autocommit_block():
+            if not op.get_context().as_sql:
+                drop_invalid_index(name)
+            op.create_index(name, table, columns, unique=unique, postgresql_concurrently=True, if_not_exists=True, **kw)
+    else:
+        op.create_index(name, table, columns, unique=unique, if_not_exists=True, **kw)
+
+
+def drop_index(name, table):
+    if is_postgresql():
+        with op.get_context().autocommit_block():
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    else:
+        op.drop_index(name, table_name=table, if_exists=True)
+
+
+def batched_update(table, assignments, condition, batch_size=None):
+    # UPDATE ... SET assignments WHERE condition, a batch of rows at a time
+    # until none match; the assignments must make condition false
+    batch_size = batch_size or MIGRATION_BATCH_SIZE
+    if op.get_context().as_sql:
+        op.execute(sa.text(f"UPDATE {table} SET {assignments} WHERE {condition}"))
+        return
+    statement = sa.text(
+        f"UPDATE {table} SET {assignments} WHERE id IN "
+        f"(SELECT id FROM {table} WHERE {condition} LIMIT :batch_size)"
+    )
+    with op.get_context().autocommit_block():
+        while op.get_bind().execute(statement, {"batch_size": batch_size}).rowcount:
+            pass
@@ -0,0 +1,87 @@
+"""baseline: the tables as the first release created them
+
+Databases created by that release with create_all are already at this
+revision: `alembic stamp 0001` and then `alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("full_name", sa.String(255), nullable=True),
+        sa.Column("email", sa.String(255), nullable=True),
+        sa.Column("password", sa.String(255), nullable=True),
+        sa.Column("phone", sa.String(15), nullable=True),
+        sa.Column("location", sa.String(255), nullable=True),
+        sa.Column("id_number", sa.String(20), nullable=True),
+        sa.Column("nationality", sa.String(255), nullable=True),
+        sa.Column("profile", sa.Text(), nullable=True),
+        sa.Column("role", sa.String(255), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("email"),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+
+    op.create_table(
+        "sent_otps",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("account_id", sa.Integer(), nullable=True),
+        sa.Column("otp_code", sa.String(), nullable=True),
+        sa.Column("verification_code", sa.String(), nullable=True),
+        sa.Column("purpose", sa.String(), nullable=True),
+        sa.Column("date", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    for column in ("id", "account_id", "otp_code", "verification_code", "purpose", "date"):
+        op.create_index(f"ix_sent_otps_{column}", "sent_otps", [column])
+
+    op.create_table(
+        "houses",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("owner_id", sa.Integer(), nullable=False),
+        sa.Column("title", sa.String(), nullable=False),
+        sa.Column("description", sa.String(), nullable=True),
+        sa.Column("address", sa.String(), nullable=False),
+        sa.Column("location", sa.String(), nullable=False),
+        sa.Column("price", sa.Float(), nullable=False),
+        sa.Column("bedrooms", sa.Integer(), nullable=False),
+        sa.Column("bathrooms", sa.Integer(), nullable=False),
+        sa.Column("size", sa.Float(), nullable=True),
+        sa.Column("furnished", sa.Boolean(), nullable=True),
+        sa.Column("available", sa.Boolean(), nullable=True),
+        sa.Column("image_url", sa.Text(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_houses_id", "houses", ["id"])
+
+    op.create_table(
+        "bookings",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("house_id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(), nullable=False),
+        sa.Column("checkin", sa.DateTime(), nullable=False),
+        sa.Column("checkout", sa.DateTime(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_bookings_id", "bookings", ["id"])
+
+
+def downgrade():
+    op.drop_table("bookings")
+    op.drop_table("houses")
+    op.drop_table("sent_otps")
+    op.drop_table("users")
@@ -0,0 +1,125 @@
+"""new tables and columns: outbox, tokens, occupancy, photos, notifications
+
+New columns carry a constant server default, which PostgreSQL 11+ adds
+without rewriting the table. The new tables start empty, so their indexes
+are built right away.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from migrations.helpers import create_index, drop_index
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # verify_otp marks confirmed addresses
+    op.add_column("users", sa.Column("email_confirm", sa.Boolean(), nullable=False, server_default=sa.false()))
+
+    op.add_column("sent_otps", sa.Column("expires_at", sa.DateTime(), nullable=True))
+    op.add_column("sent_otps", sa.Column("attempts", sa.Integer(), nullable=False, server_default="0"))
+    create_index("ix_sent_otps_expires_at", "sent_otps", ["expires_at"])
+
+    op.create_table(
+        "house_occupancy",
+        sa.Column("house_id", sa.Integer(), nullable=False),
+        sa.Column("month", sa.Integer(), nullable=False),
+        sa.Column("days", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("house_id", "month"),
+    )
+
+    op.create_table(
+        "house_images",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("house_id", sa.Integer(), nullable=False),
+        sa.Column("sha256", sa.String(64), nullable=False),
+        sa.Column("extension", sa.String(8), nullable=False),
+        sa.Column("content_type", sa.String(50), nullable=False),
+        sa.Column("size_bytes", sa.Integer(), nullable=False),
+        sa.Column("position", sa.Integer(), nullable=False),
+        sa.Column("variants", sa.String(100), nullable=True),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_house_images_id", "house_images", ["id"])
+    op.create_index("ix_house_images_sha256", "house_images", ["sha256"])
+    op.create_index("ix_house_images_house_id_position", "house_images", ["house_id", "position"])
+
+    op.create_table(
+        "email_outbox",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("recipient", sa.String(255), nullable=False),
+        sa.Column("subject", sa.String(255), nullable=False),
+        sa.Column("body", sa.Text(), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+        sa.Column("job_id", sa.Integer(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_email_outbox_id", "email_outbox", ["id"])
+    op.create_index("ix_email_outbox_job_id", "email_outbox", ["job_id"])
+    op.create_index("ix_email_outbox_status_next_attempt_at", "email_outbox", ["status", "next_attempt_at"])
+
+    op.create_table(
+        "notification_jobs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("created_by", sa.Integer(), nullable=False),
+        sa.Column("audience", sa.String(50), nullable=False),
+        sa.Column("location", sa.String(255), nullable=True),
+        sa.Column("subject", sa.String(255), nullable=False),
+        sa.Column("message", sa.Text(), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("queued", sa.Integer(), nullable=False),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_notification_jobs_id", "notification_jobs", ["id"])
+    op.create_index("ix_notification_jobs_created_by", "notification_jobs", ["created_by"])
+
+    op.create_table(
+        "refresh_tokens",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("token_hash", sa.String(64), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("revoked", sa.Boolean(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_refresh_tokens_id", "refresh_tokens", ["id"])
+    op.create_index("ix_refresh_tokens_user_id", "refresh_tokens", ["user_id"])
+    op.create_index("ix_refresh_tokens_token_hash", "refresh_tokens", ["token_hash"], unique=True)
+
+    op.create_table(
+        "revoked_tokens",
+        sa.Column("jti", sa.String(64), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("revoked_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("jti"),
+    )
+    op.create_index("ix_revoked_tokens_expires_at", "revoked_tokens", ["expires_at"])
+    op.create_index("ix_revoked_tokens_revoked_at", "revoked_tokens", ["revoked_at"])
+
+
+def downgrade():
+    for table in ("revoked_tokens", "refresh_tokens", "notification_jobs", "email_outbox", "house_images", "house_occupancy"):
+        op.drop_table(table)
+    drop_index("ix_sent_otps_expires_at", "sent_otps")
+    with op.batch_alter_table("sent_otps") as batch:
+        batch.drop_column("attempts")
+        batch.drop_column("expires_at")
+    with op.batch_alter_table("users") as batch:
+        batch.drop_column("email_confirm")
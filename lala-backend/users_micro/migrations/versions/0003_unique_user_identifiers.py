@@ -0,0 +1,61 @@
+"""unique indexes on users email, phone and id_number
+
+Registration used to store "" for a missing phone or id number, which a
+unique index would count as a duplicate. Those become NULL first, in
+batches, and any real duplicates stop the migration before an index is
+attempted.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from migrations.helpers import batched_update, create_index, drop_index, is_postgresql
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+COLUMNS = ("email", "phone", "id_number")
+# the constraint the baseline's unique=True created for users.email
+SQLITE_NAMING = {"uq": "uq_%(table_name)s_%(column_0_name)s"}
+
+
+def check_duplicates(column):
+    duplicates = op.get_bind().execute(sa.text(
+        f"SELECT {column}, count(*) FROM users WHERE {column} IS NOT NULL "
+        f"GROUP BY {column} HAVING count(*) > 1 LIMIT 5"
+    )).all()
+    if duplicates:
+        listed = ", ".join(f"{value!r} x{count}" for value, count in duplicates)
+        raise RuntimeError(f"users.{column} has duplicates, merge them before upgrading: {listed}")
+
+
+def upgrade():
+    for column in COLUMNS:
+        batched_update("users", f"{column} = NULL", f"{column} = ''")
+    if not op.get_context().as_sql:
+        for column in COLUMNS:
+            check_duplicates(column)
+
+    for column in COLUMNS:
+        create_index(f"ix_users_{column}", "users", [column], unique=True)
+
+    # ix_users_email now enforces what the old constraint did
+    if is_postgresql():
+        op.execute("ALTER TABLE users DROP CONSTRAINT IF EXISTS users_email_key")
+    else:
+        with op.batch_alter_table("users", naming_convention=SQLITE_NAMING) as batch:
+            batch.drop_constraint("uq_users_email", type_="unique")
+
+
+def downgrade():
+    if is_postgresql():
+        op.create_unique_constraint("users_email_key", "users", ["email"])
+    else:
+        with op.batch_alter_table("users") as batch:
+            batch.create_unique_constraint("uq_users_email", ["email"])
+    for column in COLUMNS:
+        drop_index(f"ix_users_{column}", "users")
@@ -0,0 +1,43 @@
+"""indexes for house search and bookings by user, house and date
+
+The tables are live and can be large, so on PostgreSQL every index is
+built CONCURRENTLY; see migrations/helpers.py.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+import sqlalchemy as sa
+from migrations.helpers import create_index, drop_index
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+ACTIVE = sa.text("status IN ('pending', 'approved')")
+
+INDEXES = [
+    # GET /api/house filters, newest id first
+    ("ix_houses_available_id", "houses", ["available", "id"], {}),
+    ("ix_houses_available_location_id", "houses", ["available", "location", "id"], {}),
+    ("ix_houses_available_furnished_id", "houses", ["available", "furnished", "id"], {}),
+    ("ix_houses_available_location_furnished_id", "houses", ["available", "location", "furnished", "id"], {}),
+    # an owner's listings
+    ("ix_houses_owner_id_id", "houses", ["owner_id", "id"], {}),
+    ("ix_bookings_house_id_checkin", "bookings", ["house_id", "checkin"], {}),
+    ("ix_bookings_user_id_checkin", "bookings", ["user_id", "checkin"], {}),
+    # overlap checks only look at bookings that still hold their dates
+    ("ix_bookings_active_house_id_checkin", "bookings", ["house_id", "checkin", "checkout"],
+     {"postgresql_where": ACTIVE, "sqlite_where": ACTIVE}),
+]
+
+
+def upgrade():
+    for name, table, columns, kw in INDEXES:
+        create_index(name, table, columns, **kw)
+
+
+def downgrade():
+    for name, table, columns, kw in reversed(INDEXES):
+        drop_index(name, table)
@@ -0,0 +1,116 @@
+"""fill house_occupancy from the existing bookings
+
+Runs a batch of houses at a time outside of a long transaction, every
+statement commits on its own. Each batch replaces the rows of its houses,
+so re-running after a failure is safe.
+
+Booking statuses are lower cased first: the host dashboard stored
+"Approved", which the occupancy and overlap checks would not count.
+Apply it as the release step, before workers running the new code start.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from datetime import timedelta
+from alembic import op
+import sqlalchemy as sa
+from migrations.helpers import MIGRATION_BATCH_SIZE, batched_update
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+# houses per batch; one house can have many bookings
+HOUSES_PER_BATCH = max(1, MIGRATION_BATCH_SIZE // 10)
+ACTIVE_BOOKING_STATUSES = ("pending", "approved")
+# stored status -> spellings it replaces, see schemas.BookingStatus
+STATUS_SPELLINGS = {
+    "pending": ("pending",),
+    "approved": ("approved",),
+    "rejected": ("rejected", "declined"),
+    "canceled": ("canceled", "cancelled", "cancel"),
+}
+
+houses = sa.table("houses", sa.column("id", sa.Integer))
+bookings = sa.table(
+    "bookings",
+    sa.column("house_id", sa.Integer),
+    sa.column("status", sa.String),
+    sa.column("checkin", sa.DateTime),
+    sa.column("checkout", sa.DateTime),
+)
+house_occupancy = sa.table(
+    "house_occupancy",
+    sa.column("house_id", sa.Integer),
+    sa.column("month", sa.Integer),
+    sa.column("days", sa.Integer),
+)
+
+
+# copies of functions/availability.py as of this revision, so later changes
+# there can't change what this migration writes
+def month_key(day):
+    return day.year * 12 + day.month - 1
+
+
+def night_masks(checkin, checkout):
+    first = checkin.date()
+    last = max(checkout.date(), first + timedelta(days=1))
+    masks = {}
+    day = first
+    while day < last:
+        key = month_key(day)
+        masks[key] = masks.get(key, 0) | 1 << (day.day - 1)
+        day += timedelta(days=1)
+    return masks
+
+
+def backfill_batch(bind, house_ids):
+    days = {}
+    rows = bind.execute(
+        sa.select(bookings.c.house_id, bookings.c.checkin, bookings.c.checkout).where(
+            bookings.c.house_id.in_(house_ids),
+            bookings.c.status.in_(ACTIVE_BOOKING_STATUSES),
+        )
+    )
+    for house_id, checkin, checkout in rows:
+        for key, mask in night_masks(checkin, checkout).items():
+            days[house_id, key] = days.get((house_id, key), 0) | mask
+
+    bind.execute(house_occupancy.delete().where(house_occupancy.c.house_id.in_(house_ids)))
+    if days:
+        bind.execute(house_occupancy.insert(), [
+            {"house_id": house_id, "month": key, "days": mask}
+            for (house_id, key), mask in days.items()
+        ])
+
+
+def normalize_statuses():
+    for status, spellings in STATUS_SPELLINGS.items():
+        listed = ", ".join(f"'{spelling}'" for spelling in spellings)
+        batched_update("bookings", f"status = '{status}'", f"lower(trim(status)) IN ({listed}) AND status <> '{status}'")
+
+
+def upgrade():
+    normalize_statuses()
+    if op.get_context().as_sql:
+        # the masks are computed in Python, so there is no SQL to print
+        op.execute("-- 0005: run `alembic upgrade 0005` online to fill house_occupancy")
+        return
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        last_id = 0
+        while True:
+            house_ids = bind.execute(
+                sa.select(houses.c.id).where(houses.c.id > last_id).order_by(houses.c.id).limit(HOUSES_PER_BATCH)
+            ).scalars().all()
+            if not house_ids:
+                break
+            backfill_batch(bind, house_ids)
+            last_id = house_ids[-1]
+
+
+def downgrade():
+    op.execute(house_occupancy.delete())
@@ -0,0 +1,46 @@
+"""PostgreSQL only: no two active bookings of a house may overlap
+
+Unlike the indexes this can't be built concurrently: adding the EXCLUDE
+constraint holds a lock on bookings while its index builds. Existing
+overlaps would make it fail, so they are looked for first.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+from migrations.helpers import is_postgresql
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+OVERLAPS = sa.text(
+    "SELECT a.id, b.id FROM bookings a JOIN bookings b "
+    "ON a.house_id = b.house_id AND a.id < b.id "
+    "AND a.checkin < b.checkout AND b.checkin < a.checkout "
+    "WHERE a.status IN ('pending', 'approved') AND b.status IN ('pending', 'approved') LIMIT 5"
+)
+
+
+def upgrade():
+    if not is_postgresql():
+        return
+    bind = op.get_bind()
+    if not op.get_context().as_sql:
+        overlaps = bind.execute(OVERLAPS).all()
+        if overlaps:
+            raise RuntimeError(f"overlapping active bookings, resolve them before upgrading: {overlaps}")
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.execute(
+        "ALTER TABLE bookings ADD CONSTRAINT bookings_no_overlap EXCLUDE USING gist "
+        "(house_id WITH =, tsrange(checkin, checkout) WITH &&) "
+        "WHERE (status IN ('pending', 'approved'))"
+    )
+
+
+def downgrade():
+    if is_postgresql():
+        op.execute("ALTER TABLE bookings DROP CONSTRAINT IF EXISTS bookings_no_overlap")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String,Text, Boolean, Float, Date, ForeignKey,DateTime,ARRAY
+from sqlalchemy import Column, Integer, String,Text, Boolean, Float, Date, ForeignKey,DateTime,ARRAY,Index,DDL,event,text,false
 from db.database import Base
 from datetime import date
 from datetime import datetime
@@ -9,14 +9,19 @@ class Users(Base):
     #user info -----
     id = Column(Integer, primary_key=True, index=True)
     full_name = Column(String(255), nullable=True, default="")
-    email = Column(String(255), unique=True, nullable=True, default="")  # Non-nullable for uniqueness
+    # email, phone and id_number are unique and indexed: registration relies on
+    # the constraints to reject duplicates and login looks users up by email
+    # or phone. Missing values are stored as NULL, which never collides.
+    email = Column(String(255), unique=True, index=True, nullable=True, default=None)
     password = Column(String(255), nullable=True, default="")
-    phone = Column(String(15), nullable=True, default="")
+    phone = Column(String(15), unique=True, index=True, nullable=True, default=None)
     location = Column(String(255), nullable=True, default="")
-    id_number = Column(String(20), nullable=True, default="")
+    id_number = Column(String(20), unique=True, index=True, nullable=True, default=None)
     nationality = Column(String(255),nullable=True, default="")  # Non-nullable for uniqueness
     profile = Column(Text, default="", nullable=True)
     role = Column(String(255), default="", nullable=True)
+    # set once the email address is verified with an OTP (purpose "email")
+    email_confirm = Column(Boolean, nullable=False, default=False, server_default=false())
    
 class OTP(Base):
     __tablename__ = "sent_otps"
@@ -26,6 +31,9 @@ class OTP(Base):
     verification_code = Column(String, index=True)
     purpose = Column(String, index=True)
     date = Column(DateTime, default=datetime.utcnow, index=True)
+    # rows past expires_at are purged in batches, see functions/otp_store.py
+    expires_at = Column(DateTime, nullable=True, index=True)
+    attempts = Column(Integer, nullable=False, default=0)
 
     
 class House(Base):
@@ -45,6 +53,40 @@ class House(Base):
     available = Column(Boolean, default=True)
     image_url = Column(Text, nullable=True)
 
+    # Composite indexes backing the filtered, keyset paginated listings
+    # (GET /api/house and /api/house/available). Equality filters lead and id
+    # comes last, so a page is read in id order straight from the index and
+    # the range filters (price, rooms, size) are checked on the way, stopping
+    # after `limit` matches instead of sorting every match first.
+    __table_args__ = (
+        Index("ix_houses_available_id", "available", "id"),
+        Index("ix_houses_available_location_id", "available", "location", "id"),
+        Index("ix_houses_available_furnished_id", "available", "furnished", "id"),
+        Index("ix_houses_available_location_furnished_id", "available", "location", "furnished", "id"),
+        # an owner's houses in id order (customers page, /house/me)
+        Index("ix_houses_owner_id_id", "owner_id", "id"),
+    )
+
+class HouseImage(Base):
+    # a photo of a house; the file itself is stored once per content hash
+    # under MEDIA_ROOT, see functions/image_store.py
+    __tablename__ = "house_images"
+
+    id = Column(Integer, primary_key=True, index=True)
+    house_id = Column(Integer, nullable=False)
+    sha256 = Column(String(64), nullable=False, index=True)
+    extension = Column(String(8), nullable=False)  # jpg, png, webp, gif
+    content_type = Column(String(50), nullable=False)
+    size_bytes = Column(Integer, nullable=False)
+    position = Column(Integer, nullable=False, default=0)
+    variants = Column(String(100), nullable=True)  # widths of the generated webp copies, "320,960"
+    status = Column(String(20), nullable=False, default="processing")  # processing, ready, original_only
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("ix_house_images_house_id_position", "house_id", "position"),
+    )
+
 class Booking(Base):
     __tablename__ = "bookings"
 
@@ -55,3 +97,107 @@ class Booking(Base):
     checkin = Column(DateTime, nullable=False)
     checkout = Column(DateTime, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+
+    # Active bookings of a house never overlap, so ordered by checkin the only
+    # one that can clash with a new stay is the last one starting before its
+    # checkout. The partial index turns that lookup into a single seek.
+    __table_args__ = (
+        Index("ix_bookings_house_id_checkin", "house_id", "checkin"),
+        # a renter's bookings (GET /api/booking/user)
+        Index("ix_bookings_user_id_checkin", "user_id", "checkin"),
+        Index(
+            "ix_bookings_active_house_id_checkin",
+            "house_id",
+            "checkin",
+            "checkout",
+            postgresql_where=text("status IN ('pending', 'approved')"),
+            sqlite_where=text("status IN ('pending', 'approved')"),
+        ),
+    )
+
+
+# On PostgreSQL the database itself rejects overlapping active bookings, which
+# backs up the application-level check in functions/availability.py.
+event.listen(
+    Booking.__table__,
+    "after_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS btree_gist").execute_if(dialect="postgresql"),
+)
+event.listen(
+    Booking.__table__,
+    "after_create",
+    DDL(
+        "ALTER TABLE bookings ADD CONSTRAINT bookings_no_overlap "
+        "EXCLUDE USING gist (house_id WITH =, tsrange(checkin, checkout) WITH &&) "
+        "WHERE (status IN ('pending', 'approved'))"
+    ).execute_if(dialect="postgresql"),
+)
+
+
+class HouseOccupancy(Base):
+    # One row per house and month; bit d-1 of days is set when night d of
+    # that month is taken by an active booking.
+    __tablename__ = "house_occupancy"
+
+    house_id = Column(Integer, primary_key=True)
+    month = Column(Integer, primary_key=True)  # year * 12 + month - 1
+    days = Column(Integer, nullable=False, default=0)
+
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    recipient = Column(String(255), nullable=False)
+    subject = Column(String(255), nullable=False)
+    body = Column(Text, nullable=False)
+    status = Column(String(20), nullable=False, default="pending")  # pending, sending, sent, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    next_attempt_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    sent_at = Column(DateTime, nullable=True)
+    # set for messages fanned out by a bulk notification
+    job_id = Column(Integer, nullable=True, index=True)
+
+    # workers claim due messages with status + next_attempt_at
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+
+class NotificationJob(Base):
+    # one bulk notification; its messages are the outbox rows with this job_id
+    __tablename__ = "notification_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    created_by = Column(Integer, nullable=False, index=True)
+    audience = Column(String(50), nullable=False)  # pending_renters, location
+    location = Column(String(255), nullable=True)
+    subject = Column(String(255), nullable=False)
+    message = Column(Text, nullable=False)
+    status = Column(String(20), nullable=False, default="queued")  # queued, running, completed, failed
+    queued = Column(Integer, nullable=False, default=0)  # messages put in the outbox so far
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class RefreshToken(Base):
+    __tablename__ = "refresh_tokens"
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, nullable=False, index=True)
+    token_hash = Column(String(64), nullable=False, unique=True, index=True)  # sha256 of the token
+    expires_at = Column(DateTime, nullable=False)
+    revoked = Column(Boolean, nullable=False, default=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class RevokedToken(Base):
+    # access tokens revoked before their exp, by jti
+    __tablename__ = "revoked_tokens"
+
+    jti = Column(String(64), primary_key=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    revoked_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
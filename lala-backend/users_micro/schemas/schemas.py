@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr,conlist, validator,root_validator,ValidationError,Field
-from typing import List, Optional, Literal
+from pydantic import BaseModel, EmailStr,conlist, validator,root_validator,ValidationError,Field,BeforeValidator
+from typing import Annotated, Dict, List, Optional, Literal
 from datetime import date, datetime
 from schemas.returnSchemas import ReturnUser
 
@@ -27,6 +27,10 @@ class FromData(BaseModel):  # token validation schema
     password: Optional[str]
 
 
+class RefreshTokenRequest(BaseModel):  # refresh and logout schema
+    refresh_token: Optional[str] = None
+
+
 class HouseCreate(BaseModel):
     title: str
     description: Optional[str] = None
@@ -43,10 +47,102 @@ class HouseCreate(BaseModel):
 class HouseResponse(HouseCreate):
     id: int
     owner_id: int
+    furnished: Optional[bool] = False
+    available: Optional[bool] = True
 
     class Config:
         from_attributes = True
 
+
+class HousePage(BaseModel):  # one page of a keyset paginated house listing
+    houses: List[HouseResponse]
+    next_cursor: Optional[int] = None
+
+
+class HouseMessage(BaseModel):
+    message: str
+    house: HouseResponse
+
+
+class ImportRowError(BaseModel):
+    row: int  # 1 based position of the row in the upload (CSV header not counted)
+    errors: List[str]
+
+
+class HouseImportReport(BaseModel):
+    imported: int
+    failed: int
+    errors: List[ImportRowError]  # capped at IMPORT_MAX_ERRORS entries
+    rows_read: int
+    error: Optional[str] = None  # the file broke off after rows_read rows
+
+
+class HouseImageResponse(BaseModel):
+    id: int
+    house_id: int
+    sha256: str
+    content_type: str
+    size_bytes: int
+    position: int
+    status: str
+    url: str
+    thumbnails: Dict[str, str]  # width -> url of the webp copy
+
+
+class HouseAvailability(BaseModel):
+    house_id: int
+    date_from: date = Field(alias="from")
+    to: date
+    occupied: str
+
+
+class CustomerHouse(BaseModel):
+    id: int
+    title: str
+    location: str
+    price: float
+
+
+class CustomerUser(BaseModel):
+    id: Optional[int] = None
+    name: Optional[str] = None
+    email: Optional[str] = None
+
+
+class CustomerBooking(BaseModel):
+    booking_id: int
+    user: CustomerUser
+    status: str
+    checkin: datetime
+    checkout: datetime
+    created_at: Optional[datetime] = None
+
+
+class HouseCustomers(BaseModel):
+    house: CustomerHouse
+    bookings: List[CustomerBooking]  # the latest bookings_limit stays
+    bookings_total: int
+
+
+class HouseCustomersPage(BaseModel):
+    houses: List[HouseCustomers]
+    next_cursor: Optional[int] = None
+
+# other spellings the dashboards send for a booking status
+BOOKING_STATUS_ALIASES = {"cancelled": "canceled", "cancel": "canceled", "declined": "rejected"}
+
+
+def normalize_booking_status(value):
+    if isinstance(value, str):
+        value = value.strip().lower()
+        return BOOKING_STATUS_ALIASES.get(value, value)
+    return value
+
+
+# "Approved" from the host dashboard is stored as "approved", anything
+# outside these four is a 422
+BookingStatus = Annotated[Literal["pending", "approved", "rejected", "canceled"], BeforeValidator(normalize_booking_status)]
+
 class BookingCreate(BaseModel):
     house_id: int
     checkin: datetime
@@ -56,7 +152,100 @@ class BookingResponse(BookingCreate):
     id: int
     user_id: int
     status: str
-    created_at: datetime
+    created_at: Optional[datetime] = None
 
     class Config:
-        from_attributes = True
\ No newline at end of file
+        from_attributes = True
+
+
+class BookingMessage(BaseModel):
+    message: str
+    booking: BookingResponse
+
+
+class MessageResponse(BaseModel):
+    message: str
+
+
+class DetailResponse(BaseModel):
+    detail: str
+
+
+class RegisterResponse(BaseModel):
+    message: str
+    user: ReturnUser
+
+
+class TokenPair(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str
+
+
+class LoginData(BaseModel):
+    UserInfo: ReturnUser
+
+
+class LoginResponse(TokenPair):
+    data: LoginData
+
+
+class OtpSent(BaseModel):
+    message: str
+    verification_Code: int
+
+
+class NotificationCreate(BaseModel):
+    # pending_renters: renters with a pending booking on your houses (hosts)
+    # location: every user living in `location` (admins)
+    audience: Literal["pending_renters", "location"]
+    location: Optional[str] = None
+    subject: str
+    message: str
+
+
+class PoolStatus(BaseModel):  # see db.database.pool_status
+    pool: str
+    size: Optional[int] = None
+    checked_out: Optional[int] = None
+    checked_in: Optional[int] = None
+    overflow: Optional[int] = None
+    checkouts: Optional[int] = None
+    wait_seconds_total: Optional[float] = None
+    max_wait_seconds: Optional[float] = None
+    timeouts: Optional[int] = None
+
+
+class DatabaseHealth(BaseModel):
+    sync: PoolStatus
+    async_: PoolStatus = Field(alias="async")
+
+
+class NotificationProgress(BaseModel):
+    id: int
+    audience: str
+    location: Optional[str] = None
+    subject: str
+    status: str
+    queued: int
+    sent: int
+    failed: int
+    pending: int
+    error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class SQLStatementProfile(BaseModel):  # see functions.profiling
+    route: str
+    statement: str
+    count: int
+    total_ms: float
+    max_ms: float
+    last_parameters: Optional[str] = None
+
+
+class SQLProfileReport(BaseModel):
+    enabled: bool
+    dropped: int
+    statements: List[SQLStatementProfile]
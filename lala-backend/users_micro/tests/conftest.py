@@ -0,0 +1,31 @@
+# users_micro/tests/conftest.py
+
+import os
+import tempfile
+
+# The app reads its settings from the environment at import time, so point it
+# at a throwaway SQLite database before any test module imports main.
+_db_dir = tempfile.mkdtemp(prefix="lala-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_db_dir, 'test.db')}")
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("SECRET_KEY_DATA", "test-data-key")
+os.environ.setdefault("NOVA_SENDER_EMAIL", "noreply@lala-rentals.test")
+# tests drive the outbox by hand, keep the background mail workers off
+os.environ.setdefault("MAIL_WORKERS", "0")
+# cheap bcrypt cost keeps the auth tests fast
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+# uploaded photos go to the temp dir and are resized inline, not in a pool
+os.environ.setdefault("MEDIA_ROOT", os.path.join(_db_dir, "media"))
+os.environ.setdefault("IMAGE_WORKERS", "0")
+
+import pytest
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database_tables():
+    # the schema straight from the models, test_migrations checks that the
+    # alembic revisions end up at the same one
+    from db.connection import create_tables
+
+    create_tables()
@@ -0,0 +1,167 @@
+# users_micro/tests/test_auth.py
+
+import asyncio
+import pytest
+import time
+from datetime import timedelta
+from fastapi.testclient import TestClient
+from main import app
+from passlib.context import CryptContext
+from Endpoints.auth import create_access_token, refresh_access_token
+from db.database import SessionLocal, AsyncSessionLocal
+from fastapi import HTTPException
+from schemas.schemas import RefreshTokenRequest
+from models.userModels import Users, EmailOutbox
+from functions.passwords import BCRYPT_ROUNDS
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+def register(client, **fields):
+    user = {
+        "full_name": "Aline Uwase",
+        "email": "aline@example.com",
+        "password": "s3cret-pass",
+        "phone": "0788000001",
+        "id_number": "1199880000000001",
+        "role": "renter",
+    }
+    user.update(fields)
+    return client.post("/auth/register", json=user)
+
+
+def test_register_and_login(client):
+    response = register(client)
+    assert response.status_code == 200
+    assert response.json()["message"] == "User registered successfully"
+    # the response model only echoes public fields back
+    assert "password" not in response.json()["user"]
+
+    response = client.post("/auth/login", json={"email": "aline@example.com", "password": "s3cret-pass"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["token_type"] == "bearer"
+    assert body["data"]["UserInfo"]["email"] == "aline@example.com"
+
+    # login by phone number works too
+    response = client.post("/auth/login", json={"email": "0788000001", "password": "s3cret-pass"})
+    assert response.status_code == 200
+
+
+def test_register_rejects_duplicates(client):
+    register(client, email="kevin@example.com", phone="0788000101", id_number="1199880000000101")
+
+    response = register(client, email="other@example.com", phone="0788000101", id_number="1199880000000102")
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Phone number already taken"
+
+    response = register(client, email="kevin@example.com", phone="0788000102", id_number="1199880000000101")
+    assert response.json()["detail"] == "Id number already taken"
+
+    # users without a phone or id number do not collide with each other
+    assert register(client, email="nophone1@example.com", phone="", id_number=None).status_code == 200
+    assert register(client, email="nophone2@example.com", phone="", id_number=None).status_code == 200
+
+
+def test_register_with_phone_only(client):
+    response = register(client, email=None, phone="0788000201", id_number="1199880000000201")
+    assert response.status_code == 200
+
+    # no welcome email is queued without an address
+    db = SessionLocal()
+    user = db.query(Users).filter(Users.phone == "0788000201").one()
+    assert user.email is None
+    assert db.query(EmailOutbox).filter(EmailOutbox.recipient.is_(None)).count() == 0
+    db.close()
+
+    response = client.post("/auth/login", json={"email": "0788000201", "password": "s3cret-pass"})
+    assert response.status_code == 200
+
+
+def test_register_reports_other_integrity_errors_as_500(client, monkeypatch):
+    # a constraint violation that is not a taken identifier is not a duplicate
+    def broken_queue_email(db, *args):
+        db.add(EmailOutbox(recipient=None, subject="Welcome", body=""))
+
+    monkeypatch.setattr("Endpoints.auth.queue_email", broken_queue_email)
+    response = register(client, email="broken@example.com", phone="0788000301", id_number="1199880000000301")
+    assert response.status_code == 500
+
+    db = SessionLocal()
+    assert db.query(Users).filter(Users.email == "broken@example.com").count() == 0
+    db.close()
+
+
+def test_login_with_wrong_password(client):
+    response = client.post("/auth/login", json={"email": "aline@example.com", "password": "wrong"})
+    assert response.status_code == 401
+
+
+def test_cached_token_expires_with_the_token(client):
+    token = create_access_token("aline@example.com", 1, "renter", timedelta(seconds=1))
+    headers = {"Authorization": f"Bearer {token}"}
+    assert client.get("/api/booking/user", headers=headers).status_code == 200
+    assert client.get("/api/booking/user", headers=headers).status_code == 200
+    # exp has whole second precision, wait until it is surely in the past
+    time.sleep(2.2)
+    assert client.get("/api/booking/user", headers=headers).status_code == 401
+
+
+def test_refresh_rotates_and_logout_revokes(client):
+    login = client.post("/auth/login", json={"email": "aline@example.com", "password": "s3cret-pass"}).json()
+
+    response = client.post("/auth/refresh", json={"refresh_token": login["refresh_token"]})
+    assert response.status_code == 200
+    refreshed = response.json()
+    assert refreshed["refresh_token"] != login["refresh_token"]
+
+    # a refresh token works once
+    assert client.post("/auth/refresh", json={"refresh_token": login["refresh_token"]}).status_code == 401
+
+    headers = {"Authorization": f"Bearer {refreshed['access_token']}"}
+    assert client.get("/api/booking/user", headers=headers).status_code == 200
+    response = client.post("/auth/logout", json={"refresh_token": refreshed["refresh_token"]}, headers=headers)
+    assert response.status_code == 200
+    assert client.get("/api/booking/user", headers=headers).status_code == 401
+    assert client.post("/auth/refresh", json={"refresh_token": refreshed["refresh_token"]}).status_code == 401
+
+
+def test_concurrent_refreshes_rotate_once(client):
+    login = client.post("/auth/login", json={"email": "aline@example.com", "password": "s3cret-pass"}).json()
+
+    async def refresh():
+        async with AsyncSessionLocal() as db:
+            try:
+                return await refresh_access_token(RefreshTokenRequest(refresh_token=login["refresh_token"]), db)
+            except HTTPException as e:
+                return e.status_code
+
+    async def both():
+        return await asyncio.gather(refresh(), refresh())
+
+    results = asyncio.run(both())
+    assert sorted(result if isinstance(result, int) else 200 for result in results) == [200, 401]
+    # the loser counted as reuse and ended the winner's session as well
+    winner = next(result for result in results if isinstance(result, dict))
+    assert client.post("/auth/refresh", json={"refresh_token": winner["refresh_token"]}).status_code == 401
+
+
+def test_login_rehashes_password_made_with_old_cost(client):
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=5).hash("old-cost-pass")
+    db = SessionLocal()
+    db.add(Users(full_name="Jean", email="jean@example.com", password=old_hash, phone="0788000002", id_number="1199880000000002"))
+    db.commit()
+    db.close()
+
+    response = client.post("/auth/login", json={"email": "jean@example.com", "password": "old-cost-pass"})
+    assert response.status_code == 200
+
+    db = SessionLocal()
+    new_hash = db.query(Users).filter(Users.email == "jean@example.com").one().password
+    db.close()
+    assert new_hash != old_hash
+    assert f"$2b${BCRYPT_ROUNDS:02d}$" in new_hash
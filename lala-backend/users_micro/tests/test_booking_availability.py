@@ -0,0 +1,212 @@
+# users_micro/tests/test_booking_availability.py
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from fastapi.testclient import TestClient
+from main import app
+from db.database import SessionLocal
+from models.userModels import House, Booking, Users, EmailOutbox
+from Endpoints.auth import create_access_token
+
+client = TestClient(app)
+
+OWNER_ID = 9001
+RENTER_ID = 9002
+
+
+def auth_header(user_id):
+    token = create_access_token(f"user{user_id}@example.com", user_id, "renter", timedelta(minutes=5))
+    return {"Authorization": f"Bearer {token}"}
+
+
+def make_house():
+    db = SessionLocal()
+    house = House(owner_id=OWNER_ID, title="Lake view", address="KN 3 Rd", location="Kigali", price=80, bedrooms=2, bathrooms=1)
+    db.add(house)
+    db.commit()
+    house_id = house.id
+    db.close()
+    return house_id
+
+
+def book(house_id, checkin, checkout):
+    return client.post(
+        "/api/booking",
+        json={"house_id": house_id, "checkin": checkin, "checkout": checkout},
+        headers=auth_header(RENTER_ID),
+    )
+
+
+def test_overlapping_bookings_are_rejected():
+    house_id = make_house()
+    assert book(house_id, "2030-01-10T14:00:00", "2030-01-15T10:00:00").status_code == 200
+    # overlaps the tail of the first stay
+    assert book(house_id, "2030-01-14T14:00:00", "2030-01-18T10:00:00").status_code == 409
+    # fully inside the first stay
+    assert book(house_id, "2030-01-11T14:00:00", "2030-01-12T10:00:00").status_code == 409
+    # back to back stays are fine
+    assert book(house_id, "2030-01-15T10:00:00", "2030-01-20T10:00:00").status_code == 200
+    assert book(house_id, "2030-01-01T14:00:00", "2030-01-10T14:00:00").status_code == 200
+
+
+def test_canceled_booking_frees_its_dates():
+    house_id = make_house()
+    booking_id = book(house_id, "2030-02-01T14:00:00", "2030-02-05T10:00:00").json()["booking"]["id"]
+    assert book(house_id, "2030-02-02T14:00:00", "2030-02-03T10:00:00").status_code == 409
+
+    response = client.put(f"/api/booking{booking_id}", params={"status": "cancel"}, headers=auth_header(OWNER_ID))
+    assert response.status_code == 200
+    assert book(house_id, "2030-02-02T14:00:00", "2030-02-03T10:00:00").status_code == 200
+
+    # the canceled stay can no longer be re-approved over the new one
+    response = client.put(f"/api/booking{booking_id}", params={"status": "approved"}, headers=auth_header(OWNER_ID))
+    assert response.status_code == 409
+
+
+def test_dashboard_approval_keeps_the_dates_taken():
+    house_id = make_house()
+    booking_id = book(house_id, "2030-05-01T14:00:00", "2030-05-05T10:00:00").json()["booking"]["id"]
+
+    # the host dashboard sends "Approved"
+    response = client.put(f"/api/booking{booking_id}", params={"status": "Approved"}, headers=auth_header(OWNER_ID))
+    assert response.status_code == 200
+    assert response.json()["booking"]["status"] == "approved"
+    assert book(house_id, "2030-05-02T14:00:00", "2030-05-03T10:00:00").status_code == 409
+
+    response = client.put(f"/api/booking{booking_id}", params={"status": "maybe"}, headers=auth_header(OWNER_ID))
+    assert response.status_code == 422
+
+
+def test_owner_is_told_who_requested_the_house():
+    db = SessionLocal()
+    owner = Users(full_name="Olivier Owner", email="booking-owner@example.com")
+    renter = Users(full_name="Rita Renter", email="booking-renter@example.com")
+    db.add_all([owner, renter])
+    db.commit()
+    house = House(owner_id=owner.id, title="Garden flat", address="KN 5 Rd", location="Kigali", price=70, bedrooms=1, bathrooms=1)
+    db.add(house)
+    db.commit()
+    house_id, renter_id = house.id, renter.id
+    db.close()
+
+    response = client.post(
+        "/api/booking",
+        json={"house_id": house_id, "checkin": "2030-06-01T14:00:00", "checkout": "2030-06-03T10:00:00"},
+        headers=auth_header(renter_id),
+    )
+    assert response.status_code == 200
+    db = SessionLocal()
+    message = db.query(EmailOutbox).filter(EmailOutbox.recipient == "booking-owner@example.com").one()
+    db.close()
+    assert "Rita Renter has requested to book your house: Garden flat" in message.body
+
+
+def test_invalid_range_is_rejected():
+    house_id = make_house()
+    assert book(house_id, "2030-03-05T10:00:00", "2030-03-01T10:00:00").status_code == 400
+
+
+def test_concurrent_bookings_for_same_dates():
+    house_id = make_house()
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        statuses = list(pool.map(lambda _: book(house_id, "2030-04-01T14:00:00", "2030-04-04T10:00:00").status_code, range(8)))
+    assert statuses.count(200) == 1
+    assert statuses.count(409) == 7
+
+    db = SessionLocal()
+    assert db.query(Booking).filter(Booking.house_id == house_id).count() == 1
+    db.close()
+
+
+def availability(house_id, date_from, date_to):
+    response = client.get(f"/api/house{house_id}/availability", params={"from": date_from, "to": date_to})
+    assert response.status_code == 200
+    return response.json()["occupied"]
+
+
+def test_availability_bitmap_follows_bookings():
+    house_id = make_house()
+    assert availability(house_id, "2030-05-28", "2030-06-04") == "00000000"
+
+    # nights of May 30, May 31 and June 1 are taken, checkout day is free
+    booking_id = book(house_id, "2030-05-30T14:00:00", "2030-06-02T10:00:00").json()["booking"]["id"]
+    assert availability(house_id, "2030-05-28", "2030-06-04") == "00111000"
+
+    client.put(f"/api/booking{booking_id}", params={"status": "cancel"}, headers=auth_header(OWNER_ID))
+    assert availability(house_id, "2030-05-28", "2030-06-04") == "00000000"
+
+    client.put(f"/api/booking{booking_id}", params={"status": "approved"}, headers=auth_header(OWNER_ID))
+    assert availability(house_id, "2030-05-28", "2030-06-04") == "00111000"
+
+    response = client.delete(f"/api/booking{booking_id}", headers=auth_header(RENTER_ID))
+    assert response.status_code == 200
+    assert availability(house_id, "2030-05-28", "2030-06-04") == "00000000"
+
+
+def test_availability_window_is_bounded():
+    house_id = make_house()
+    response = client.get(f"/api/house{house_id}/availability", params={"from": "2030-01-01", "to": "2031-06-01"})
+    assert response.status_code == 400
+    assert client.get("/api/house999999/availability").status_code == 404
+
+
+def test_search_returns_only_houses_free_for_the_stay():
+    free_id = make_house()
+    taken_id = make_house()
+    book(taken_id, "2030-07-10T14:00:00", "2030-07-20T10:00:00")
+
+    params = {"checkin": "2030-07-12T14:00:00", "checkout": "2030-07-14T10:00:00", "location": "Kigali", "limit": 100}
+    ids = []
+    while True:
+        page = client.get("/api/house/available", params=params).json()
+        ids += [house["id"] for house in page["houses"]]
+        if page["next_cursor"] is None:
+            break
+        params["after"] = page["next_cursor"]
+    assert free_id in ids
+    assert taken_id not in ids
+
+    # the day the other stay checks out is free again
+    params = {"checkin": "2030-07-20T10:00:00", "checkout": "2030-07-22T10:00:00", "after": taken_id - 1, "limit": 1}
+    assert client.get("/api/house/available", params=params).json()["houses"][0]["id"] == taken_id
+
+
+def test_owner_sees_bookings_per_house():
+    db = SessionLocal()
+    owner_id = 9100
+    houses = [House(owner_id=owner_id, title=f"Villa {i}", address="KK 5 St", location="Rubavu", price=120, bedrooms=3, bathrooms=2) for i in range(3)]
+    db.add_all(houses)
+    if not db.get(Users, RENTER_ID):
+        db.add(Users(id=RENTER_ID, full_name="Eric Renter", email="eric@example.com"))
+    db.commit()
+    house_ids = [house.id for house in houses]
+    db.close()
+    book(house_ids[0], "2030-08-01T14:00:00", "2030-08-03T10:00:00")
+    book(house_ids[0], "2030-08-05T14:00:00", "2030-08-07T10:00:00")
+
+    response = client.get("/api/house/customers", params={"limit": 2}, headers=auth_header(owner_id))
+    assert response.status_code == 200
+    page = response.json()
+    assert [entry["house"]["id"] for entry in page["houses"]] == house_ids[:2]
+    assert len(page["houses"][0]["bookings"]) == 2
+    assert page["houses"][0]["bookings"][0]["user"] == {"id": RENTER_ID, "name": "Eric Renter", "email": "eric@example.com"}
+    assert page["houses"][1]["bookings"] == []
+
+    # a house lists its latest stays only, with the count of all of them
+    response = client.get("/api/house/customers", params={"limit": 1, "bookings_limit": 1}, headers=auth_header(owner_id))
+    entry = response.json()["houses"][0]
+    assert [booking["checkin"] for booking in entry["bookings"]] == ["2030-08-05T14:00:00"]
+    assert entry["bookings_total"] == 2
+
+    # with no bookings listed the houses still carry their counts
+    response = client.get("/api/house/customers", params={"limit": 2, "bookings_limit": 0}, headers=auth_header(owner_id))
+    entries = response.json()["houses"]
+    assert [entry["bookings"] for entry in entries] == [[], []]
+    assert [entry["bookings_total"] for entry in entries] == [2, 0]
+
+    response = client.get("/api/house/customers", params={"after": page["next_cursor"]}, headers=auth_header(owner_id))
+    page = response.json()
+    assert [entry["house"]["id"] for entry in page["houses"]] == house_ids[2:]
+    assert page["next_cursor"] is None
+
+    assert client.get("/api/house/customers", headers=auth_header(424242)).status_code == 404
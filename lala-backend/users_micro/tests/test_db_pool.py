@@ -0,0 +1,78 @@
+# users_micro/tests/test_db_pool.py
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, exc
+from sqlalchemy.orm import sessionmaker
+from main import app
+from db.connection import get_db, get_async_db
+from db.database import DATABASE_URL, MeasuredQueuePool, engine_options, pool_status
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def tiny_pool():
+    # one connection and no overflow, so holding it exhausts the pool
+    engine = create_engine(DATABASE_URL, poolclass=MeasuredQueuePool, pool_size=1, max_overflow=0, pool_timeout=0.05)
+    held = engine.connect()
+    tiny_session = sessionmaker(bind=engine)
+
+    def get_tiny_db():
+        db = tiny_session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = get_tiny_db
+    yield engine
+    app.dependency_overrides.pop(get_db, None)
+    held.close()
+    engine.dispose()
+
+
+def test_exhausted_pool_answers_503(tiny_pool):
+    response = client.get("/api/booking")
+    assert response.status_code == 503
+    assert int(response.headers["retry-after"]) >= 1
+
+    status = pool_status(tiny_pool)
+    assert (status["size"], status["checked_out"]) == (1, 1)
+    assert status["timeouts"] == 1
+
+
+def test_register_passes_pool_timeouts_on():
+    class ExhaustedSession:
+        async def execute(self, *args, **kwargs):
+            raise exc.TimeoutError("QueuePool limit of size 1 overflow 0 reached")
+
+        async def rollback(self):
+            pass
+
+    async def exhausted_db():
+        yield ExhaustedSession()
+
+    app.dependency_overrides[get_async_db] = exhausted_db
+    try:
+        response = client.post("/auth/register", json={"full_name": "Pool User", "email": "pool@example.com", "password": "pw"})
+    finally:
+        app.dependency_overrides.pop(get_async_db, None)
+    assert response.status_code == 503
+
+
+def test_health_reports_both_pools():
+    response = client.get("/health/db")
+    assert response.status_code == 200
+    assert set(response.json()) == {"sync", "async"}
+
+
+def test_pool_is_sized_to_the_connection_budget(monkeypatch):
+    from db import database
+
+    monkeypatch.setattr(database, "DB_MAX_CONNECTIONS", 8)
+    monkeypatch.setattr(database, "WEB_CONCURRENCY", 2)
+    options = engine_options("postgresql://user@db/lala")
+    # 8 connections over 2 workers with two engines each
+    assert options["pool_size"] + options["max_overflow"] == 2
+    assert options["pool_timeout"] == database.DB_POOL_TIMEOUT
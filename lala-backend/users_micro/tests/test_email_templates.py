@@ -0,0 +1,31 @@
+# users_micro/tests/test_email_templates.py
+
+from emailsTemps.registry import email_templates, render_email
+from emailsTemps.custom_email_send import custom_email
+
+
+def test_all_templates_compile():
+    email_templates.load()
+    assert "otp.html" in email_templates.templates
+    assert "base.html" in email_templates.templates
+
+
+def test_user_values_are_escaped():
+    html = render_email("booking_status.html", names="<script>x</script>", house_title="Villa & Co", status="approved")
+    assert "<script>" not in html
+    assert "&lt;script&gt;" in html
+    assert "Villa &amp; Co" in html
+
+
+def test_custom_email_keeps_caller_html():
+    html = custom_email("Aline", "Heading", "<b>bold</b>")
+    assert "<b>bold</b>" in html
+    assert "Hi Aline," in html
+
+
+def test_render_many():
+    recipients = [{"names": f"User {i}"} for i in range(3)]
+    messages = email_templates.render_many("booking_status.html", recipients, house_title="Villa", status="approved")
+    assert len(messages) == 3
+    assert "Hi User 2," in messages[2]
+    assert all("Your booking for Villa is now approved." in message for message in messages)
@@ -0,0 +1,79 @@
+# users_micro/tests/test_export.py
+
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from main import app
+from db.database import SessionLocal
+from models.userModels import House, Booking
+from Endpoints.auth import create_access_token
+from Endpoints.export_entry import stream_rows, BOOKING_COLUMNS
+
+client = TestClient(app)
+
+OWNER_ID = 9301
+OTHER_OWNER_ID = 9302
+
+
+def auth_header(user_id, role="host"):
+    token = create_access_token(f"user{user_id}@example.com", user_id, role, timedelta(minutes=5))
+    return {"Authorization": f"Bearer {token}"}
+
+
+def setup_module():
+    db = SessionLocal()
+    for owner_id in (OWNER_ID, OTHER_OWNER_ID):
+        house = House(owner_id=owner_id, title=f"Export {owner_id}", address="KN 1", location="Huye", price=40, bedrooms=1, bathrooms=1)
+        db.add(house)
+        db.flush()
+        start = datetime(2032, 3, 1)
+        for i, status in enumerate(["pending", "approved", "canceled"]):
+            db.add(Booking(house_id=house.id, user_id=1, status=status,
+                           checkin=start + timedelta(days=10 * i), checkout=start + timedelta(days=10 * i + 3)))
+    db.commit()
+    db.close()
+
+
+def test_host_exports_own_bookings_as_csv():
+    response = client.get("/api/export/bookings", headers=auth_header(OWNER_ID))
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "attachment" in response.headers["content-disposition"]
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 3
+    assert {row["owner_id"] for row in rows} == {str(OWNER_ID)}
+
+
+def test_ndjson_with_filters():
+    params = {"format": "ndjson", "status": "approved", "date_from": "2032-03-11", "date_to": "2032-03-12"}
+    response = client.get("/api/export/bookings", params=params, headers=auth_header(OWNER_ID))
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [(row["status"], row["checkin"]) for row in rows] == [("approved", "2032-03-11T00:00:00")]
+
+
+def test_status_filter_is_normalized():
+    params = {"format": "ndjson", "status": "cancel"}
+    response = client.get("/api/export/bookings", params=params, headers=auth_header(OWNER_ID))
+    assert [json.loads(line)["status"] for line in response.text.splitlines()] == ["canceled"]
+
+    params["status"] = "maybe"
+    assert client.get("/api/export/bookings", params=params, headers=auth_header(OWNER_ID)).status_code == 422
+
+
+def test_hosts_cannot_export_other_owners():
+    response = client.get("/api/export/houses", params={"owner_id": OTHER_OWNER_ID}, headers=auth_header(OWNER_ID))
+    assert response.status_code == 403
+    response = client.get("/api/export/houses", params={"owner_id": OTHER_OWNER_ID, "format": "ndjson"},
+                          headers=auth_header(1, "admin"))
+    assert [json.loads(line)["title"] for line in response.text.splitlines()] == [f"Export {OTHER_OWNER_ID}"]
+
+
+def test_rows_are_streamed_in_chunks():
+    statement = select(Booking.id, Booking.house_id, Booking.house_id, Booking.house_id, Booking.user_id,
+                       Booking.status, Booking.checkin, Booking.checkout, Booking.created_at).order_by(Booking.id)
+    chunks = list(stream_rows(statement, BOOKING_COLUMNS, "ndjson", chunk_size=2))
+    assert all(chunk.count(b"\n") <= 2 for chunk in chunks)
+    assert len(chunks) >= 3
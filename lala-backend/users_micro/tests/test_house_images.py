@@ -0,0 +1,154 @@
+# users_micro/tests/test_house_images.py
+
+import hashlib
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from fastapi.testclient import TestClient
+from PIL import Image
+from main import app
+from db.database import SessionLocal
+from models.userModels import House, HouseImage
+from Endpoints import image_entry
+from functions import image_store
+from Endpoints.auth import create_access_token
+
+client = TestClient(app)
+
+OWNER_ID = 9201
+
+
+def auth_header(user_id):
+    token = create_access_token(f"user{user_id}@example.com", user_id, "host", timedelta(minutes=5))
+    return {"Authorization": f"Bearer {token}"}
+
+
+def make_house():
+    db = SessionLocal()
+    house = House(owner_id=OWNER_ID, title="Hill side", address="KK 7 Rd", location="Kigali", price=90, bedrooms=3, bathrooms=2)
+    db.add(house)
+    db.commit()
+    house_id = house.id
+    db.close()
+    return house_id
+
+
+def png(width, height, color="red"):
+    data = io.BytesIO()
+    Image.new("RGB", (width, height), color).save(data, "PNG")
+    return data.getvalue()
+
+
+def upload(house_id, *files):
+    return client.post(
+        f"/api/house{house_id}/images",
+        files=[("files", (f"photo{i}.png", data, "image/png")) for i, data in enumerate(files)],
+        headers=auth_header(OWNER_ID),
+    )
+
+
+def test_upload_makes_thumbnails_and_sets_image_url():
+    house_id = make_house()
+    response = upload(house_id, png(1200, 800), png(200, 100, "blue"))
+    assert response.status_code == 200
+    first, second = response.json()
+    assert (first["position"], second["position"]) == (0, 1)
+
+    images = client.get(f"/api/house{house_id}/images").json()
+    assert images[0]["status"] == "ready"
+    assert list(images[0]["thumbnails"]) == ["320", "960"]
+    # a photo smaller than the first width only gets one copy
+    assert list(images[1]["thumbnails"]) == ["320"]
+
+    thumb = client.get(images[0]["thumbnails"]["320"])
+    assert thumb.headers["content-type"] == "image/webp"
+    assert "immutable" in thumb.headers["cache-control"]
+    assert Image.open(io.BytesIO(thumb.content)).width == 320
+
+    # the listing now points at the large webp copy instead of the original
+    assert client.get(f"/api/house{house_id}").json()["image_url"] == images[0]["thumbnails"]["960"]
+
+
+def test_same_photo_is_stored_once_and_kept_while_used():
+    photo = png(400, 300, "green")
+    house_a, house_b = make_house(), make_house()
+    a = upload(house_a, photo).json()[0]
+    b = upload(house_b, photo).json()[0]
+    assert a["sha256"] == b["sha256"]
+    assert a["url"] == b["url"]
+
+    client.delete(f"/api/house{house_a}/images/{a['id']}", headers=auth_header(OWNER_ID))
+    assert client.get(b["url"]).status_code == 200
+    client.delete(f"/api/house{house_b}/images/{b['id']}", headers=auth_header(OWNER_ID))
+    assert client.get(b["url"]).status_code == 404
+
+
+def test_deleting_a_house_removes_its_photos():
+    photo, shared = png(300, 200, "purple"), png(300, 200, "orange")
+    house_id, other = make_house(), make_house()
+    own = upload(house_id, photo, shared).json()
+    kept = upload(other, shared).json()[0]
+
+    assert client.delete(f"/api/house{house_id}", headers=auth_header(OWNER_ID)).status_code == 200
+    db = SessionLocal()
+    assert db.query(HouseImage).filter(HouseImage.house_id == house_id).count() == 0
+    db.close()
+    assert client.get(own[0]["url"]).status_code == 404
+    # still shown by the other house
+    assert client.get(kept["url"]).status_code == 200
+
+
+def test_upload_restores_a_file_removed_meanwhile(monkeypatch):
+    # as if the file existed when the upload checked and a concurrent delete
+    # removed it before the upload committed
+    real_store = image_entry.store_original
+    calls = []
+
+    def store_nothing_first(data, extension):
+        calls.append(1)
+        if len(calls) == 1:
+            return hashlib.sha256(data).hexdigest()
+        return real_store(data, extension)
+
+    monkeypatch.setattr(image_entry, "store_original", store_nothing_first)
+    image = upload(make_house(), png(120, 80, "teal")).json()[0]
+    assert client.get(image["url"]).status_code == 200
+
+
+def test_concurrent_variants_of_the_same_photo():
+    # two workers making the thumbnails of one photo must not share a temp file
+    sha256 = image_store.store_original(png(1000, 600, "olive"), "png")
+    with ThreadPoolExecutor(4) as pool:
+        results = list(pool.map(lambda _: image_store.make_variants(sha256, "png", (320, 960)), range(4)))
+    assert results == [[320, 960]] * 4
+
+    for width in (320, 960):
+        path = image_store.media_path(image_store.variant_name(sha256, width))
+        with Image.open(path) as variant:
+            assert variant.width == width
+    assert not [name for name in os.listdir(os.path.dirname(path)) if name.endswith(".part")]
+
+
+def test_range_requests():
+    house_id = make_house()
+    image = upload(house_id, png(50, 50)).json()[0]
+    response = client.get(image["url"], headers={"Range": "bytes=0-7"})
+    assert response.status_code == 206
+    assert response.content == b"\x89PNG\r\n\x1a\n"
+
+
+def test_rejects_non_images_and_other_owners():
+    house_id = make_house()
+    response = client.post(
+        f"/api/house{house_id}/images",
+        files=[("files", ("notes.txt", b"hello", "image/png"))],
+        headers=auth_header(OWNER_ID),
+    )
+    assert response.status_code == 415
+    response = client.post(
+        f"/api/house{house_id}/images",
+        files=[("files", ("a.png", png(10, 10), "image/png"))],
+        headers=auth_header(OWNER_ID + 1),
+    )
+    assert response.status_code == 403
@@ -0,0 +1,86 @@
+# users_micro/tests/test_house_import.py
+
+import json
+from datetime import timedelta
+from fastapi.testclient import TestClient
+from main import app
+from db.database import SessionLocal
+from models.userModels import House
+from Endpoints.auth import create_access_token
+from functions.house_import import import_houses
+
+client = TestClient(app)
+
+OWNER_ID = 9401
+
+
+def auth_header(user_id):
+    token = create_access_token(f"user{user_id}@example.com", user_id, "host", timedelta(minutes=5))
+    return {"Authorization": f"Bearer {token}"}
+
+
+def owned_titles(owner_id):
+    db = SessionLocal()
+    titles = [title for (title,) in db.query(House.title).filter(House.owner_id == owner_id).order_by(House.id)]
+    db.close()
+    return titles
+
+
+def test_csv_import_reports_bad_rows():
+    csv_file = (
+        "title,address,location,price,bedrooms,bathrooms,size,furnished\n"
+        "Csv one,KG 1,Kigali,100,2,1,55.5,true\n"
+        "Csv bad,KG 2,Kigali,cheap,2,1,,false\n"
+        "Csv two,KG 3,Musanze,80,1,1,,\n"
+    )
+    response = client.post("/api/house/import", files={"file": ("houses.csv", csv_file, "text/csv")},
+                           headers=auth_header(OWNER_ID))
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["imported"], report["failed"]) == (2, 1)
+    assert report["errors"][0]["row"] == 2
+    assert report["errors"][0]["errors"][0].startswith("price")
+    assert owned_titles(OWNER_ID) == ["Csv one", "Csv two"]
+
+
+def test_json_import():
+    rows = [
+        {"title": "Json one", "address": "KN 1", "location": "Huye", "price": 70, "bedrooms": 1, "bathrooms": 1},
+        {"title": "Json bad", "address": "KN 2"},
+        "not an object",
+    ]
+    response = client.post("/api/house/import", files={"file": ("houses.json", json.dumps(rows), "application/json")},
+                           headers=auth_header(OWNER_ID + 1))
+    report = response.json()
+    assert (report["imported"], report["failed"]) == (1, 2)
+    assert [error["row"] for error in report["errors"]] == [2, 3]
+    assert owned_titles(OWNER_ID + 1) == ["Json one"]
+
+    response = client.post("/api/house/import", files={"file": ("houses.json", "{}", "application/json")},
+                           headers=auth_header(OWNER_ID + 1))
+    assert response.status_code == 400
+
+
+def test_rows_are_inserted_in_chunks():
+    rows = [{"title": f"Chunk {i}", "address": "KK 1", "location": "Rubavu", "price": 50, "bedrooms": 1, "bathrooms": 1}
+            for i in range(7)]
+    db = SessionLocal()
+    report = import_houses(db, OWNER_ID + 2, iter(rows), chunk_size=3, max_errors=0)
+    db.close()
+    assert report == {"imported": 7, "failed": 0, "errors": [], "rows_read": 7, "error": None}
+    assert len(owned_titles(OWNER_ID + 2)) == 7
+
+
+def test_file_breaking_off_reports_what_was_imported():
+    rows = [{"title": f"Cut {i}", "address": "KK 2", "location": "Huye", "price": 60, "bedrooms": 1, "bathrooms": 1}
+            for i in range(5)]
+    # three complete items, then the array breaks off inside the fourth
+    body = json.dumps(rows)
+    body = body[: body.index('{"title": "Cut 3"') + 10]
+    response = client.post("/api/house/import", files={"file": ("houses.json", body, "application/json")},
+                           params={"format": "json"}, headers=auth_header(OWNER_ID + 3))
+    assert response.status_code == 400
+    report = response.json()
+    assert (report["imported"], report["rows_read"]) == (3, 3)
+    assert report["error"].startswith("Could not read the json file")
+    assert owned_titles(OWNER_ID + 3) == ["Cut 0", "Cut 1", "Cut 2"]
@@ -0,0 +1,156 @@
+# users_micro/tests/test_house_listing.py
+
+import fnmatch
+from datetime import timedelta
+from fastapi.testclient import TestClient
+from main import app
+from db.database import SessionLocal
+from models.userModels import House
+from Endpoints.auth import create_access_token
+from Endpoints.house_entry import invalidate_houses
+from functions.response_cache import response_cache, ResponseCache, RedisBackend
+
+client = TestClient(app)
+
+
+def setup_module():
+    db = SessionLocal()
+    db.query(House).delete()
+    for i in range(25):
+        db.add(House(
+            owner_id=1,
+            title=f"House {i}",
+            address="KG 1 Ave",
+            location="Kigali" if i % 2 == 0 else "Musanze",
+            price=100 + i * 10,
+            bedrooms=1 + i % 4,
+            bathrooms=1 + i % 2,
+            size=50 + i,
+            furnished=i % 3 == 0,
+            available=i != 24,
+        ))
+    db.commit()
+    db.close()
+    # rows were written behind the endpoints' back
+    response_cache.clear()
+
+
+def test_house_listing_pages_with_cursor():
+    seen = []
+    after = None
+    while True:
+        params = {"limit": 10}
+        if after is not None:
+            params["after"] = after
+        response = client.get("/api/house", params=params)
+        assert response.status_code == 200
+        page = response.json()
+        seen += [house["id"] for house in page["houses"]]
+        after = page["next_cursor"]
+        if after is None:
+            break
+    # the unavailable house is never listed and no id repeats across pages
+    assert len(seen) == 24
+    assert seen == sorted(set(seen))
+
+
+def test_house_listing_filters():
+    response = client.get(
+        "/api/house",
+        params={"location": "Kigali", "min_price": 150, "max_price": 300, "min_bedrooms": 2},
+    )
+    assert response.status_code == 200
+    houses = response.json()["houses"]
+    # of the seeded houses only these four are in Kigali, priced 150 to 300
+    # and have two bedrooms or more; House 4 is too cheap, House 8 has one
+    # bedroom and House 7 is in Musanze
+    assert sorted(house["title"] for house in houses) == ["House 10", "House 14", "House 18", "House 6"]
+    for house in houses:
+        assert house["location"] == "Kigali"
+        assert 150 <= house["price"] <= 300
+        assert house["bedrooms"] >= 2
+
+    response = client.get("/api/house", params={"location": "Musanze", "furnished": True, "min_size": 60})
+    # odd i, i % 3 == 0 and size 50 + i >= 60: House 15 and House 21
+    assert sorted(house["title"] for house in response.json()["houses"]) == ["House 15", "House 21"]
+
+
+def test_house_listing_page_size_is_bounded():
+    response = client.get("/api/house", params={"limit": 1000})
+    assert response.status_code == 422
+
+
+def test_listing_etag_and_invalidation():
+    response = client.get("/api/house", params={"location": "Kigali", "limit": 5})
+    etag = response.headers["etag"]
+    assert client.get("/api/house", params={"location": "Kigali", "limit": 5}, headers={"If-None-Match": etag}).status_code == 304
+
+    db = SessionLocal()
+    house = db.query(House).filter(House.location == "Kigali").order_by(House.id).first()
+    house_id = house.id
+    db.close()
+    house_etag = client.get(f"/api/house{house_id}").headers["etag"]
+
+    # a write through the API drops the cached listing and house
+    token = create_access_token("owner1@example.com", 1, "host", timedelta(minutes=5))
+    update = {"title": "Renamed", "address": "KG 1 Ave", "location": "Kigali", "price": 100, "bedrooms": 1, "bathrooms": 1}
+    assert client.put(f"/api/house{house_id}", json=update, headers={"Authorization": f"Bearer {token}"}).status_code == 200
+
+    response = client.get("/api/house", params={"location": "Kigali", "limit": 5}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["houses"][0]["title"] == "Renamed"
+    response = client.get(f"/api/house{house_id}", headers={"If-None-Match": house_etag})
+    assert response.status_code == 200
+    assert response.json()["title"] == "Renamed"
+
+
+class DictRedis:
+    # just enough of the redis client API for RedisBackend
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1).encode()
+        return int(self.data[key])
+
+    def scan_iter(self, match, count=None):
+        return [key for key in list(self.data) if fnmatch.fnmatchcase(key, match)]
+
+
+def test_redis_backend_shares_invalidation():
+    store = DictRedis()
+    worker_a = ResponseCache(RedisBackend(store))
+    worker_b = ResponseCache(RedisBackend(store))
+    key = worker_a.key("houses", "list", 1)
+    assert worker_b.key("houses", "list", 1) == key
+    worker_b.invalidate("houses")
+    assert worker_a.key("houses", "list", 1) != key
+
+
+def test_redis_clear_keeps_other_keys():
+    store = DictRedis()
+    store.set("sessions:42", b"someone else's")
+    cache = ResponseCache(RedisBackend(store))
+    cache.backend.set(cache.key("houses", "list", 1), b"page", 30)
+    cache.clear()
+    assert store.data == {"sessions:42": b"someone else's"}
+
+
+def test_stale_house_built_before_an_update_is_not_served():
+    house_id = client.get("/api/house", params={"limit": 1}).json()["houses"][0]["id"]
+    # a read that computed its key before the update committed ...
+    stale_key = response_cache.key("houses", "house", house_id)
+    invalidate_houses()
+    # ... and stores the old row after the invalidation
+    response_cache.backend.set(stale_key, b'"stale"\n{"title": "stale"}', 30)
+    assert client.get(f"/api/house{house_id}").json()["title"] != "stale"
@@ -0,0 +1,32 @@
+# users_micro/tests/test_load_test.py
+
+import importlib
+
+
+def test_load_test_reports_latency_percentiles(monkeypatch):
+    # a configured SMTP_HOST keeps the harness from starting its own sink
+    monkeypatch.setenv("SMTP_HOST", "localhost")
+    load_test = importlib.import_module("benchmarks.load_test")
+
+    report = load_test.main([
+        "--users", "20", "--houses", "10", "--bookings", "40",
+        "--concurrency", "4", "--duration", "0", "--requests", "60",
+    ])
+
+    assert report["total"]["requests"] == 60
+    assert set(report["scenarios"]) == {"list_houses", "user_bookings", "house_customers", "create_booking", "login"}
+    for name, scenario in report["scenarios"].items():
+        assert set(scenario["statuses"]) <= {"200", "409"}, (name, scenario["statuses"])
+        if scenario["requests"]:
+            assert scenario["p50_ms"] <= scenario["p95_ms"] <= scenario["p99_ms"] <= scenario["max_ms"]
+
+
+def test_percentile_uses_nearest_rank():
+    from benchmarks.load_test import percentile
+
+    ordered = list(range(1, 101))
+    assert percentile(ordered, 0.50) == 50
+    assert percentile(ordered, 0.95) == 95
+    assert percentile(ordered, 0.99) == 99
+    assert percentile([7], 0.99) == 7
+    assert percentile([], 0.5) is None
@@ -0,0 +1,112 @@
+# users_micro/tests/test_mail_queue.py
+
+import pytest
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+
+from main import app
+from db.database import SessionLocal
+from models.userModels import EmailOutbox
+from functions.send_mail import queue_email
+from functions.mail_worker import SMTPConnection, claim_batch, mail_workers, process_outbox
+
+
+class CollectingHandler:
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        return "250 OK"
+
+
+@pytest.fixture
+def smtp_server():
+    handler = CollectingHandler()
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    controller = aiosmtpd_controller.Controller(handler, hostname="127.0.0.1", port=port)
+    controller.start()
+    yield controller, handler
+    controller.stop()
+
+
+@pytest.fixture(autouse=True)
+def empty_outbox():
+    db = SessionLocal()
+    db.query(EmailOutbox).delete()
+    db.commit()
+    db.close()
+
+
+def queue(count):
+    db = SessionLocal()
+    for i in range(count):
+        queue_email(db, f"renter{i}@example.com", "Booking Status Update", f"<p>message {i}</p>")
+    db.commit()
+    db.close()
+
+
+def test_outbox_is_delivered_over_one_connection(smtp_server):
+    controller, handler = smtp_server
+    queue(3)
+
+    connection = SMTPConnection(host=controller.hostname, port=controller.port, starttls=False, username="")
+    assert process_outbox(connection) == 3
+    connection.close()
+
+    assert sorted(m.rcpt_tos[0] for m in handler.messages) == [f"renter{i}@example.com" for i in range(3)]
+    db = SessionLocal()
+    assert {o.status for o in db.query(EmailOutbox).all()} == {"sent"}
+    db.close()
+
+
+def test_failed_delivery_is_retried_later():
+    queue(1)
+
+    # nothing listens on this port, so delivery fails and is rescheduled
+    connection = SMTPConnection(host="127.0.0.1", port=1, starttls=False, username="")
+    assert process_outbox(connection) == 1
+
+    db = SessionLocal()
+    outbox = db.query(EmailOutbox).one()
+    assert outbox.status == "pending"
+    assert outbox.attempts == 1
+    assert outbox.last_error
+    assert outbox.next_attempt_at > datetime.utcnow()
+    db.close()
+
+    # not due yet, so the next pass leaves it alone
+    assert process_outbox(connection) == 0
+
+
+def test_concurrent_claims_never_share_a_message():
+    queue(40)
+
+    def claim(_):
+        db = SessionLocal()
+        try:
+            return [outbox.id for outbox in claim_batch(db, batch_size=10)]
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=6) as pool:
+        claimed = [outbox_id for batch in pool.map(claim, range(6)) for outbox_id in batch]
+    assert len(claimed) == len(set(claimed)) == 40
+
+
+def test_one_wakeup_per_commit(monkeypatch):
+    wakeups = []
+    monkeypatch.setattr(mail_workers, "wake", lambda: wakeups.append(1))
+    db = SessionLocal()
+    for i in range(3):
+        queue_email(db, f"renter{i}@example.com", "Hello", "<p>hi</p>")
+    db.commit()
+    queue_email(db, "renter9@example.com", "Hello", "<p>hi</p>")
+    db.commit()
+    db.close()
+    assert len(wakeups) == 2
@@ -0,0 +1,75 @@
+# users_micro/tests/test_metrics.py
+
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+from main import app
+from functions.metrics import Histogram, registry
+from functions.mail_worker import deliver_batch
+
+client = TestClient(app)
+
+
+def metric_value(text, line_prefix):
+    for line in text.splitlines():
+        if line.startswith(line_prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return None
+
+
+def test_requests_are_counted_per_route_template():
+    registry.clear()
+    client.get("/api/house999998")
+    client.get("/api/house999999")
+    client.get("/no/such/page")
+
+    text = client.get("/metrics").text
+    # both ids land on the route template, unknown paths share one label
+    assert metric_value(text, 'http_requests_total{method="GET",route="/api/house{house_id}",status="404"}') == 2
+    assert metric_value(text, 'http_requests_total{method="GET",route="unmatched",status="404"}') == 1
+    assert metric_value(text, 'http_request_duration_seconds_count{method="GET",route="/api/house{house_id}"}') == 2
+    assert "# TYPE http_requests_in_flight gauge" in text
+
+
+def test_sql_statements_are_charged_to_the_request():
+    registry.clear()
+    client.get("/api/house", params={"limit": 5})
+
+    text = client.get("/metrics").text
+    assert metric_value(text, 'db_queries_per_request_count{route="/api/house"}') == 1
+    assert metric_value(text, 'db_queries_per_request_sum{route="/api/house"}') >= 1
+    assert metric_value(text, 'db_queries_per_request_bucket{route="/api/house",le="0"}') == 0
+    assert "db_statement_duration_seconds_count{engine=" in text
+
+
+def test_email_send_durations_are_observed():
+    registry.clear()
+
+    class Connection:
+        def send(self, recipient, msg):
+            if recipient.startswith("bad"):
+                raise OSError("refused")
+
+        def close(self):
+            pass
+
+    db = SimpleNamespace(commit=lambda: None)
+    batch = [
+        SimpleNamespace(id=i, recipient=recipient, subject="Hi", body="<p>Hi</p>", attempts=1, last_error=None)
+        for i, recipient in enumerate(["good@example.com", "good2@example.com", "bad@example.com"])
+    ]
+    deliver_batch(db, Connection(), batch)
+
+    text = registry.render()
+    assert metric_value(text, 'email_send_duration_seconds_count{outcome="sent"}') == 2
+    assert metric_value(text, 'email_send_duration_seconds_count{outcome="failed"}') == 1
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("demo_seconds", "Demo.", ("route",), buckets=(0.1, 1))
+    for value in (0.05, 0.5, 0.5, 5):
+        histogram.observe(value, "/x")
+    lines = histogram.render()
+    assert 'demo_seconds_bucket{route="/x",le="0.1"} 1' in lines
+    assert 'demo_seconds_bucket{route="/x",le="1"} 3' in lines
+    assert 'demo_seconds_bucket{route="/x",le="+Inf"} 4' in lines
+    assert 'demo_seconds_sum{route="/x"} 6.05' in lines
@@ -0,0 +1,81 @@
+# users_micro/tests/test_migrations.py
+
+import os
+from datetime import datetime
+import pytest
+import sqlalchemy as sa
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from db.database import Base
+import models.userModels  # noqa: F401
+
+ALEMBIC_INI = os.path.join(os.path.dirname(os.path.dirname(__file__)), "alembic.ini")
+
+
+@pytest.fixture
+def database(tmp_path):
+    url = f"sqlite:///{tmp_path / 'migrations.db'}"
+    config = Config(ALEMBIC_INI)
+    config.set_main_option("sqlalchemy.url", url)
+    engine = sa.create_engine(url)
+    yield config, engine
+    engine.dispose()
+
+
+def test_head_matches_the_models(database):
+    config, engine = database
+    command.upgrade(config, "head")
+    with engine.connect() as conn:
+        assert compare_metadata(MigrationContext.configure(conn), Base.metadata) == []
+
+
+def test_upgrade_from_baseline_keeps_and_backfills_data(database):
+    config, engine = database
+    command.upgrade(config, "0001")
+    with engine.begin() as conn:
+        conn.execute(sa.text(
+            "INSERT INTO users (id, email, phone, id_number, role) VALUES "
+            "(1, 'a@example.com', '', '', 'renter'), (2, 'b@example.com', '', '', 'host')"
+        ))
+        conn.execute(sa.text(
+            "INSERT INTO houses (id, owner_id, title, address, location, price, bedrooms, bathrooms) "
+            "VALUES (1, 2, 'Loft', 'KN 1', 'Kigali', 100, 1, 1)"
+        ))
+        conn.execute(sa.text(
+            "INSERT INTO bookings (house_id, user_id, status, checkin, checkout) VALUES "
+            "(1, 1, 'Approved', :a, :b), (1, 1, 'cancelled', :c, :d)"
+        ), {
+            "a": datetime(2026, 1, 30), "b": datetime(2026, 2, 2),
+            "c": datetime(2026, 3, 1), "d": datetime(2026, 3, 5),
+        })
+
+    command.upgrade(config, "head")
+    with engine.connect() as conn:
+        users = conn.execute(sa.text("SELECT phone, id_number, email_confirm FROM users ORDER BY id")).all()
+        assert users == [(None, None, 0), (None, None, 0)]
+        occupancy = conn.execute(sa.text("SELECT month, days FROM house_occupancy ORDER BY month")).all()
+        # nights of Jan 30, Jan 31 and Feb 1; the cancelled stay is left out
+        assert occupancy == [(2026 * 12, 0b11 << 29), (2026 * 12 + 1, 0b1)]
+        statuses = conn.execute(sa.text("SELECT status FROM bookings ORDER BY id")).scalars().all()
+        assert statuses == ["approved", "canceled"]
+
+    with engine.begin() as conn, pytest.raises(sa.exc.IntegrityError):
+        conn.execute(sa.text("INSERT INTO users (email) VALUES ('a@example.com')"))
+
+
+def test_duplicates_stop_the_upgrade(database):
+    config, engine = database
+    command.upgrade(config, "0002")
+    with engine.begin() as conn:
+        conn.execute(sa.text("INSERT INTO users (email, phone) VALUES ('a@example.com', '0788'), ('b@example.com', '0788')"))
+    with pytest.raises(RuntimeError, match="users.phone has duplicates"):
+        command.upgrade(config, "head")
+
+
+def test_downgrade_to_base(database):
+    config, engine = database
+    command.upgrade(config, "head")
+    command.downgrade(config, "base")
+    assert sa.inspect(engine).get_table_names() == ["alembic_version"]
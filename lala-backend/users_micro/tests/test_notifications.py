@@ -0,0 +1,78 @@
+# users_micro/tests/test_notifications.py
+
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from main import app
+from db.database import SessionLocal
+from models.userModels import House, Booking, Users, EmailOutbox, NotificationJob
+from Endpoints.auth import create_access_token
+from functions.notifications import fan_out
+
+client = TestClient(app)
+
+HOST_ID = 9101
+
+
+def auth_header(user_id, role):
+    token = create_access_token(f"user{user_id}@example.com", user_id, role, timedelta(minutes=5))
+    return {"Authorization": f"Bearer {token}"}
+
+
+def outbox_recipients(job_id):
+    db = SessionLocal()
+    rows = db.query(EmailOutbox).filter(EmailOutbox.job_id == job_id).all()
+    db.close()
+    return rows
+
+
+def test_host_notifies_renters_with_pending_bookings():
+    db = SessionLocal()
+    house = House(owner_id=HOST_ID, title="Garden flat", address="KG 5 Ave", location="Kigali", price=60, bedrooms=1, bathrooms=1)
+    db.add(house)
+    db.add_all([Users(id=9111 + i, full_name=f"Renter {i}", email=f"renter{i}@notify.test") for i in range(3)])
+    db.flush()
+    start = datetime(2031, 1, 1)
+    for user_id, status, days in [(9111, "pending", 0), (9111, "pending", 10), (9112, "pending", 20), (9113, "approved", 30)]:
+        db.add(Booking(house_id=house.id, user_id=user_id, status=status,
+                       checkin=start + timedelta(days=days), checkout=start + timedelta(days=days + 2)))
+    db.commit()
+    db.close()
+
+    body = {"audience": "pending_renters", "subject": "Check-in times", "message": "Check-in is from <2pm>"}
+    response = client.post("/api/notifications", json=body, headers=auth_header(HOST_ID, "host"))
+    assert response.status_code == 202
+    job_id = response.json()["id"]
+
+    # the background fan-out has run by the time TestClient returns
+    progress = client.get(f"/api/notifications/{job_id}", headers=auth_header(HOST_ID, "host")).json()
+    assert progress["status"] == "completed"
+    assert progress["queued"] == 2
+    messages = outbox_recipients(job_id)
+    assert sorted(message.recipient for message in messages) == ["renter0@notify.test", "renter1@notify.test"]
+    assert "Check-in is from &lt;2pm&gt;" in messages[0].body
+
+    assert client.get(f"/api/notifications/{job_id}", headers=auth_header(9111, "renter")).status_code == 403
+
+
+def test_only_admins_notify_a_location():
+    body = {"audience": "location", "location": "Musanze", "subject": "Hi", "message": "Hello"}
+    assert client.post("/api/notifications", json=body, headers=auth_header(HOST_ID, "host")).status_code == 403
+
+
+def test_fan_out_streams_in_chunks():
+    db = SessionLocal()
+    db.add_all([Users(full_name=f"Local {i}", email=f"local{i}@notify.test", location="Rubavu") for i in range(7)])
+    db.add(Users(full_name="No email", location="Rubavu"))
+    job = NotificationJob(created_by=1, audience="location", location="Rubavu", subject="News", message="Hello")
+    db.add(job)
+    db.commit()
+    job_id = job.id
+    db.close()
+
+    fan_out(job_id, chunk_size=3)
+
+    db = SessionLocal()
+    job = db.get(NotificationJob, job_id)
+    assert (job.status, job.queued) == ("completed", 7)
+    db.close()
+    assert len(outbox_recipients(job_id)) == 7
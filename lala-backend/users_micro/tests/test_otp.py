@@ -0,0 +1,142 @@
+# users_micro/tests/test_otp.py
+
+import asyncio
+import pytest
+from datetime import datetime, timedelta
+from fastapi.testclient import TestClient
+from main import app
+from db.database import SessionLocal
+from models.userModels import Users, OTP
+from functions import otp_store as store
+from functions.rate_limit import RateLimiter
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture(autouse=True)
+def reset_limits():
+    store.account_send_limit.clear()
+    store.ip_send_limit.clear()
+
+
+def make_user(email):
+    db = SessionLocal()
+    user = Users(full_name="Otp User", email=email)
+    db.add(user)
+    db.commit()
+    user_id = user.id
+    db.close()
+    return user_id
+
+
+def current_otp(user_id):
+    db = SessionLocal()
+    rows = db.query(OTP).filter(OTP.account_id == user_id).all()
+    db.close()
+    return rows
+
+
+def test_send_replaces_code_and_verify_consumes_it(client):
+    user_id = make_user("otp1@example.com")
+    for _ in range(2):
+        response = client.post("/auth/send-otp/", json={"purpose": "login", "toEmail": "otp1@example.com"})
+        assert response.status_code == 200
+    rows = current_otp(user_id)
+    assert len(rows) == 1
+    assert rows[0].verification_code == str(response.json()["verification_Code"])
+    assert rows[0].expires_at > datetime.utcnow()
+
+    verify = {"otp_code": rows[0].otp_code, "verification_code": rows[0].verification_code, "email": "otp1@example.com"}
+    assert client.post("/auth/verify-otp", json=verify).status_code == 200
+    assert current_otp(user_id) == []
+    assert client.post("/auth/verify-otp", json=verify).status_code == 404
+
+
+def test_send_is_rate_limited_per_account(client):
+    make_user("otp2@example.com")
+    codes = [
+        client.post("/auth/send-otp/", json={"purpose": "login", "toEmail": "otp2@example.com"}).status_code
+        for _ in range(store.OTP_SEND_LIMIT_PER_ACCOUNT + 1)
+    ]
+    assert codes[-1] == 429
+    assert codes[:-1] == [200] * store.OTP_SEND_LIMIT_PER_ACCOUNT
+
+
+def test_wrong_guesses_burn_the_code(client):
+    user_id = make_user("otp3@example.com")
+    client.post("/auth/send-otp/", json={"purpose": "login", "toEmail": "otp3@example.com"})
+    otp = current_otp(user_id)[0]
+    wrong = {"otp_code": "000000", "verification_code": otp.verification_code, "email": "otp3@example.com"}
+    codes = [client.post("/auth/verify-otp", json=wrong).status_code for _ in range(store.OTP_MAX_ATTEMPTS)]
+    assert codes == [404] * (store.OTP_MAX_ATTEMPTS - 1) + [429]
+
+    # the right code no longer works either
+    right = dict(wrong, otp_code=otp.otp_code)
+    assert client.post("/auth/verify-otp", json=right).status_code == 404
+
+
+def test_attempts_are_counted_in_the_database(client):
+    user_id = make_user("otp5@example.com")
+    client.post("/auth/send-otp/", json={"purpose": "login", "toEmail": "otp5@example.com"})
+    otp = current_otp(user_id)[0]
+    # as if concurrent wrong guesses had used up the code meanwhile
+    db = SessionLocal()
+    db.query(OTP).filter(OTP.id == otp.id).update({"attempts": store.OTP_MAX_ATTEMPTS})
+    db.commit()
+    db.close()
+
+    right = {"otp_code": otp.otp_code, "verification_code": otp.verification_code, "email": "otp5@example.com"}
+    assert client.post("/auth/verify-otp", json=right).status_code == 404
+    assert current_otp(user_id) == []
+
+
+def test_expired_codes_are_rejected_and_purged(client):
+    user_id = make_user("otp4@example.com")
+    db = SessionLocal()
+    db.add(OTP(account_id=user_id, otp_code="123456", verification_code="1234567", purpose="login",
+               expires_at=datetime.utcnow() - timedelta(seconds=1)))
+    db.commit()
+    db.close()
+
+    assert store.otp_store.purge(batch=1) >= 1
+    assert current_otp(user_id) == []
+
+
+def test_rows_from_before_expires_at_are_purged(client):
+    old_id, recent_id = make_user("otp6@example.com"), make_user("otp7@example.com")
+    db = SessionLocal()
+    sent = datetime.utcnow() - timedelta(seconds=store.OTP_TTL_SECONDS + 1)
+    db.add(OTP(account_id=old_id, otp_code="123456", verification_code="1234567", purpose="login", date=sent))
+    db.add(OTP(account_id=recent_id, otp_code="123456", verification_code="1234567", purpose="login"))
+    db.commit()
+    db.close()
+
+    store.otp_store.purge()
+    assert current_otp(old_id) == []
+    assert len(current_otp(recent_id)) == 1
+
+
+def test_memory_store():
+    memory = store.MemoryOTPStore(ttl=60)
+
+    async def run():
+        await memory.issue(None, 1, 111111, 2222222, "reset")
+        with pytest.raises(Exception):
+            await memory.verify(None, 1, "999999", "2222222")
+        assert await memory.verify(None, 1, "111111", "2222222") == "reset"
+        with pytest.raises(Exception):
+            await memory.verify(None, 1, "111111", "2222222")
+
+    asyncio.run(run())
+
+
+def test_rate_limiter_window():
+    limiter = RateLimiter(limit=2, window=60)
+    assert limiter.retry_after("a") == 0
+    assert limiter.retry_after("a") == 0
+    assert 0 < limiter.retry_after("a") <= 60
+    assert limiter.retry_after("b") == 0
@@ -0,0 +1,108 @@
+# users_micro/tests/test_profiling.py
+
+import json
+import logging
+from datetime import timedelta
+import pytest
+from fastapi.testclient import TestClient
+from main import app
+from Endpoints.auth import create_access_token
+from functions.profiling import sql_profiler
+from functions.response_cache import response_cache
+from db.database import get_engine
+
+client = TestClient(app)
+
+
+def auth_header(role):
+    token = create_access_token("profiler@example.com", 1, role, timedelta(minutes=5))
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def profiling():
+    saved = sql_profiler.enabled, sql_profiler.slow_ms, sql_profiler.explain, sql_profiler.log_parameters
+    sql_profiler.enabled = True
+    sql_profiler.clear()
+    # cached listings would answer without touching the database
+    response_cache.clear()
+    yield sql_profiler
+    sql_profiler.enabled, sql_profiler.slow_ms, sql_profiler.explain, sql_profiler.log_parameters = saved
+    sql_profiler.clear()
+
+
+def test_profile_header_returns_the_request_breakdown(profiling):
+    response = client.get("/api/house", params={"limit": 5}, headers={"X-Profile": "1", **auth_header("admin")})
+    assert response.status_code == 200
+    assert response.headers["server-timing"].startswith("db;dur=")
+    profile = json.loads(response.headers["x-sql-profile"])
+    assert profile["queries"] >= 1
+    assert "house" in profile["statements"][0]["sql"].lower()
+
+    # without the header the response stays as it was
+    response_cache.clear()
+    assert "x-sql-profile" not in client.get("/api/house", params={"limit": 5}).headers
+
+
+def test_profile_header_is_for_admins_only(profiling):
+    for headers in ({}, auth_header("host"), {"Authorization": "Bearer not-a-token"}):
+        response_cache.clear()
+        response = client.get("/api/house", params={"limit": 5}, headers={"X-Profile": "1", **headers})
+        assert response.status_code == 200
+        assert "x-sql-profile" not in response.headers
+        assert "server-timing" not in response.headers
+
+
+def test_profile_header_is_ignored_when_profiling_is_off():
+    assert not sql_profiler.enabled
+    response = client.get("/api/house", params={"limit": 5}, headers={"X-Profile": "1"})
+    assert "x-sql-profile" not in response.headers
+
+
+def test_statements_are_totalled_per_endpoint(profiling):
+    client.get("/api/house", params={"limit": 5})
+    client.get("/api/house", params={"limit": 5, "location": "Kigali"})
+
+    response = client.get("/debug/sql-profile", headers=auth_header("admin"))
+    assert response.status_code == 200
+    report = response.json()
+    assert report["enabled"] is True
+    routes = {row["route"] for row in report["statements"]}
+    assert "/api/house" in routes
+    row = next(row for row in report["statements"] if row["route"] == "/api/house")
+    assert row["count"] >= 1 and row["total_ms"] >= row["max_ms"]
+    assert row["last_parameters"] is not None
+
+    assert client.get("/debug/sql-profile", headers=auth_header("host")).status_code == 403
+    assert client.delete("/debug/sql-profile", headers=auth_header("admin")).status_code == 200
+    assert sql_profiler.report()["statements"] == []
+
+
+def test_profiler_shares_the_metrics_timing(profiling):
+    # one pair of timing listeners feeds both /metrics and the profiler
+    engine = get_engine()
+    assert len(engine.dispatch.before_cursor_execute) == 1
+    assert len(engine.dispatch.after_cursor_execute) == 1
+    client.get("/api/house", params={"limit": 5})
+    assert sql_profiler.report()["statements"]
+
+
+def test_slow_statements_are_logged_with_their_plan(profiling, caplog):
+    profiling.slow_ms = 0.000001
+    profiling.explain = True
+    with caplog.at_level(logging.WARNING, logger="functions.profiling"):
+        client.get("/api/house", params={"limit": 5})
+    slow = [record.getMessage() for record in caplog.records if record.getMessage().startswith("Slow query")]
+    assert slow
+    assert any("on /api/house" in message for message in slow)
+    # sqlite answers EXPLAIN QUERY PLAN with SCAN / SEARCH rows
+    assert any("SCAN" in message or "SEARCH" in message for message in slow)
+    # parameters stay out of the log unless SQL_LOG_PARAMETERS is on
+    assert not any("parameters=" in message for message in slow)
+
+    profiling.log_parameters = True
+    caplog.clear()
+    response_cache.clear()
+    with caplog.at_level(logging.WARNING, logger="functions.profiling"):
+        client.get("/api/house", params={"limit": 5})
+    assert any("parameters=" in record.getMessage() for record in caplog.records)
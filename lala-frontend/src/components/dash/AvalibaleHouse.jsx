@@ -3,7 +3,9 @@ import axios from 'axios';
 
 export const AvailableHouse = () => {
     const [houses, setHouses] = useState([]);
+    const [nextCursor, setNextCursor] = useState(null); // Cursor of the next page, null on the last one
     const [isLoading, setIsLoading] = useState(false); // Loading state for fetching houses
+    const [isLoadingMore, setIsLoadingMore] = useState(false); // Loading state for the next page
     const [isBooking, setIsBooking] = useState(false); // Loading state for booking
     const [selectedHouseId, setSelectedHouseId] = useState(null); // Track which house is being booked
     const [showModal, setShowModal] = useState(false); // Control modal visibility
@@ -14,17 +16,24 @@ export const AvailableHouse = () => {
     const userData = JSON.parse(localStorage.getItem('userData'));
     const accessToken = userData?.access_token;
 
+    // Fetch one page of available houses from the API; the listing is
+    // paginated, next_cursor is passed back as `after` for the next page
+    const fetchHouses = async (after = null) => {
+        const response = await axios.get(`${import.meta.env.VITE_LOCAL}api/house`, {
+            params: after === null ? {} : { after },
+            headers: {
+                Authorization: `Bearer ${accessToken}`,
+            },
+        });
+        setHouses((current) => (after === null ? response.data.houses : [...current, ...response.data.houses]));
+        setNextCursor(response.data.next_cursor);
+    };
+
     useEffect(() => {
-        // Fetch available houses from the API
-        const fetchHouses = async () => {
+        const fetchFirstPage = async () => {
             setIsLoading(true);
             try {
-                const response = await axios.get(`${import.meta.env.VITE_LOCAL}api/house`, {
-                    headers: {
-                        Authorization: `Bearer ${accessToken}`,
-                    },
-                });
-                setHouses(response.data);
+                await fetchHouses();
             } catch (error) {
                 console.error('Error fetching houses:', error);
             } finally {
@@ -33,12 +42,23 @@ export const AvailableHouse = () => {
         };
 
         if (accessToken) {
-            fetchHouses();
+            fetchFirstPage();
         } else {
             console.error('Access token not found in localStorage');
         }
     }, [accessToken]);
 
+    const handleLoadMore = async () => {
+        setIsLoadingMore(true);
+        try {
+            await fetchHouses(nextCursor);
+        } catch (error) {
+            console.error('Error fetching houses:', error);
+        } finally {
+            setIsLoadingMore(false);
+        }
+    };
+
     const handleBookClick = (houseId) => {
         setSelectedHouseId(houseId); // Set the house ID being booked
         setShowModal(true); // Open the modal
@@ -114,6 +134,17 @@ export const AvailableHouse = () => {
                         ))}
                     </div>
                 )}
+                {!isLoading && nextCursor !== null && (
+                    <div className="mt-6 flex justify-center">
+                        <button
+                            onClick={handleLoadMore}
+                            disabled={isLoadingMore}
+                            className="bg-gray-100 text-gray-700 px-4 py-2 rounded-lg hover:bg-gray-200 disabled:opacity-50"
+                        >
+                            {isLoadingMore ? 'Loading...' : 'Load more'}
+                        </button>
+                    </div>
+                )}
             </div>
 
             {/* Modal for selecting dates */}
@@ -1,4 +1,5 @@
 import React, { useState, useEffect } from 'react';
+import axios from 'axios';
 import { Home, Users, User, DollarSign, MapPin, Loader, Calendar, Clock, X, Check, Search } from 'lucide-react';
 
 const Modal = ({ isOpen, onClose, children }) => {
@@ -19,7 +20,9 @@ const HouseCustomers = () => {
   const accessToken = userData?.access_token;
 
   const [houses, setHouses] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [error, setError] = useState(null);
   const [selectedBooking, setSelectedBooking] = useState(null);
   const [isModalOpen, setIsModalOpen] = useState(false);
@@ -31,43 +34,43 @@ const HouseCustomers = () => {
     fetchHouses();
   }, []);
 
-  const fetchHouses = async () => {
+  // the houses come a page at a time, next_cursor is passed back as `after`
+  const fetchHouses = async (after = null) => {
     try {
-      const response = await fetch(`${import.meta.env.VITE_LOCAL}api/house/customers`, {
+      const response = await axios.get(`${import.meta.env.VITE_LOCAL}api/house/customers`, {
+        params: after === null ? {} : { after },
         headers: {
           'accept': 'application/json',
           'Authorization': `Bearer ${accessToken}` 
         }
       });
-      
-      if (!response.ok) {
-        throw new Error('Failed to fetch houses');
-      }
-      
-      const data = await response.json();
-      setHouses(data);
-      setLoading(false);
+
+      setHouses(current => after === null ? response.data.houses : [...current, ...response.data.houses]);
+      setNextCursor(response.data.next_cursor);
     } catch (err) {
-      setError(err.message);
+      setError('Failed to fetch houses');
+    } finally {
       setLoading(false);
+      setLoadingMore(false);
     }
   };
 
+  const loadMore = () => {
+    setLoadingMore(true);
+    fetchHouses(nextCursor);
+  };
+
   const updateBookingStatus = async (bookingId, status) => {
     setUpdateLoading(true);
     try {
-      const response = await fetch(`${import.meta.env.VITE_LOCAL}api/booking${bookingId}?status=${status}`, {
-        method: 'PUT',
+      await axios.put(`${import.meta.env.VITE_LOCAL}api/booking${bookingId}`, null, {
+        params: { status },
         headers: {
           'accept': 'application/json',
           'Authorization': `Bearer ${accessToken}` 
         }
       });
 
-      if (!response.ok) {
-        throw new Error('Failed to update booking status');
-      }
-
       const updatedHouses = houses.map(house => ({
         ...house,
         bookings: house.bookings.map(booking => 
@@ -88,7 +91,7 @@ const HouseCustomers = () => {
       document.body.appendChild(notification);
       setTimeout(() => notification.remove(), 3000);
     } catch (err) {
-      setError(err.message);
+      setError('Failed to update booking status');
     } finally {
       setUpdateLoading(false);
     }
@@ -159,8 +162,8 @@ const HouseCustomers = () => {
           >
             <option value="all">All Status</option>
             <option value="pending">Pending</option>
-            <option value="Approved">Approved</option>
-            <option value="cancelled">Cancelled</option>
+            <option value="approved">Approved</option>
+            <option value="canceled">Cancelled</option>
           </select>
         </div>
       </div>
@@ -223,7 +226,7 @@ const HouseCustomers = () => {
                       <div className="flex items-center justify-between">
                         <span className={`text-sm px-3 py-1 rounded-full font-medium ${
                           booking.status === 'pending' ? 'bg-yellow-100 text-yellow-700' :
-                          booking.status === 'Approved' ? 'bg-green-100 text-green-700' :
+                          booking.status === 'approved' ? 'bg-green-100 text-green-700' :
                           'bg-red-100 text-red-700'
                         }`}>
                           {booking.status}
@@ -254,6 +257,19 @@ const HouseCustomers = () => {
         ))}
       </div>
 
+      {nextCursor !== null && (
+        <div className="mt-8 flex justify-center">
+          <button
+            onClick={loadMore}
+            disabled={loadingMore}
+            className="flex items-center gap-2 px-4 py-2 border border-orange-600 text-orange-600 rounded-lg hover:bg-orange-50 transition-colors duration-200 disabled:opacity-50"
+          >
+            {loadingMore && <Loader className="w-4 h-4 animate-spin" />}
+            Load more properties
+          </button>
+        </div>
+      )}
+
       {filteredHouses.length === 0 && (
         <div className="text-center py-12 bg-gray-50 rounded-xl">
           <Home className="w-16 h-16 text-gray-400 mx-auto mb-4" />
@@ -290,7 +306,7 @@ const HouseCustomers = () => {
 
               <div className="flex items-center justify-end gap-3 pt-4 border-t">
                 <button
-                  onClick={() => updateBookingStatus(selectedBooking.booking_id, 'cancelled')}
+                  onClick={() => updateBookingStatus(selectedBooking.booking_id, 'canceled')}
                   disabled={updateLoading}
                   className="flex items-center gap-2 px-4 py-2 border border-red-600 text-red-600 rounded-lg hover:bg-red-50 transition-colors duration-200"
                 >
@@ -298,7 +314,7 @@ const HouseCustomers = () => {
                   Decline
                 </button>
                 <button
-                  onClick={() => updateBookingStatus(selectedBooking.booking_id, 'Approved')}
+                  onClick={() => updateBookingStatus(selectedBooking.booking_id, 'approved')}
                   disabled={updateLoading}
                   className="flex items-center gap-2 px-4 py-2 bg-green-600 text-white rounded-lg hover:bg-green-700 transition-colors duration-200"
                 >
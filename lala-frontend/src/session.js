@@ -0,0 +1,73 @@
+import axios from 'axios';
+import { jwtDecode } from 'jwt-decode';
+
+// Access tokens are short lived. Every axios request sends the current one,
+// it is refreshed shortly before it expires and once more when the API
+// answers 401, with the refresh token saved at login.
+const REFRESH_URL = `${import.meta.env.VITE_LOCAL}auth/refresh`;
+const EXPIRY_MARGIN_SECONDS = 30;
+
+let refreshing = null;
+
+const readSession = () => JSON.parse(localStorage.getItem('userData'));
+
+const expiresSoon = (token) => {
+    try {
+        const { exp } = jwtDecode(token);
+        return exp * 1000 - Date.now() < EXPIRY_MARGIN_SECONDS * 1000;
+    } catch {
+        return true;
+    }
+};
+
+const endSession = () => {
+    localStorage.removeItem('userData');
+    window.location.href = '/login';
+};
+
+// Exchanges the refresh token for a new pair. Concurrent callers share one
+// call, a refresh token can only be used once.
+export const refreshSession = () => {
+    if (!refreshing) {
+        const session = readSession();
+        refreshing = axios
+            .post(REFRESH_URL, { refresh_token: session?.refresh_token }, { skipAuthRefresh: true })
+            .then((response) => {
+                const updated = { ...readSession(), ...response.data };
+                localStorage.setItem('userData', JSON.stringify(updated));
+                return updated.access_token;
+            })
+            .catch((error) => {
+                endSession();
+                throw error;
+            })
+            .finally(() => {
+                refreshing = null;
+            });
+    }
+    return refreshing;
+};
+
+axios.interceptors.request.use(async (config) => {
+    const session = readSession();
+    if (config.skipAuthRefresh || !session?.access_token || !config.headers.Authorization) {
+        return config;
+    }
+    let token = session.access_token;
+    if (session.refresh_token && expiresSoon(token)) {
+        token = await refreshSession();
+    }
+    config.headers.Authorization = `Bearer ${token}`;
+    return config;
+});
+
+axios.interceptors.response.use(undefined, async (error) => {
+    const config = error.config;
+    if (error.response?.status !== 401 || !config || config.skipAuthRefresh || config.retried
+        || !config.headers?.Authorization || !readSession()?.refresh_token) {
+        throw error;
+    }
+    config.retried = true;
+    config.headers.Authorization = `Bearer ${await refreshSession()}`;
+    return axios(config);
+});